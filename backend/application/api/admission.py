@@ -0,0 +1,71 @@
+"""
+Admission of model-bound requests.
+
+Requests are admitted before their task is enqueued: a request that would
+miss its deadline in the current queue, or whose user already has too many
+requests in flight, is answered with 429 and a `Retry-After` header right
+away instead of timing out later.
+
+Functions:
+    admit: Admits a request or rejects it with 429.
+    kiq_admitted: Enqueues the task of an admitted request.
+"""
+
+from typing import Any, Optional
+
+from fastapi import HTTPException
+from taskiq import AsyncTaskiqDecoratedTask, AsyncTaskiqTask
+
+from infra.brokers.admission import (Admission, AdmissionController,
+                                     AdmissionRejected)
+from infra.brokers.kicker import labelled_kicker
+from logic import TypedContainer
+from logic.services.base import BpmnService
+
+
+async def admit(
+    container: TypedContainer, deadline: float, user_id: Optional[str] = None
+) -> Admission:
+    """
+    Admits a request to the pool of the model backend.
+
+    :param container: Dependency injection container.
+    :param deadline: Time in seconds the client waits for the answer.
+    :param user_id: Identifier of the requesting user (optional).
+    :return: Ticket of the admitted request.
+    :raises HTTPException: 429 with `Retry-After` if the request is rejected.
+    """
+    pool = container.resolve(BpmnService).model_name
+    try:
+        return await container.resolve(AdmissionController).admit(
+            pool, deadline, user_id
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(429, e.reason, headers={"Retry-After": str(e.retry_after)})
+
+
+async def kiq_admitted(
+    container: TypedContainer,
+    admission: Admission,
+    task: AsyncTaskiqDecoratedTask[Any, Any],
+    *args: Any,
+) -> AsyncTaskiqTask[Any]:
+    """
+    Enqueues the task of an admitted request. The leases are released if the
+    task cannot be enqueued.
+
+    :param container: Dependency injection container.
+    :param admission: Ticket of the admitted request.
+    :param task: Task to enqueue.
+    :param args: Arguments of the task.
+    :return: The enqueued task.
+    """
+    try:
+        return await (
+            labelled_kicker(task, **admission.labels)
+            .with_task_id(admission.task_id)
+            .kiq(*args)
+        )
+    except Exception:
+        await container.resolve(AdmissionController).cancel(admission)
+        raise
@@ -1,27 +1,73 @@
+import json
 import logging
+import uuid
+from collections.abc import AsyncIterator
 
-from fastapi import APIRouter, HTTPException
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from taskiq import TaskiqResultTimeoutError
 
+from application.api.admission import admit, kiq_admitted
 from application.api.bpmn.schemas import (SuggestionsRequest,
                                           SuggestionsResponse,
                                           XmlFromTextRequest, XmlResponse)
-from logic.tasks.bpmn_create import bpmn_create
-from logic.tasks.bpmn_suggestions import bpmn_get_suggestions
+from infra.brokers.results import TaskResultListener
+from infra.streams.redis import (StreamEvent, TaskStreamBus,
+                                 TaskStreamSubscription)
+from logic import TypedContainer, init_container
+from logic.tasks.bpmn_create import bpmn_create, bpmn_create_stream
+from logic.tasks.bpmn_suggestions import (bpmn_get_suggestions,
+                                          bpmn_get_suggestions_stream)
+from settings.config import Config
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/bpmn", tags=["BPMN"])
 
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def _relay_stream(
+    subscription: TaskStreamSubscription, config: Config
+) -> AsyncIterator[str]:
+    """
+    Relays task stream events to the HTTP client as NDJSON lines.
+
+    A `ping` line is sent while the worker is silent to keep the connection
+    alive, and an `error` line is sent if the stream stays idle for too long.
+    """
+    try:
+        events = subscription.listen(
+            config.bpmn_stream_idle_timeout, config.bpmn_stream_heartbeat
+        )
+        async for event in events:
+            line = event or StreamEvent(event="ping", data=None)
+            yield json.dumps(line, ensure_ascii=False) + "\n"
+    except TimeoutError:
+        logger.critical("Bpmn stream timeout error")
+        line = StreamEvent(event="error", data={"detail": "Server error"})
+        yield json.dumps(line) + "\n"
+    finally:
+        await subscription.close()
+
 
 @router.post("/from_text", response_model=XmlResponse)
-async def create_bpmn_from_text(data: XmlFromTextRequest) -> XmlResponse:
+async def create_bpmn_from_text(
+    data: XmlFromTextRequest,
+    container: TypedContainer = Depends(init_container),
+) -> XmlResponse:
     """
     Create BPMN XML from a text description.
     """
-    set_task = await bpmn_create.kiq(data.description, data.bpmn_xml)
+    config = container.resolve(Config)
+    admission = await admit(container, config.bpmn_request_timeout, data.user_id)
+    set_task = await kiq_admitted(
+        container, admission, bpmn_create, data.description, data.bpmn_xml
+    )
 
     try:
-        set_result = await set_task.wait_result(timeout=60, with_logs=True)
+        set_result = await container.resolve(TaskResultListener).wait(
+            set_task, timeout=config.bpmn_request_timeout, with_logs=True
+        )
     except TaskiqResultTimeoutError:
         logger.critical("Bpmn task timeout error", exc_info=True)
         raise HTTPException(500, "Server error")
@@ -36,14 +82,21 @@ async def create_bpmn_from_text(data: XmlFromTextRequest) -> XmlResponse:
 @router.post("/suggestions", response_model=SuggestionsResponse)
 async def get_suggestions_from_bpmn(
     data: SuggestionsRequest,
+    container: TypedContainer = Depends(init_container),
 ) -> SuggestionsResponse:
     """
     Retrieve suggestions for a given BPMN XML.
     """
-    set_task = await bpmn_get_suggestions.kiq(data.bpmn_xml)
+    config = container.resolve(Config)
+    admission = await admit(container, config.bpmn_request_timeout, data.user_id)
+    set_task = await kiq_admitted(
+        container, admission, bpmn_get_suggestions, data.bpmn_xml
+    )
 
     try:
-        set_result = await set_task.wait_result(timeout=60, with_logs=True)
+        set_result = await container.resolve(TaskResultListener).wait(
+            set_task, timeout=config.bpmn_request_timeout, with_logs=True
+        )
     except TaskiqResultTimeoutError:
         logger.critical("Bpmn task timeout error", exc_info=True)
         raise HTTPException(500, "Server error")
@@ -53,3 +106,68 @@ async def get_suggestions_from_bpmn(
         raise HTTPException(400, "Cannot create BPMN")
 
     return SuggestionsResponse(suggestions=set_result.return_value)
+
+
+@router.post("/from_text/stream")
+async def stream_bpmn_from_text(
+    data: XmlFromTextRequest,
+    container: TypedContainer = Depends(init_container),
+) -> StreamingResponse:
+    """
+    Create BPMN XML from a text description, streaming the result as NDJSON.
+
+    Every line is a JSON object with `event` and `data`: `chunk` events carry
+    partial XML with its offset, the final `done` event carries the full XML.
+    """
+    admission = await admit(
+        container, container.resolve(Config).bpmn_request_timeout, data.user_id
+    )
+    streams = container.resolve(TaskStreamBus)
+    stream_id = str(uuid.uuid4())
+    subscription = await streams.subscribe(stream_id)
+    try:
+        await kiq_admitted(
+            container,
+            admission,
+            bpmn_create_stream,
+            stream_id,
+            data.description,
+            data.bpmn_xml,
+        )
+    except Exception:
+        await subscription.close()
+        raise
+    return StreamingResponse(
+        _relay_stream(subscription, container.resolve(Config)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
+
+
+@router.post("/suggestions/stream")
+async def stream_suggestions_from_bpmn(
+    data: SuggestionsRequest,
+    container: TypedContainer = Depends(init_container),
+) -> StreamingResponse:
+    """
+    Retrieve suggestions for a given BPMN XML, streaming them as NDJSON.
+
+    Every line is a JSON object with `event` and `data`: each `suggestion`
+    event carries one suggestion, the final `done` event carries the full list.
+    """
+    admission = await admit(
+        container, container.resolve(Config).bpmn_request_timeout, data.user_id
+    )
+    streams = container.resolve(TaskStreamBus)
+    stream_id = str(uuid.uuid4())
+    subscription = await streams.subscribe(stream_id)
+    try:
+        await kiq_admitted(
+            container, admission, bpmn_get_suggestions_stream, stream_id, data.bpmn_xml
+        )
+    except Exception:
+        await subscription.close()
+        raise
+    return StreamingResponse(
+        _relay_stream(subscription, container.resolve(Config)),
+        media_type=NDJSON_MEDIA_TYPE,
+    )
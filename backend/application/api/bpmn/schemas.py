@@ -8,6 +8,7 @@ from logic.services.base import Suggestion
 class XmlFromTextRequest(BaseModel):
     description: str
     bpmn_xml: Optional[str] = Field(default=None)
+    user_id: Optional[str] = Field(default=None)
 
 
 class XmlResponse(BaseModel):
@@ -16,6 +17,7 @@ class XmlResponse(BaseModel):
 
 class SuggestionsRequest(BaseModel):
     bpmn_xml: str
+    user_id: Optional[str] = Field(default=None)
 
 
 class SuggestionsResponse(BaseModel):
@@ -2,9 +2,13 @@ import asyncio
 
 from fastapi import APIRouter, Depends, HTTPException, status
 
+from infra.cache.redis import CacheStats
+from infra.upstreams.redis import RedisUpstreamStats
 from logic import TypedContainer, init_container
+from logic.cache import BpmnCache, SuggestionsCache
 from logic.services.base import BpmnService
 from logic.services.xinference import XinferenceService
+from utils.upstreams import UpstreamStats
 
 router = APIRouter(tags=["Health"])
 
@@ -45,3 +49,32 @@ async def readiness_check() -> dict[str, str]:
     Readiness check endpoint for the application.
     """
     return {"status": "ready"}
+
+
+@router.get(
+    path="/metrics/cache",
+    description="Endpoint to get hit/miss counters of the result caches",
+)
+async def cache_metrics(
+    container: TypedContainer = Depends(init_container),
+) -> dict[str, CacheStats]:
+    """
+    Cache metrics endpoint for the application.
+    """
+    return {
+        "bpmn": await container.resolve(BpmnCache).stats(),
+        "suggestions": await container.resolve(SuggestionsCache).stats(),
+    }
+
+
+@router.get(
+    path="/metrics/upstreams",
+    description="Endpoint to get the circuit breaker state of the upstreams",
+)
+async def upstream_metrics(
+    container: TypedContainer = Depends(init_container),
+) -> dict[str, UpstreamStats]:
+    """
+    Upstream metrics endpoint for the application.
+    """
+    return await container.resolve(RedisUpstreamStats).stats()
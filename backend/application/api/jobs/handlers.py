@@ -0,0 +1,193 @@
+import logging
+from typing import Any, Optional
+
+from fastapi import (APIRouter, Depends, Header, HTTPException, Request,
+                     Response)
+from fastapi.responses import JSONResponse
+from taskiq import AsyncResultBackend, AsyncTaskiqDecoratedTask, TaskiqResult
+
+from application.api.admission import admit
+from application.api.bpmn.schemas import (SuggestionsRequest,
+                                          SuggestionsResponse,
+                                          XmlFromTextRequest, XmlResponse)
+from application.api.jobs.schemas import (JobResponse, JobStatus,
+                                          JobStatusResponse)
+from infra.brokers.admission import Admission, AdmissionController
+from infra.brokers.jobs import QUEUED, enqueue_job, job_kind
+from infra.cache.redis import content_key
+from logic import TypedContainer, init_container
+from logic.tasks.bpmn_create import bpmn_create
+from logic.tasks.bpmn_suggestions import bpmn_get_suggestions
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/jobs", tags=["Jobs"])
+
+BPMN_JOB = "bpmn"
+SUGGESTIONS_JOB = "suggestions"
+
+ERRORS = {
+    BPMN_JOB: "Cannot create BPMN",
+    SUGGESTIONS_JOB: "Cannot get suggestions",
+}
+
+
+async def _enqueue(
+    container: TypedContainer,
+    admission: Admission,
+    task: AsyncTaskiqDecoratedTask[Any, Any],
+    kind: str,
+    *args: Any,
+) -> None:
+    try:
+        await enqueue_job(task, admission.task_id, kind, *args, labels=admission.labels)
+    except Exception:
+        await container.resolve(AdmissionController).cancel(admission)
+        raise
+
+
+def _accepted(request: Request, response: Response, job_id: str) -> JobResponse:
+    response.headers["Location"] = str(request.url_for("get_job", job_id=job_id))
+    return JobResponse(job_id=job_id, status="queued")
+
+
+async def _load_job(
+    job_id: str, backend: AsyncResultBackend[Any], with_result: bool = False
+) -> tuple[str, JobStatus, dict[str, Any], Optional[TaskiqResult[Any]]]:
+    """
+    Reads the kind, status, progress and, if requested, the result of a job.
+
+    The progress is a dict with the `progress` fraction and, for a running
+    job that reports it, the amount of output `generated` so far.
+
+    :raises HTTPException: 404 if there is no such job.
+    """
+    progress = await backend.get_progress(job_id)
+    kind = job_kind(progress)
+    if progress is None or kind is None:
+        raise HTTPException(404, "Job not found")
+
+    if await backend.is_result_ready(job_id):
+        result = await backend.get_result(job_id, with_logs=with_result)
+        return kind, "failed" if result.is_err else "done", {"progress": 1.0}, result
+    if progress.state == QUEUED:
+        return kind, "queued", {"progress": 0.0}, None
+    meta = progress.meta or {}
+    reported, generated = meta.get("progress"), meta.get("generated")
+    return (
+        kind,
+        "running",
+        {
+            "progress": (
+                float(reported) if isinstance(reported, (int, float)) else None
+            ),
+            "generated": generated if isinstance(generated, int) else None,
+        },
+        None,
+    )
+
+
+def _etag_matches(etag: str, if_none_match: Optional[str]) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+@router.post("/bpmn/from_text", response_model=JobResponse, status_code=202)
+async def create_bpmn_job(
+    data: XmlFromTextRequest,
+    request: Request,
+    response: Response,
+    container: TypedContainer = Depends(init_container),
+) -> JobResponse:
+    """
+    Start creating BPMN XML from a text description.
+
+    The response carries the job id, the status is available at the URL
+    of the `Location` header.
+    """
+    admission = await admit(
+        container, container.resolve(Config).job_deadline, data.user_id
+    )
+    await _enqueue(
+        container, admission, bpmn_create, BPMN_JOB, data.description, data.bpmn_xml
+    )
+    return _accepted(request, response, admission.task_id)
+
+
+@router.post("/bpmn/suggestions", response_model=JobResponse, status_code=202)
+async def create_suggestions_job(
+    data: SuggestionsRequest,
+    request: Request,
+    response: Response,
+    container: TypedContainer = Depends(init_container),
+) -> JobResponse:
+    """
+    Start retrieving suggestions for a given BPMN XML.
+
+    The response carries the job id, the status is available at the URL
+    of the `Location` header.
+    """
+    admission = await admit(
+        container, container.resolve(Config).job_deadline, data.user_id
+    )
+    await _enqueue(
+        container, admission, bpmn_get_suggestions, SUGGESTIONS_JOB, data.bpmn_xml
+    )
+    return _accepted(request, response, admission.task_id)
+
+
+@router.get("/{job_id}", response_model=JobStatusResponse)
+async def get_job(
+    job_id: str,
+    container: TypedContainer = Depends(init_container),
+) -> JobStatusResponse:
+    """
+    Report the status of a job: `queued`, `running`, `done` or `failed`.
+
+    Progress is 0 for a queued job and 1 for a finished one. A running job
+    reports the amount of output generated so far (characters of BPMN XML or
+    suggestions) in `generated`, and a BPMN job estimates its progress from
+    it.
+    """
+    kind, status, progress, _ = await _load_job(
+        job_id, container.resolve(AsyncResultBackend)
+    )
+    return JobStatusResponse(job_id=job_id, kind=kind, status=status, **progress)
+
+
+@router.get(
+    "/{job_id}/result",
+    response_model=XmlResponse | SuggestionsResponse,
+    responses={304: {"description": "Not modified"}},
+)
+async def get_job_result(
+    job_id: str,
+    if_none_match: Optional[str] = Header(default=None),
+    container: TypedContainer = Depends(init_container),
+) -> Response:
+    """
+    Return the result of a finished job.
+
+    The result of a job never changes, so it carries an `ETag` and
+    a request with a matching `If-None-Match` header gets 304 without a body.
+    A job that has not finished yet gets 409.
+    """
+    kind, status, _, result = await _load_job(
+        job_id, container.resolve(AsyncResultBackend), with_result=True
+    )
+    if result is None:
+        raise HTTPException(409, f"Job is {status}")
+    if result.is_err:
+        logger.critical(result.log)
+        raise HTTPException(400, ERRORS.get(kind, "Job failed"))
+
+    if kind == SUGGESTIONS_JOB:
+        body = SuggestionsResponse(suggestions=result.return_value).model_dump()
+    else:
+        body = XmlResponse(bpmn_xml=result.return_value).model_dump()
+    etag = f'"{content_key(body)}"'
+    if _etag_matches(etag, if_none_match):
+        return Response(status_code=304, headers={"ETag": etag})
+    return JSONResponse(body, headers={"ETag": etag})
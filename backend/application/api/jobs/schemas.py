@@ -0,0 +1,18 @@
+from typing import Literal, Optional
+
+from pydantic import BaseModel
+
+JobStatus = Literal["queued", "running", "done", "failed"]
+
+
+class JobResponse(BaseModel):
+    job_id: str
+    status: JobStatus
+
+
+class JobStatusResponse(BaseModel):
+    job_id: str
+    kind: str
+    status: JobStatus
+    progress: Optional[float]
+    generated: Optional[int] = None
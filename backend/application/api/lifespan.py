@@ -29,6 +29,8 @@ from typing import Any
 from fastapi import FastAPI
 from taskiq import ScheduleSource, TaskiqScheduler
 
+from infra.brokers.results import TaskResultListener
+from infra.http.pool import HttpClientPool
 from logic import TypedContainer, init_container
 from logic.services.base import BpmnService
 from logic.services.xinference import XinferenceService
@@ -107,7 +109,8 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[Any, None]:
 
     This context manager is used to initialize necessary services during
     application startup and shut them down during application shutdown.
-    Specifically, it starts the scheduler and source, and initializes the
+    Specifically, it starts the scheduler and source, opens the pooled HTTP
+    clients, subscribes to task result notifications, and initializes the
     Xinference and Ollama models.
 
     It should be used as a `lifespan` parameter for FastAPI to manage
@@ -120,14 +123,20 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[Any, None]:
     container = init_container()
     scheduler = container.resolve(TaskiqScheduler)
     source = container.resolve(ScheduleSource)
+    http_pool = container.resolve(HttpClientPool)
+    results = container.resolve(TaskResultListener)
 
     await source.startup()
     await scheduler.startup()
+    await http_pool.startup()
+    await results.startup()
 
     await create_xinference_model(container)
     await create_ollama_model(container)
 
     yield
 
+    await results.shutdown()
+    await http_pool.shutdown()
     await source.shutdown()
     await scheduler.shutdown()
@@ -8,6 +8,7 @@ from socketio import ASGIApp
 
 from application.api.bpmn.handlers import router as bpmn_router
 from application.api.health.handlers import router as health_router
+from application.api.jobs.handlers import router as jobs_router
 from application.api.lifespan import lifespan
 from application.api.pipeline.handlers import router as pipeline_router
 from application.api.stt.handlers import router as stt_router
@@ -98,6 +99,7 @@ def create_app() -> FastAPI:
     app.include_router(stt_router)
     app.include_router(pipeline_router)
     app.include_router(bpmn_router)
+    app.include_router(jobs_router)
 
     app.mount("/socket.io", ASGIApp(sio))
 
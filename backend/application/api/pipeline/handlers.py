@@ -1,47 +1,60 @@
-import base64
 import logging
 import uuid
-from typing import Annotated
+from typing import Annotated, Any, Optional
 
-from fastapi import APIRouter, Depends, File, HTTPException, Query, UploadFile
+from fastapi import APIRouter, Depends, File, Query, UploadFile
 from taskiq import AsyncBroker
 from taskiq_pipelines import Pipeline
 
 from application.api.pipeline.schemas import (PipelineResponse,
                                               TextPipelineRequest)
+from application.api.uploads import check_audio_type, save_upload
 from logic import TypedContainer, init_container
 from logic.tasks.base import PipelineValue
 from logic.tasks.bpmn_create import pipeline_bpmn_step
 from logic.tasks.bpmn_suggestions import pipeline_bpmn_suggestions_step
-from logic.tasks.stt import pipeline_stt_step
+from logic.tasks.stt import cached_transcript, pipeline_stt_step
 from logic.tasks.webm_convert import pipeline_webm_covert_step
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/pipeline", tags=["Pipeline"])
 
 
+def _audio_pipeline(
+    broker: AsyncBroker, transcript: Optional[str]
+) -> Pipeline[Any, Any]:
+    """
+    Builds the pipeline of an uploaded recording. With a cached transcript
+    the conversion is skipped and the STT step passes the transcript on.
+    """
+    if transcript is None:
+        pipe = Pipeline(broker, pipeline_webm_covert_step).call_next(pipeline_stt_step)
+    else:
+        pipe = Pipeline(broker, pipeline_stt_step)
+    return pipe.call_next(pipeline_bpmn_step).call_next(pipeline_bpmn_suggestions_step)
+
+
 @router.post("/from_file", response_model=PipelineResponse)
 async def start_pipeline_from_file(
     user_id: Annotated[str, Query(..., description="User id")],
-    file: Annotated[UploadFile, File(description="*.webm speach file")],
+    file: Annotated[UploadFile, File(description="*.webm/ogg/wav/mp3 speach file")],
     container: TypedContainer = Depends(init_container),
 ) -> PipelineResponse:
     broker = container.resolve(AsyncBroker)
-    if file.content_type != "audio/webm":
-        raise HTTPException(400, "Invalid file format")
-
-    content = await file.read()
-    encoded = base64.b64encode(content).decode("utf-8")
-    pipe = (
-        Pipeline(broker, pipeline_webm_covert_step)
-        .call_next(pipeline_stt_step)
-        .call_next(pipeline_bpmn_step)
-        .call_next(pipeline_bpmn_suggestions_step)
-    )
+    check_audio_type(file)
+    ref = await save_upload(file, container)
+    transcript = await cached_transcript(ref, container=container)
+    pipe = _audio_pipeline(broker, transcript)
 
     pipeline_id = str(uuid.uuid4())
     await pipe.kiq(
-        PipelineValue(value=encoded, user_id=user_id, pipeline_id=pipeline_id)
+        PipelineValue(
+            value=ref,
+            user_id=user_id,
+            pipeline_id=pipeline_id,
+            audio_ref=ref,
+            transcript=transcript,
+        )
     )
     return PipelineResponse(pipeline_id=pipeline_id)
 
@@ -1,13 +1,15 @@
-import base64
 import logging
 from typing import Annotated
 
-from fastapi import APIRouter, File, HTTPException, UploadFile
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
 from taskiq import TaskiqResultTimeoutError
 
 from application.api.stt.schemas import UploadAudioResponseSchema
-from logic.tasks.stt import stt
-from logic.tasks.webm_convert import webm_convert
+from application.api.uploads import check_audio_type, save_upload
+from infra.brokers.results import TaskResultListener
+from logic import TypedContainer, init_container
+from logic.tasks.stt import audio_to_text, cached_transcript
+from settings.config import Config
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/stt", tags=["Speech-To-Text"])
@@ -15,22 +17,22 @@ router = APIRouter(prefix="/stt", tags=["Speech-To-Text"])
 
 @router.post("/upload_audio", response_model=UploadAudioResponseSchema)
 async def get_text_from_audio(
-    file: Annotated[UploadFile, File(description="*.webm speach file")],
+    file: Annotated[UploadFile, File(description="*.webm/ogg/wav/mp3 speach file")],
+    container: TypedContainer = Depends(init_container),
 ) -> UploadAudioResponseSchema:
     """
-    Converts an uploaded `.webm` audio file into text.
+    Converts an uploaded `.webm`, `.ogg`, `.wav` or `.mp3` audio file into text.
     """
-    if file.content_type != "audio/webm":
-        raise HTTPException(400, "Invalid file format")
-
-    content = await file.read()
-    encoded = base64.b64encode(content).decode("utf-8")
+    check_audio_type(file)
+    ref = await save_upload(file, container)
+    if (transcript := await cached_transcript(ref, container=container)) is not None:
+        return UploadAudioResponseSchema(text=transcript)
 
     try:
-        set_webm_task = await webm_convert.kiq(encoded)
-        encoded_content = await set_webm_task.wait_result(timeout=30, with_logs=True)
-        set_stt_task = await stt.kiq(encoded_content.return_value)
-        set_result = await set_stt_task.wait_result(timeout=60, with_logs=True)
+        task = await audio_to_text.kiq(ref)
+        set_result = await container.resolve(TaskResultListener).wait(
+            task, timeout=container.resolve(Config).stt_upload_timeout, with_logs=True
+        )
     except TaskiqResultTimeoutError:
         logger.critical("STT task timeout error", exc_info=True)
         raise HTTPException(500, "Server error")
@@ -0,0 +1,71 @@
+"""
+Streaming of uploaded files to the blob store.
+
+Starlette spools multipart uploads to a temporary file, so reading the
+upload in chunks keeps only one chunk of it in the API memory. The size limit
+is enforced while streaming, and the content hash used as the blob
+reference is computed on the fly by the blob writer.
+
+Functions:
+    check_audio_type: Rejects uploads that are not a supported recording.
+    save_upload: Streams an uploaded file to the blob store.
+"""
+
+from fastapi import HTTPException, UploadFile
+
+from infra.blobs.base import BlobStore
+from logic import TypedContainer
+from settings.config import Config
+
+AUDIO_CONTENT_TYPES = frozenset(
+    {
+        "audio/webm",
+        "audio/ogg",
+        "audio/opus",
+        "audio/wav",
+        "audio/wave",
+        "audio/x-wav",
+        "audio/mpeg",
+        "audio/mp3",
+    }
+)
+
+
+def check_audio_type(file: UploadFile) -> None:
+    """
+    Rejects uploads that are not a supported recording. Codec parameters,
+    e.g. `audio/webm;codecs=opus`, are ignored.
+
+    :param file: Uploaded file.
+    :return: None
+    :raises HTTPException: 400 if the content type is not supported.
+    """
+    content_type = (file.content_type or "").split(";")[0].strip().lower()
+    if content_type not in AUDIO_CONTENT_TYPES:
+        raise HTTPException(400, "Invalid file format")
+
+
+async def save_upload(file: UploadFile, container: TypedContainer) -> str:
+    """
+    Streams an uploaded file to the blob store.
+
+    :param file: Uploaded file.
+    :param container: Dependency injection container.
+    :return: Blob reference of the file content.
+    :raises HTTPException: 413 if the file exceeds the configured size.
+    """
+    config = container.resolve(Config)
+    too_large = HTTPException(413, "File is too large")
+    if file.size is not None and file.size > config.upload_max_bytes:
+        raise too_large
+
+    writer = container.resolve(BlobStore).writer()
+    try:
+        while chunk := await file.read(config.upload_chunk_size):
+            if writer.size + len(chunk) > config.upload_max_bytes:
+                raise too_large
+            await writer.write(chunk)
+        return await writer.commit()
+    except BaseException:
+        await writer.abort()
+        raise
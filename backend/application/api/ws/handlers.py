@@ -1,11 +1,20 @@
 import logging
 import uuid
-from typing import Any, Union
+from typing import Any, Optional, Union
 
 from fast_depends import Depends, inject
 from socketio import AsyncManager, AsyncServer
+from taskiq import AsyncBroker
+from taskiq_pipelines import Pipeline
 
+from infra.audio.ffmpeg import FfmpegTranscoder
 from logic import TypedContainer, init_container
+from logic.audio.stream import SpeechStream, StreamFormat
+from logic.services.xinference import XinferenceService
+from logic.tasks.base import PipelineValue
+from logic.tasks.bpmn_create import pipeline_bpmn_step
+from logic.tasks.bpmn_suggestions import pipeline_bpmn_suggestions_step
+from settings.config import Config
 
 logger = logging.getLogger(__name__)
 
@@ -133,3 +142,163 @@ async def disconnect(sid: str) -> None:
     :rtype: None
     """
     logger.info(f"[-] Client disconnected: {sid}")
+
+
+STT_NAMESPACE = "/stt"
+
+
+@inject
+def _create_speech_stream(
+    audio_format: StreamFormat, container: TypedContainer = Depends(init_container)
+) -> SpeechStream:
+    """
+    Creates the audio buffer of a streaming STT session.
+
+    :param audio_format: Format of the incoming chunks, `pcm` or `webm`.
+    :param container: A container for resolving dependencies.
+    :return: A new speech stream.
+    """
+    return SpeechStream(
+        config=container.resolve(Config),
+        transcoder=container.resolve(FfmpegTranscoder),
+        stt=container.resolve(XinferenceService),
+        audio_format=audio_format,
+    )
+
+
+@inject
+async def _start_bpmn_pipeline(
+    user_id: str,
+    text: str,
+    bpmn_xml: Optional[str],
+    container: TypedContainer = Depends(init_container),
+) -> str:
+    """
+    Starts the BPMN generation pipeline for a streamed transcript.
+
+    :param user_id: User receiving the pipeline notifications.
+    :param text: Transcript of the stream.
+    :param bpmn_xml: Diagram to edit, if any.
+    :param container: A container for resolving dependencies.
+    :return: Identifier of the started pipeline.
+    """
+    pipeline_id = str(uuid.uuid4())
+    pipe = Pipeline(container.resolve(AsyncBroker), pipeline_bpmn_step).call_next(
+        pipeline_bpmn_suggestions_step
+    )
+    await pipe.kiq(
+        PipelineValue(value=text, user_id=user_id, pipeline_id=pipeline_id), bpmn_xml
+    )
+    return pipeline_id
+
+
+async def _emit_transcript(sid: str, payload: dict[str, Any]) -> None:
+    await sio.emit("transcript", payload, to=sid, namespace=STT_NAMESPACE)
+
+
+@sio.on("start", namespace=STT_NAMESPACE)  # type: ignore
+async def stt_start(sid: str, data: Any = None) -> tuple[str, str]:
+    """
+    Starts a streaming STT session.
+
+    The options are `format` (`pcm` for raw 16 kHz mono 16-bit little-endian
+    samples, or `webm` for `MediaRecorder` chunks), and `user_id` together
+    with an optional `bpmn_xml` to run the BPMN pipeline on the transcript
+    when the stream stops.
+
+    :param sid: The Socket.IO session ID of the user.
+    :type sid: str
+
+    :param data: Session options.
+    :type data: Any, optional
+
+    :return: Response status and the accepted audio format.
+    :rtype: tuple[str, str]
+    """
+    options = data if isinstance(data, dict) else {}
+    audio_format = options.get("format", "pcm")
+    if audio_format not in ("pcm", "webm"):
+        return "ERROR", "Unsupported audio format"
+
+    await sio.save_session(
+        sid,
+        {
+            "stream": _create_speech_stream(audio_format),
+            "user_id": options.get("user_id"),
+            "bpmn_xml": options.get("bpmn_xml"),
+        },
+        namespace=STT_NAMESPACE,
+    )
+    return "OK", audio_format
+
+
+@sio.on("audio", namespace=STT_NAMESPACE)  # type: ignore
+async def stt_audio(sid: str, chunk: bytes) -> None:
+    """
+    Receives the next binary audio chunk of a streaming STT session.
+
+    A `transcript` event with the `partial` status is pushed back whenever
+    the chunk completes a transcribed window.
+
+    :param sid: The Socket.IO session ID of the user.
+    :type sid: str
+
+    :param chunk: Audio chunk in the format chosen at start.
+    :type chunk: bytes
+
+    :return: None
+    :rtype: None
+    """
+    session: dict[str, Any] = await sio.get_session(sid, namespace=STT_NAMESPACE)
+    stream: Optional[SpeechStream] = session.get("stream")
+    if stream is None or not isinstance(chunk, bytes):
+        return
+    try:
+        if await stream.feed(chunk):
+            await _emit_transcript(
+                sid, {"status": "partial", "text": stream.transcript}
+            )
+    except Exception as e:
+        logger.error("Streaming STT error: ")
+        logger.exception(e)
+        session.pop("stream", None)
+        await _emit_transcript(sid, {"status": "error", "text": stream.transcript})
+
+
+@sio.on("stop", namespace=STT_NAMESPACE)  # type: ignore
+async def stt_stop(sid: str, data: Any = None) -> Optional[dict[str, Any]]:
+    """
+    Stops a streaming STT session and transcribes the rest of the audio.
+
+    The final transcript is pushed as a `transcript` event with the `done`
+    status and returned as the acknowledgement. If the session was started
+    with a `user_id`, the BPMN pipeline is started on the transcript and its
+    id is included.
+
+    :param sid: The Socket.IO session ID of the user.
+    :type sid: str
+
+    :param data: Unused.
+    :type data: Any, optional
+
+    :return: The final transcript event, or None without an active session.
+    :rtype: dict[str, Any] | None
+    """
+    session: dict[str, Any] = await sio.get_session(sid, namespace=STT_NAMESPACE)
+    stream: Optional[SpeechStream] = session.pop("stream", None)
+    if stream is None:
+        return None
+
+    payload: dict[str, Any]
+    try:
+        payload = {"status": "done", "text": await stream.finish()}
+        if session.get("user_id") and payload["text"]:
+            payload["pipeline_id"] = await _start_bpmn_pipeline(
+                session["user_id"], payload["text"], session.get("bpmn_xml")
+            )
+    except Exception as e:
+        logger.error("Streaming STT error: ")
+        logger.exception(e)
+        payload = {"status": "error", "text": stream.transcript}
+    await _emit_transcript(sid, payload)
+    return payload
@@ -0,0 +1,165 @@
+"""
+Audio transcoding with an ffmpeg subprocess.
+
+The input is piped to ffmpeg's stdin and the result read from its stdout, so
+the conversion runs in a separate process and never blocks the event loop of
+the worker. A semaphore bounds the number of concurrent ffmpeg processes per
+worker, and a timeout kills a process that hangs on a broken input.
+
+Every run is logged with its queue wait and its run time, which makes the
+transcoding a separately measurable stage of the pipeline.
+
+Silence detection reuses the same limits and parses the log of ffmpeg's
+`silencedetect` filter.
+
+Classes:
+    TranscodeError: Raised when ffmpeg fails or times out.
+    FfmpegTranscoder: Runs ffmpeg with the configured limits.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Optional
+
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+_SILENCE = re.compile(r"silence_(start|end): (-?[\d.]+)")
+
+
+class TranscodeError(RuntimeError):
+    """
+    Raised when ffmpeg exits with an error or exceeds its timeout.
+    """
+
+
+@dataclass
+class FfmpegTranscoder:
+    """
+    Runs ffmpeg subprocesses with bounded concurrency and a timeout.
+
+    :param config: Configuration object holding the ffmpeg settings.
+    """
+
+    config: Config
+    _slots: asyncio.Semaphore = field(init=False)
+
+    def __post_init__(self) -> None:
+        self._slots = asyncio.Semaphore(self.config.ffmpeg_max_concurrency)
+
+    async def transcode(
+        self,
+        content: bytes,
+        output_args: Sequence[str],
+        input_format: Optional[str] = None,
+    ) -> bytes:
+        """
+        Pipes the content through ffmpeg.
+
+        :param content: Input file content.
+        :param output_args: ffmpeg output options, including the format.
+        :param input_format: Input format, detected by ffmpeg if omitted.
+        :return: Output file content.
+        :raises TranscodeError: If ffmpeg fails or exceeds the timeout.
+        """
+        output, _ = await self._measured(
+            "Transcoded", content, output_args, input_format
+        )
+        return output
+
+    async def detect_silences(
+        self, content: bytes, noise_db: float, min_duration: float
+    ) -> list[tuple[float, float]]:
+        """
+        Finds the spans of silence in a recording.
+
+        :param content: Input file content.
+        :param noise_db: Level in dB below which the audio counts as silence.
+        :param min_duration: Minimum length of a silence in seconds.
+        :return: Sorted `(start, end)` spans of silence in seconds.
+        :raises TranscodeError: If ffmpeg fails or exceeds the timeout.
+        """
+        _, log = await self._measured(
+            "Detected silences in",
+            content,
+            [
+                "-af",
+                f"silencedetect=noise={noise_db:g}dB:d={min_duration:g}",
+                "-f",
+                "null",
+            ],
+            loglevel="info",
+        )
+        silences: list[tuple[float, float]] = []
+        start: Optional[float] = None
+        for kind, value in _SILENCE.findall(log.decode("utf-8", errors="replace")):
+            if kind == "start":
+                start = max(0.0, float(value))
+            elif start is not None:
+                silences.append((start, float(value)))
+                start = None
+        return silences
+
+    async def _measured(
+        self,
+        action: str,
+        content: bytes,
+        output_args: Sequence[str],
+        input_format: Optional[str] = None,
+        loglevel: str = "error",
+    ) -> tuple[bytes, bytes]:
+        queued = time.perf_counter()
+        async with self._slots:
+            started = time.perf_counter()
+            output, log = await self._run(content, output_args, input_format, loglevel)
+            finished = time.perf_counter()
+        logger.info(
+            f"{action} {len(content)} bytes: "
+            f"waited {(started - queued) * 1000:.0f} ms, "
+            f"ran {(finished - started) * 1000:.0f} ms"
+        )
+        return output, log
+
+    async def _run(
+        self,
+        content: bytes,
+        output_args: Sequence[str],
+        input_format: Optional[str],
+        loglevel: str,
+    ) -> tuple[bytes, bytes]:
+        args = [self.config.ffmpeg_path, "-hide_banner", "-loglevel", loglevel]
+        if input_format:
+            args += ["-f", input_format]
+        args += ["-i", "pipe:0", *output_args, "pipe:1"]
+
+        process = await asyncio.create_subprocess_exec(
+            *args,
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            stdout, stderr = await asyncio.wait_for(
+                process.communicate(content), self.config.ffmpeg_timeout
+            )
+        except asyncio.TimeoutError:
+            process.kill()
+            await process.wait()
+            raise TranscodeError(
+                f"ffmpeg exceeded the timeout of {self.config.ffmpeg_timeout}s"
+            )
+        except asyncio.CancelledError:
+            process.kill()
+            await process.wait()
+            raise
+        if process.returncode != 0:
+            message = stderr.decode("utf-8", errors="replace").strip()
+            raise TranscodeError(
+                f"ffmpeg exited with code {process.returncode}: {message[-500:]}"
+            )
+        return stdout, stderr
@@ -0,0 +1,121 @@
+"""
+Helpers for WAV files written by ffmpeg to a pipe.
+
+ffmpeg cannot seek back in a pipe to fill in the chunk sizes of the RIFF
+header, so a WAV file read from its stdout declares placeholder sizes. The
+helpers here fix the header in place and read the duration from the real
+length of the `data` chunk.
+
+Functions:
+    seal_wav: Fixes the RIFF and `data` chunk sizes of a piped WAV file.
+    wav_duration: Computes the duration of a WAV file in seconds.
+    is_pcm_wav: Checks whether a file is 16-bit PCM WAV of a given format.
+    slice_wav: Cuts a time span out of a WAV file.
+    pcm_to_wav: Wraps raw 16-bit PCM samples into a WAV file.
+"""
+
+import io
+import wave
+
+
+def _chunk(content: bytes | bytearray, name: bytes) -> int:
+    if content[:4] != b"RIFF" or content[8:12] != b"WAVE":
+        raise ValueError("Not a WAV file")
+    position = 12
+    while position + 8 <= len(content):
+        if content[position : position + 4] == name:
+            return position
+        size = int.from_bytes(content[position + 4 : position + 8], "little")
+        position += 8 + size + (size & 1)
+    raise ValueError(f"WAV file has no {name.decode()} chunk")
+
+
+def seal_wav(content: bytes) -> bytes:
+    """
+    Fixes the RIFF and `data` chunk sizes of a WAV file written to a pipe.
+
+    :param content: WAV file with placeholder chunk sizes.
+    :return: WAV file with the real chunk sizes.
+    :raises ValueError: If the content is not a WAV file.
+    """
+    sealed = bytearray(content)
+    data = _chunk(sealed, b"data")
+    sealed[4:8] = (len(sealed) - 8).to_bytes(4, "little")
+    sealed[data + 4 : data + 8] = (len(sealed) - data - 8).to_bytes(4, "little")
+    return bytes(sealed)
+
+
+def wav_duration(content: bytes) -> float:
+    """
+    Computes the duration of a sealed WAV file.
+
+    :param content: WAV file with real chunk sizes.
+    :return: Duration in seconds.
+    :raises ValueError: If the content is not a WAV file.
+    """
+    fmt, data = _chunk(content, b"fmt "), _chunk(content, b"data")
+    byte_rate = int.from_bytes(content[fmt + 16 : fmt + 20], "little")
+    size = int.from_bytes(content[data + 4 : data + 8], "little")
+    return size / byte_rate if byte_rate else 0.0
+
+
+def is_pcm_wav(content: bytes, sample_rate: int, channels: int) -> bool:
+    """
+    Checks whether the content is a sealed 16-bit PCM WAV file with the given
+    sample rate and channel count.
+
+    :param content: File content of any format.
+    :param sample_rate: Expected sample rate in Hz.
+    :param channels: Expected number of channels.
+    :return: True if the file can be used as is.
+    """
+    try:
+        with wave.open(io.BytesIO(content)) as file:
+            params = file.getparams()
+    except (wave.Error, EOFError):
+        return False
+    return bool(
+        params.comptype == "NONE"
+        and params.sampwidth == 2
+        and params.framerate == sample_rate
+        and params.nchannels == channels
+        and params.nframes * channels * 2 <= len(content)
+    )
+
+
+def slice_wav(content: bytes, start: float, end: float) -> bytes:
+    """
+    Cuts a time span out of a sealed WAV file.
+
+    :param content: WAV file with real chunk sizes.
+    :param start: Start of the span in seconds.
+    :param end: End of the span in seconds.
+    :return: WAV file of the span with the same format.
+    """
+    with wave.open(io.BytesIO(content)) as source:
+        params = source.getparams()
+        source.setpos(min(int(start * params.framerate), params.nframes))
+        frames = source.readframes(int((end - start) * params.framerate))
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as target:
+        target.setparams(params)
+        target.writeframes(frames)
+    return buffer.getvalue()
+
+
+def pcm_to_wav(pcm: bytes, sample_rate: int, channels: int) -> bytes:
+    """
+    Wraps raw little-endian 16-bit PCM samples into a WAV file.
+
+    :param pcm: Interleaved samples.
+    :param sample_rate: Sample rate in Hz.
+    :param channels: Number of channels.
+    :return: WAV file of the samples.
+    """
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as target:
+        target.setnchannels(channels)
+        target.setsampwidth(2)
+        target.setframerate(sample_rate)
+        target.writeframes(pcm)
+    return buffer.getvalue()
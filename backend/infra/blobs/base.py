@@ -0,0 +1,129 @@
+"""
+Content-addressed storage of large binary payloads.
+
+Audio uploads and intermediate conversions are kept out of the broker and
+the result backend: tasks exchange short blob references and read the bytes
+from the store on demand. A reference is the hex SHA-256 digest of the
+content, so uploading the same recording twice stores it once.
+
+Blobs are temporary. Every store expires them after a configured TTL instead
+of tracking their consumers.
+
+Large uploads are written chunk by chunk through a `BlobWriter`, which hashes
+the content on the fly, so the reference is known without ever holding the
+whole blob in memory.
+
+Classes:
+    BlobNotFoundError: Raised for an unknown or expired reference.
+    BlobWriter: Protocol of an incremental write of one blob.
+    BlobStore: Protocol of the store implementations.
+
+Functions:
+    blob_ref: Computes the reference of a content.
+"""
+
+import hashlib
+from typing import Protocol
+
+
+class BlobNotFoundError(LookupError):
+    """
+    Raised when a blob reference is unknown or its blob has expired.
+    """
+
+
+def blob_ref(content: bytes) -> str:
+    """
+    Computes the content-addressed reference of a blob.
+
+    :param content: Blob content.
+    :return: Hex SHA-256 digest of the content.
+    """
+    return hashlib.sha256(content).hexdigest()
+
+
+class BlobWriter(Protocol):
+    """
+    Protocol of an incremental write of one blob.
+
+    The blob becomes visible under its reference only after :meth:`commit`.
+
+    :param size: Number of bytes written so far.
+    """
+
+    size: int
+
+    async def write(self, chunk: bytes) -> None:
+        """
+        Appends a chunk to the blob.
+
+        :param chunk: Next chunk of the content.
+        :return: None
+        """
+        ...
+
+    async def commit(self) -> str:
+        """
+        Finishes the write and stores the blob under its reference.
+
+        :return: Reference of the blob.
+        """
+        ...
+
+    async def abort(self) -> None:
+        """
+        Discards the written chunks.
+
+        :return: None
+        """
+        ...
+
+
+class BlobStore(Protocol):
+    """
+    Protocol of a blob store shared by the API and the workers.
+    """
+
+    async def put(self, content: bytes) -> str:
+        """
+        Stores a blob, refreshing its TTL if it is already stored.
+
+        :param content: Blob content.
+        :return: Reference of the blob.
+        """
+        ...
+
+    def writer(self) -> BlobWriter:
+        """
+        Starts an incremental write of a blob.
+
+        :return: A writer of the new blob.
+        """
+        ...
+
+    async def get(self, ref: str) -> bytes:
+        """
+        Reads a blob.
+
+        :param ref: Reference of the blob.
+        :return: Blob content.
+        :raises BlobNotFoundError: If the blob is unknown or expired.
+        """
+        ...
+
+    async def delete(self, ref: str) -> None:
+        """
+        Deletes a blob, does nothing if it is unknown.
+
+        :param ref: Reference of the blob.
+        :return: None
+        """
+        ...
+
+    async def purge(self) -> int:
+        """
+        Deletes expired blobs the backend does not expire on its own.
+
+        :return: Number of deleted blobs.
+        """
+        ...
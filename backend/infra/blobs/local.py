@@ -0,0 +1,171 @@
+"""
+Blob store on a local or shared filesystem.
+
+Blobs are files named after their reference, sharded into subdirectories by
+the first two characters. Writes go to a temporary file in the `.tmp`
+directory that is renamed into place, so readers never see a partial blob.
+The modification time of a file is its last write; blobs older than the TTL
+are treated as missing and deleted by :meth:`LocalBlobStore.purge`, as are
+abandoned temporary files.
+
+The directory must be shared by the API and the worker containers.
+
+Classes:
+    LocalBlobWriter: Incremental write of one blob.
+    LocalBlobStore: The store itself.
+"""
+
+import asyncio
+import hashlib
+import logging
+import os
+import tempfile
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import BinaryIO, Optional
+
+from infra.blobs.base import BlobNotFoundError, blob_ref
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class LocalBlobStore:
+    """
+    Blob store backed by files in a directory.
+
+    :param root: Directory of the blobs.
+    :param ttl: Time to live of a blob in seconds.
+    """
+
+    root: Path
+    ttl: int
+
+    def path(self, ref: str) -> Path:
+        """
+        Builds the path of a blob file.
+
+        :param ref: Reference of the blob.
+        :return: Path of the file, which may not exist.
+        """
+        if len(ref) < 3 or not ref.isalnum():
+            raise BlobNotFoundError(ref)
+        return self.root / ref[:2] / ref
+
+    def _expired(self, path: Path) -> bool:
+        return path.stat().st_mtime < time.time() - self.ttl
+
+    def _open_tmp(self) -> tuple[Path, BinaryIO]:
+        tmp_dir = self.root / ".tmp"
+        tmp_dir.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=tmp_dir)
+        return Path(tmp), os.fdopen(fd, "wb")
+
+    def _place(self, tmp: Path, ref: str) -> None:
+        path = self.path(ref)
+        if path.exists():
+            tmp.unlink()
+            os.utime(path)
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        os.replace(tmp, path)
+
+    def _write(self, ref: str, content: bytes) -> None:
+        if self.path(ref).exists():
+            os.utime(self.path(ref))
+            return
+        tmp, file = self._open_tmp()
+        try:
+            with file:
+                file.write(content)
+            self._place(tmp, ref)
+        except BaseException:
+            tmp.unlink(missing_ok=True)
+            raise
+
+    def _read(self, ref: str) -> bytes:
+        path = self.path(ref)
+        try:
+            if self._expired(path):
+                raise BlobNotFoundError(ref)
+            return path.read_bytes()
+        except FileNotFoundError as e:
+            raise BlobNotFoundError(ref) from e
+
+    def _purge(self) -> int:
+        deleted = 0
+        for path in self.root.glob("*/*"):
+            try:
+                if self._expired(path):
+                    path.unlink()
+                    deleted += 1
+            except FileNotFoundError:
+                continue
+        return deleted
+
+    def writer(self) -> "LocalBlobWriter":
+        return LocalBlobWriter(self)
+
+    async def put(self, content: bytes) -> str:
+        ref = blob_ref(content)
+        await asyncio.to_thread(self._write, ref, content)
+        return ref
+
+    async def get(self, ref: str) -> bytes:
+        return await asyncio.to_thread(self._read, ref)
+
+    async def delete(self, ref: str) -> None:
+        await asyncio.to_thread(self.path(ref).unlink, missing_ok=True)
+
+    async def purge(self) -> int:
+        deleted = await asyncio.to_thread(self._purge)
+        if deleted:
+            logger.info(f"Purged {deleted} expired blobs from {self.root}")
+        return deleted
+
+
+@dataclass
+class LocalBlobWriter:
+    """
+    Incremental write of one blob to a temporary file of the store.
+
+    :param store: Store the blob is written to.
+    """
+
+    store: LocalBlobStore
+    size: int = field(default=0, init=False)
+    _hash: "hashlib._Hash" = field(default_factory=hashlib.sha256, init=False)
+    _tmp: Optional[Path] = field(default=None, init=False)
+    _file: Optional[BinaryIO] = field(default=None, init=False)
+
+    async def _opened(self) -> BinaryIO:
+        if self._file is not None:
+            return self._file
+        self._tmp, file = await asyncio.to_thread(self.store._open_tmp)
+        self._file = file
+        return file
+
+    async def write(self, chunk: bytes) -> None:
+        file = await self._opened()
+        await asyncio.to_thread(file.write, chunk)
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    async def commit(self) -> str:
+        file = await self._opened()
+        ref = self._hash.hexdigest()
+        await asyncio.to_thread(file.close)
+        assert self._tmp is not None
+        try:
+            await asyncio.to_thread(self.store._place, self._tmp, ref)
+        except BaseException:
+            await self.abort()
+            raise
+        return ref
+
+    async def abort(self) -> None:
+        if self._file is not None:
+            await asyncio.to_thread(self._file.close)
+        if self._tmp is not None:
+            await asyncio.to_thread(self._tmp.unlink, missing_ok=True)
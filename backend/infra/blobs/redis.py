@@ -0,0 +1,93 @@
+"""
+Blob store kept in Redis.
+
+Blobs are plain Redis strings with a TTL, so the store needs no cleanup and
+works without a volume shared by the API and the workers. Incremental writes
+append to a temporary key that is renamed to the blob key on commit. Redis memory still
+holds every live blob once, which suits short recordings; long meetings are
+better served by the local store.
+
+Classes:
+    RedisBlobWriter: Incremental write of one blob.
+    RedisBlobStore: The store itself.
+"""
+
+import hashlib
+import uuid
+from dataclasses import dataclass, field
+
+from redis.asyncio.client import Redis
+
+from infra.blobs.base import BlobNotFoundError, blob_ref
+
+
+@dataclass
+class RedisBlobStore:
+    """
+    Blob store backed by Redis strings with a TTL.
+
+    :param redis: Redis client.
+    :param ttl: Time to live of a blob in seconds.
+    """
+
+    redis: Redis
+    ttl: int
+
+    @staticmethod
+    def _key(ref: str) -> str:
+        return f"blob:{ref}"
+
+    def writer(self) -> "RedisBlobWriter":
+        return RedisBlobWriter(self)
+
+    async def put(self, content: bytes) -> str:
+        ref = blob_ref(content)
+        await self.redis.set(self._key(ref), content, ex=self.ttl)
+        return ref
+
+    async def get(self, ref: str) -> bytes:
+        content = await self.redis.get(self._key(ref))
+        if content is None:
+            raise BlobNotFoundError(ref)
+        return bytes(content)
+
+    async def delete(self, ref: str) -> None:
+        await self.redis.delete(self._key(ref))
+
+    async def purge(self) -> int:
+        return 0
+
+
+@dataclass
+class RedisBlobWriter:
+    """
+    Incremental write of one blob to a temporary Redis key.
+
+    :param store: Store the blob is written to.
+    """
+
+    store: RedisBlobStore
+    size: int = field(default=0, init=False)
+    _hash: "hashlib._Hash" = field(default_factory=hashlib.sha256, init=False)
+    _key: str = field(default_factory=lambda: f"blob:upload:{uuid.uuid4()}", init=False)
+
+    async def write(self, chunk: bytes) -> None:
+        async with self.store.redis.pipeline(transaction=False) as pipe:
+            pipe.append(self._key, chunk)
+            pipe.expire(self._key, self.store.ttl)
+            await pipe.execute()
+        self._hash.update(chunk)
+        self.size += len(chunk)
+
+    async def commit(self) -> str:
+        ref = self._hash.hexdigest()
+        if not self.size:
+            return await self.store.put(b"")
+        async with self.store.redis.pipeline(transaction=True) as pipe:
+            pipe.rename(self._key, self.store._key(ref))
+            pipe.expire(self.store._key(ref), self.store.ttl)
+            await pipe.execute()
+        return ref
+
+    async def abort(self) -> None:
+        await self.store.redis.delete(self._key)
@@ -0,0 +1,336 @@
+"""
+Admission control of model-bound tasks.
+
+Every admitted task holds a lease in a Redis sorted set of its pool (the
+model backend) until a worker saves its result, and, if the request names a
+user, in a sorted set of that user. The lease score is its expiry time, so
+the leases of tasks lost with their worker disappear by themselves.
+
+A request is rejected before it reaches the queue if the estimated time to
+its answer exceeds the request deadline, or if the user already has too many
+tasks in flight. The estimate counts the leases ahead of the request in
+batches of the pool capacity, each taking the EWMA of the recent task
+execution times. Tasks answered from a cache are left out of the EWMA.
+A request that would start at once is always admitted, even if the
+estimate exceeds its deadline, so the EWMA keeps learning from finished
+tasks; an EWMA not updated for a while falls back to the default.
+
+The arithmetic is done in Python: the deadline is turned into the number of
+leases that may be ahead of the request, and a Lua script only compares the
+pool and the user against their limits and takes the leases atomically.
+
+Admission is an optimization only: if Redis is unavailable, requests are
+admitted without tracking.
+
+Classes:
+    AdmissionRejected: Raised when a request cannot be admitted.
+    Admission: Ticket of an admitted task.
+    AdmissionController: Admits and releases tasks.
+    AdmissionMiddleware: Worker-side middleware releasing saved tasks.
+
+Functions:
+    admission_limit: Number of leases that may be ahead of a request.
+    estimate_finish: Estimated time to the answer of a request.
+    fold_ewma: Folds an execution time into the service time estimate.
+    mark_cache_hit: Marks the running task as answered from a cache.
+"""
+
+import logging
+import math
+import time
+import uuid
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+from taskiq import TaskiqMessage, TaskiqMiddleware, TaskiqResult
+
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+POOL_LABEL = "admission_pool"
+USER_LABEL = "admission_user"
+
+# Drops expired leases and takes the leases unless the pool or the user is
+# at its limit. Returns {status, ahead}: 1 - admitted, 0 - rejected by the
+# pool limit, -1 - rejected by the user cap; ahead is the number of leases
+# ahead of the request.
+ADMIT_SCRIPT = """
+local now = tonumber(ARGV[1])
+redis.call("zremrangebyscore", KEYS[1], "-inf", now)
+local ahead = redis.call("zcard", KEYS[1])
+if ahead >= tonumber(ARGV[4]) then
+    return {0, ahead}
+end
+if KEYS[2] ~= "" then
+    redis.call("zremrangebyscore", KEYS[2], "-inf", now)
+    if redis.call("zcard", KEYS[2]) >= tonumber(ARGV[5]) then
+        return {-1, ahead}
+    end
+    redis.call("zadd", KEYS[2], ARGV[2], ARGV[3])
+    redis.call("expire", KEYS[2], math.ceil(ARGV[2] - now))
+end
+redis.call("zadd", KEYS[1], ARGV[2], ARGV[3])
+return {1, ahead}
+"""
+
+# Holder of the cache hit flag of the running task, set by the middleware.
+_cache_hit: ContextVar[Optional[list[bool]]] = ContextVar(
+    "admission_cache_hit", default=None
+)
+
+
+def admission_limit(deadline: float, service_time: float, capacity: int) -> int:
+    """
+    Computes how many leases may be ahead of a request answered in time.
+
+    A request that starts at once is admitted even if a task is expected to
+    take longer than the deadline: otherwise a pessimistic estimate would
+    reject every request, and with no tasks finishing it would never drop.
+
+    :param deadline: Time in seconds the caller is willing to wait.
+    :param service_time: Estimated execution time of a task.
+    :param capacity: Number of tasks the pool runs at once.
+    :return: Maximum number of leases ahead of the request.
+    """
+    return max(capacity, math.floor(deadline / service_time) * capacity)
+
+
+def estimate_finish(ahead: int, capacity: int, service_time: float) -> float:
+    """
+    Estimates the time to the answer of a request.
+
+    :param ahead: Number of leases ahead of the request.
+    :param capacity: Number of tasks the pool runs at once.
+    :param service_time: Estimated execution time of a task.
+    :return: Time in seconds until the request is answered.
+    """
+    return (ahead // capacity + 1) * service_time
+
+
+def fold_ewma(previous: Optional[float], sample: float, alpha: float) -> float:
+    """
+    Folds an execution time into the service time estimate.
+
+    :param previous: Current estimate, None if there is none yet.
+    :param sample: Execution time of a task.
+    :param alpha: Weight of the new sample.
+    :return: New estimate.
+    """
+    if previous is None:
+        return sample
+    return alpha * sample + (1 - alpha) * previous
+
+
+def mark_cache_hit() -> None:
+    """
+    Marks the running task as answered from a cache, so its execution time,
+    which says nothing about the model, is left out of the estimate.
+
+    :return: None
+    """
+    if (flag := _cache_hit.get()) is not None:
+        flag.append(True)
+
+
+class AdmissionRejected(Exception):
+    """
+    Raised when a request cannot be admitted.
+
+    :param reason: Human-readable reason of the rejection.
+    :param retry_after: Suggested delay before retrying, in seconds.
+    """
+
+    def __init__(self, reason: str, retry_after: int) -> None:
+        super().__init__(reason)
+        self.reason = reason
+        self.retry_after = retry_after
+
+
+@dataclass
+class Admission:
+    """
+    Ticket of an admitted task.
+
+    :param task_id: Id the task must be enqueued with.
+    :param labels: Labels the task must be enqueued with, so the worker
+        releases its leases.
+    :param wait: Estimated time in seconds before the task starts.
+    """
+
+    task_id: str
+    labels: dict[str, str] = field(default_factory=dict)
+    wait: float = 0.0
+
+
+@dataclass
+class AdmissionController:
+    """
+    Admits model-bound tasks against the pool capacity and the user caps.
+
+    :param redis: Redis client.
+    :param config: Configuration object holding the admission settings.
+    """
+
+    redis: Redis
+    config: Config
+
+    @staticmethod
+    def _pool_key(pool: str) -> str:
+        return f"admission:{pool}:leases"
+
+    @staticmethod
+    def _stats_key(pool: str) -> str:
+        return f"admission:{pool}:stats"
+
+    @staticmethod
+    def _user_key(pool: str, user_id: Optional[str]) -> str:
+        return f"admission:{pool}:user:{user_id}" if user_id else ""
+
+    async def _service_time(self, pool: str) -> float:
+        ewma = await self.redis.hget(self._stats_key(pool), "ewma")  # type: ignore
+        if ewma is None:
+            return self.config.admission_service_time
+        return float(ewma)
+
+    async def admit(
+        self, pool: str, deadline: float, user_id: Optional[str] = None
+    ) -> Admission:
+        """
+        Admits a task to the pool, taking its leases.
+
+        :param pool: Name of the model backend pool.
+        :param deadline: Time in seconds the caller is willing to wait for
+            the answer.
+        :param user_id: Identifier of the requesting user (optional).
+        :return: Ticket of the admitted task.
+        :raises AdmissionRejected: If the answer is not expected in time, or
+            the user has too many tasks in flight.
+        """
+        task_id = str(uuid.uuid4())
+        if not self.config.admission_enabled:
+            return Admission(task_id)
+        now = time.time()
+        capacity = self.config.admission_capacity
+        try:
+            service_time = await self._service_time(pool)
+            status, ahead = await self.redis.eval(  # type: ignore
+                ADMIT_SCRIPT,
+                2,
+                self._pool_key(pool),
+                self._user_key(pool, user_id),
+                str(now),
+                str(now + self.config.admission_lease_ttl),
+                task_id,
+                str(admission_limit(deadline, service_time, capacity)),
+                str(self.config.admission_user_max_inflight),
+            )
+        except RedisError:
+            logger.warning("Admission control is unavailable", exc_info=True)
+            return Admission(task_id)
+
+        finish = estimate_finish(int(ahead), capacity, service_time)
+        if int(status) == 0:
+            raise AdmissionRejected(
+                "Server is overloaded", max(1, math.ceil(finish - deadline))
+            )
+        if int(status) < 0:
+            raise AdmissionRejected(
+                "Too many requests in progress", max(1, math.ceil(service_time))
+            )
+        labels = {POOL_LABEL: pool}
+        if user_id:
+            labels[USER_LABEL] = user_id
+        return Admission(task_id, labels, finish - service_time)
+
+    async def release(
+        self,
+        task_id: str,
+        pool: str,
+        user_id: Optional[str] = None,
+        execution_time: Optional[float] = None,
+    ) -> None:
+        """
+        Releases the leases of a task.
+
+        :param task_id: Id of the task.
+        :param pool: Name of the model backend pool.
+        :param user_id: Identifier of the requesting user (optional).
+        :param execution_time: Execution time of a successful task, folded
+            into the service time estimate (optional).
+        :return: None
+        """
+        try:
+            async with self.redis.pipeline(transaction=True) as pipe:
+                pipe.zrem(self._pool_key(pool), task_id)
+                if user_id:
+                    pipe.zrem(self._user_key(pool, user_id), task_id)
+                await pipe.execute()
+            if execution_time is not None:
+                # Concurrent releases may drop a sample, the EWMA tolerates it.
+                stats_key = self._stats_key(pool)
+                previous = await self.redis.hget(stats_key, "ewma")  # type: ignore
+                ewma = fold_ewma(
+                    None if previous is None else float(previous),
+                    execution_time,
+                    self.config.admission_ewma_alpha,
+                )
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.hset(stats_key, "ewma", str(ewma))
+                    pipe.expire(stats_key, self.config.admission_stats_ttl)
+                    await pipe.execute()
+        except RedisError:
+            logger.warning("Cannot release an admission lease", exc_info=True)
+
+    async def cancel(self, admission: Admission) -> None:
+        """
+        Releases the leases of a task that has not been enqueued.
+
+        :param admission: Ticket of the task.
+        :return: None
+        """
+        if POOL_LABEL in admission.labels:
+            await self.release(
+                admission.task_id,
+                admission.labels[POOL_LABEL],
+                admission.labels.get(USER_LABEL),
+            )
+
+
+class AdmissionMiddleware(TaskiqMiddleware):
+    """
+    Releases the leases of an admitted task once its result is saved.
+
+    Results are not saved for attempts that are going to be retried, so the
+    leases are held until the final attempt. The execution time of a task
+    answered from a cache (see `mark_cache_hit`) is not folded into the
+    estimate.
+
+    :param admission: Admission controller.
+    """
+
+    def __init__(self, admission: AdmissionController) -> None:
+        super().__init__()
+        self.admission = admission
+
+    def pre_execute(self, message: TaskiqMessage) -> TaskiqMessage:
+        if POOL_LABEL in message.labels:
+            _cache_hit.set([])
+        return message
+
+    async def post_save(
+        self, message: TaskiqMessage, result: TaskiqResult[Any]
+    ) -> None:
+        pool = message.labels.get(POOL_LABEL)
+        if not pool:
+            return
+        cache_hit = bool(_cache_hit.get())
+        await self.admission.release(
+            message.task_id,
+            pool,
+            message.labels.get(USER_LABEL),
+            None if result.is_err or cache_hit else result.execution_time,
+        )
@@ -0,0 +1,145 @@
+"""
+Tracking of the state of asynchronous jobs.
+
+A job is a task enqueued by the job API, which returns its task id to the
+client instead of waiting for the result. The state of a job is kept in the
+progress record of the result backend: the API writes a `QUEUED` record with
+the job kind before enqueuing the task, the worker middleware switches it to
+`STARTED` once the task is picked up, and the saved result marks the job as
+finished. While running, a task may report its progress and the amount of
+output generated so far; they are stored next to the job kind.
+
+Classes:
+    JobMiddleware: Worker-side middleware marking jobs as started.
+
+Functions:
+    enqueue_job: Records a job as queued and enqueues its task.
+    job_kind: Reads the kind of a job from its progress record.
+    job_running: Tells whether the running task is a job.
+    report_job_progress: Records the progress of the running job.
+"""
+
+import logging
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from redis.exceptions import RedisError
+from taskiq import (AsyncResultBackend, AsyncTaskiqDecoratedTask,
+                    TaskiqMessage, TaskiqMiddleware)
+from taskiq.depends.progress_tracker import TaskProgress, TaskState
+
+from infra.brokers.kicker import labelled_kicker
+
+logger = logging.getLogger(__name__)
+
+JOB_LABEL = "job"
+QUEUED = "QUEUED"
+
+# Result backend, task id and kind of the running job, set by the middleware.
+_running_job: ContextVar[Optional[tuple[AsyncResultBackend[Any], str, str]]] = (
+    ContextVar("running_job", default=None)
+)
+
+
+class JobMiddleware(TaskiqMiddleware):
+    """
+    Marks a job as started when a worker picks up its task.
+
+    The kind of the job, stored in the progress metadata, is preserved.
+    """
+
+    async def pre_execute(self, message: TaskiqMessage) -> TaskiqMessage:
+        if JOB_LABEL not in message.labels:
+            _running_job.set(None)
+            return message
+        backend = self.broker.result_backend
+        _running_job.set((backend, message.task_id, message.labels[JOB_LABEL]))
+        try:
+            progress = await backend.get_progress(message.task_id)
+            await backend.set_progress(
+                message.task_id,
+                TaskProgress(
+                    state=TaskState.STARTED,
+                    meta=progress.meta if progress else None,
+                ),
+            )
+        except RedisError:
+            logger.warning("Cannot mark the job as started", exc_info=True)
+        return message
+
+
+async def enqueue_job(
+    task: AsyncTaskiqDecoratedTask[Any, Any],
+    job_id: str,
+    kind: str,
+    *args: Any,
+    labels: Optional[dict[str, str]] = None,
+    **kwargs: Any,
+) -> None:
+    """
+    Records a job as queued and enqueues its task under the job id.
+
+    The record is written first, so it cannot overwrite the `STARTED` state
+    set by a fast worker.
+
+    :param task: Task to enqueue.
+    :param job_id: Identifier of the job, used as the task id.
+    :param kind: Kind of the job, stored in the progress metadata.
+    :param args: Positional arguments of the task.
+    :param labels: Additional labels of the task (optional).
+    :param kwargs: Keyword arguments of the task.
+    :return: None
+    """
+    await task.broker.result_backend.set_progress(
+        job_id, TaskProgress(state=QUEUED, meta={"kind": kind})
+    )
+    await (
+        labelled_kicker(task, **(labels or {}), **{JOB_LABEL: kind})
+        .with_task_id(job_id)
+        .kiq(*args, **kwargs)
+    )
+
+
+def job_kind(progress: Optional[TaskProgress[Any]]) -> Optional[str]:
+    """
+    Reads the kind of a job from its progress record.
+
+    :param progress: Progress record of the job task.
+    :return: Kind of the job, or None if the task is not a job.
+    """
+    if progress is None or not isinstance(progress.meta, dict):
+        return None
+    kind = progress.meta.get("kind")
+    return kind if isinstance(kind, str) else None
+
+
+def job_running() -> bool:
+    """
+    Tells whether the running task is a job, so its progress is tracked.
+
+    :return: True if the task was enqueued by `enqueue_job`.
+    """
+    return _running_job.get() is not None
+
+
+async def report_job_progress(progress: Optional[float], generated: int) -> None:
+    """
+    Records the progress of the running job, keeping its kind.
+
+    Does nothing if the running task is not a job.
+
+    :param progress: Estimated fraction of the work done, None if unknown.
+    :param generated: Amount of output generated so far (characters of XML,
+        number of suggestions and so on).
+    :return: None
+    """
+    if (job := _running_job.get()) is None:
+        return
+    backend, task_id, kind = job
+    meta = {"kind": kind, "progress": progress, "generated": generated}
+    try:
+        await backend.set_progress(
+            task_id, TaskProgress(state=TaskState.STARTED, meta=meta)
+        )
+    except RedisError:
+        logger.warning("Cannot record the progress of the job", exc_info=True)
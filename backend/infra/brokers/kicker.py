@@ -0,0 +1,33 @@
+"""
+Enqueuing of tasks with per-call labels.
+
+`AsyncKicker.with_labels` of taskiq updates the labels of the task itself,
+so labels set for one call would stick to every later call of the task.
+Kickers built here get their own copy of the labels.
+
+Functions:
+    labelled_kicker: Builds a kicker of a task with additional labels.
+"""
+
+from typing import Any
+
+from taskiq import AsyncTaskiqDecoratedTask
+from taskiq.kicker import AsyncKicker
+
+
+def labelled_kicker(
+    task: AsyncTaskiqDecoratedTask[Any, Any], **labels: Any
+) -> AsyncKicker[Any, Any]:
+    """
+    Builds a kicker of a task with additional labels for one call.
+
+    :param task: Task to enqueue.
+    :param labels: Labels added to the labels of the task.
+    :return: Kicker leaving the labels of the task intact.
+    """
+    return AsyncKicker(
+        task_name=task.task_name,
+        broker=task.broker,
+        labels={**task.labels, **labels},
+        return_type=task.return_type,
+    )
@@ -0,0 +1,158 @@
+"""
+Push-based delivery of task results to the API processes.
+
+Waiting with `AsyncTaskiqTask.wait_result` polls the result backend every
+0.2 seconds for every waiting request. Instead, workers publish the id of
+every saved result to a Redis pub/sub channel, and each API process keeps a
+single subscription to it that wakes up the requests waiting for that id.
+A wait then costs a readiness check and a result read, and completes as soon
+as the notification arrives.
+
+A notification lost while the subscription reconnects is covered by a slow
+fallback poll of the readiness of each waited task.
+
+Classes:
+    ResultNotifyMiddleware: Worker-side middleware publishing saved results.
+    TaskResultListener: API-side listener resolving the waiting requests.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Any, Optional, TypeVar
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+from taskiq import (AsyncTaskiqTask, TaskiqMessage, TaskiqMiddleware,
+                    TaskiqResult, TaskiqResultTimeoutError)
+
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+RESULTS_CHANNEL = "taskiq:results"
+
+T = TypeVar("T")
+
+
+class ResultNotifyMiddleware(TaskiqMiddleware):
+    """
+    Publishes the id of every task whose result has been saved.
+
+    :param redis: Redis client.
+    """
+
+    def __init__(self, redis: Redis) -> None:
+        super().__init__()
+        self.redis = redis
+
+    async def post_save(
+        self, message: TaskiqMessage, result: TaskiqResult[Any]
+    ) -> None:
+        try:
+            await self.redis.publish(RESULTS_CHANNEL, message.task_id)
+        except RedisError:
+            logger.warning("Cannot publish a task result", exc_info=True)
+
+
+@dataclass
+class TaskResultListener:
+    """
+    Shared subscription to result notifications of one API process.
+
+    :param redis: Redis client.
+    :param config: Configuration object holding the fallback poll interval.
+    """
+
+    redis: Redis
+    config: Config
+    _waiters: dict[str, set[asyncio.Future[None]]] = field(
+        default_factory=dict, init=False
+    )
+    _listener: Optional[asyncio.Task[None]] = field(default=None, init=False)
+
+    async def startup(self) -> None:
+        """
+        Starts the listener task.
+
+        :return: None
+        """
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.create_task(self._listen())
+
+    async def shutdown(self) -> None:
+        """
+        Stops the listener task and wakes up the waiting requests, which fall
+        back to polling.
+
+        :return: None
+        """
+        if self._listener is not None:
+            self._listener.cancel()
+            await asyncio.gather(self._listener, return_exceptions=True)
+            self._listener = None
+        self._wake_all()
+
+    async def wait(
+        self, task: AsyncTaskiqTask[T], timeout: float, with_logs: bool = False
+    ) -> TaskiqResult[T]:
+        """
+        Waits for the result of a task.
+
+        :param task: Enqueued task.
+        :param timeout: Maximum wait in seconds.
+        :param with_logs: Whether to fetch the logs of the worker.
+        :return: Result of the task.
+        :raises TaskiqResultTimeoutError: If the result is not ready in time.
+        """
+        await self.startup()
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        while True:
+            future = loop.create_future()
+            self._waiters.setdefault(task.task_id, set()).add(future)
+            try:
+                if await task.is_ready():
+                    return await task.get_result(with_logs=with_logs)
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    raise TaskiqResultTimeoutError(timeout=timeout)
+                interval = self.config.result_fallback_poll_interval
+                await asyncio.wait({future}, timeout=min(remaining, interval))
+            finally:
+                self._discard(task.task_id, future)
+
+    def _discard(self, task_id: str, future: asyncio.Future[None]) -> None:
+        futures = self._waiters.get(task_id)
+        if futures is None:
+            return
+        futures.discard(future)
+        if not futures:
+            del self._waiters[task_id]
+
+    def _wake(self, task_id: str) -> None:
+        for future in self._waiters.get(task_id, ()):
+            if not future.done():
+                future.set_result(None)
+
+    def _wake_all(self) -> None:
+        for task_id in list(self._waiters):
+            self._wake(task_id)
+
+    async def _listen(self) -> None:
+        while True:
+            pubsub = self.redis.pubsub()
+            try:
+                await pubsub.subscribe(RESULTS_CHANNEL)
+                # Results saved while (re)connecting were not notified.
+                self._wake_all()
+                async for message in pubsub.listen():
+                    if message["type"] != "message":
+                        continue
+                    data = message["data"]
+                    self._wake(data.decode() if isinstance(data, bytes) else data)
+            except (RedisError, OSError):
+                logger.warning("Result notifications are unavailable", exc_info=True)
+                await asyncio.sleep(1)
+            finally:
+                await pubsub.aclose()  # type: ignore
@@ -7,14 +7,21 @@ injection to resolve these components from a shared container.
 
 :var broker: Instance of AsyncBroker used for handling background tasks.
 :var schedule
+
+Worker lifecycle events open and close the shared resources (such as the
+pooled HTTP clients) owned by the container, and start publishing the state
+of the upstreams the worker calls.
 """
 
 import logging
 
 from fast_depends import Depends, inject
-from taskiq import AsyncBroker, TaskiqScheduler
+from taskiq import AsyncBroker, TaskiqEvents, TaskiqScheduler, TaskiqState
 
+from infra.http.pool import HttpClientPool
+from infra.upstreams.redis import RedisUpstreamStats
 from logic import TypedContainer, init_container
+from utils.upstreams import UpstreamRegistry
 
 __all__ = ["broker", "scheduler"]
 
@@ -47,3 +54,25 @@ def _init_scheduler(
 
 broker = _init_broker()
 scheduler = _init_scheduler()
+
+
+@broker.on_event(TaskiqEvents.WORKER_STARTUP)
+async def _startup_worker(state: TaskiqState) -> None:
+    """
+    Opens shared resources of the worker process.
+
+    :param state: Worker state provided by taskiq.
+    """
+    container = init_container()
+    await container.resolve(HttpClientPool).startup()
+    container.resolve(RedisUpstreamStats).attach(container.resolve(UpstreamRegistry))
+
+
+@broker.on_event(TaskiqEvents.WORKER_SHUTDOWN)
+async def _shutdown_worker(state: TaskiqState) -> None:
+    """
+    Closes shared resources of the worker process.
+
+    :param state: Worker state provided by taskiq.
+    """
+    await init_container().resolve(HttpClientPool).shutdown()
@@ -0,0 +1,158 @@
+"""
+Redis-backed result cache with TTL and size-bounded LRU eviction.
+
+Entries are stored as plain Redis strings with a TTL. A sorted set per
+namespace keeps the last access time of every entry and is used to evict the
+least recently used entries once the namespace grows beyond its size bound.
+Hit and miss counters are kept in a hash next to the entries.
+
+The cache is an optimization only: Redis errors are logged and reported as
+misses instead of failing the caller.
+
+Classes:
+    CacheStats: Counters of a cache namespace.
+    RedisLRUCache: The cache itself.
+
+Functions:
+    content_key: Builds a content-addressed key from arbitrary JSON parts.
+"""
+
+import hashlib
+import json
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Optional, TypedDict
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+logger = logging.getLogger(__name__)
+
+
+def content_key(*parts: Any) -> str:
+    """
+    Builds a content-addressed cache key.
+
+    :param parts: JSON serializable parts identifying the cached content.
+    :return: Hex SHA-256 digest of the canonical JSON form of the parts.
+    """
+    payload = json.dumps(parts, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class CacheStats(TypedDict):
+    """
+    Counters of a cache namespace.
+
+    :key hits: Number of lookups served from the cache.
+    :key misses: Number of lookups not found in the cache.
+    :key size: Number of tracked entries.
+    """
+
+    hits: int
+    misses: int
+    size: int
+
+
+@dataclass
+class RedisLRUCache:
+    """
+    String cache stored in Redis with TTL and LRU eviction.
+
+    :param redis: Redis client.
+    :param namespace: Prefix separating this cache from the others.
+    :param ttl: Time to live of an entry in seconds.
+    :param max_entries: Maximum number of entries kept in the namespace.
+    """
+
+    redis: Redis
+    namespace: str
+    ttl: int
+    max_entries: int
+
+    @property
+    def _index(self) -> str:
+        return f"cache:{self.namespace}:lru"
+
+    @property
+    def _stats(self) -> str:
+        return f"cache:{self.namespace}:stats"
+
+    def _entry(self, key: str) -> str:
+        return f"cache:{self.namespace}:entry:{key}"
+
+    async def get(self, key: str) -> Optional[str]:
+        """
+        Looks up an entry and marks it as recently used.
+
+        :param key: Key of the entry.
+        :return: Cached value, or None on a miss.
+        """
+        try:
+            value = await self.redis.get(self._entry(key))
+            async with self.redis.pipeline(transaction=False) as pipe:
+                if value is None:
+                    pipe.zrem(self._index, key)
+                    pipe.hincrby(self._stats, "misses", 1)
+                else:
+                    pipe.zadd(self._index, {key: time.time()})
+                    pipe.hincrby(self._stats, "hits", 1)
+                await pipe.execute()
+        except RedisError:
+            logger.warning(f"Cache {self.namespace} is unavailable", exc_info=True)
+            return None
+        if value is None:
+            return None
+        return value.decode("utf-8") if isinstance(value, bytes) else str(value)
+
+    async def set(self, key: str, value: str) -> None:
+        """
+        Stores an entry and evicts the least recently used ones over the bound.
+
+        :param key: Key of the entry.
+        :param value: Value to store.
+        :return: None
+        """
+        now = time.time()
+        try:
+            async with self.redis.pipeline(transaction=False) as pipe:
+                pipe.set(self._entry(key), value, ex=self.ttl)
+                pipe.zadd(self._index, {key: now})
+                pipe.zremrangebyscore(self._index, 0, now - self.ttl)
+                pipe.zcard(self._index)
+                *_, size = await pipe.execute()
+            if size > self.max_entries:
+                await self._evict(size - self.max_entries)
+        except RedisError:
+            logger.warning(f"Cache {self.namespace} is unavailable", exc_info=True)
+
+    async def stats(self) -> CacheStats:
+        """
+        Returns the counters of the cache namespace.
+
+        :return: Hits, misses and number of tracked entries, zeros if Redis
+            is unavailable.
+        """
+        try:
+            counters = await self.redis.hgetall(self._stats)  # type: ignore
+            size = await self.redis.zcard(self._index)
+        except RedisError:
+            logger.warning(f"Cache {self.namespace} is unavailable", exc_info=True)
+            return CacheStats(hits=0, misses=0, size=0)
+        return CacheStats(
+            hits=int(counters.get(b"hits", 0)),
+            misses=int(counters.get(b"misses", 0)),
+            size=size,
+        )
+
+    async def _evict(self, count: int) -> None:
+        victims = await self.redis.zrange(self._index, 0, count - 1)
+        if not victims:
+            return
+        keys = [v.decode("utf-8") if isinstance(v, bytes) else v for v in victims]
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.delete(*(self._entry(key) for key in keys))
+            pipe.zrem(self._index, *keys)
+            await pipe.execute()
+        logger.debug(f"Cache {self.namespace} evicted {len(keys)} entries")
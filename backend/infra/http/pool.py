@@ -0,0 +1,107 @@
+"""
+Pooled HTTP clients for upstream model services.
+
+This module provides a process-wide pool of long-lived `httpx.AsyncClient`
+instances, one per upstream base URL. Reusing a client keeps TCP connections
+alive between requests instead of paying a new handshake for every call.
+
+Classes:
+    HttpClientPool: Owns the clients and their connection limits/timeouts.
+"""
+
+import importlib.util
+import logging
+from dataclasses import dataclass, field
+from typing import Optional
+
+import httpx
+
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class HttpClientPool:
+    """
+    Pool of keep-alive HTTP clients keyed by upstream base URL.
+
+    Clients share the connection limits taken from the configuration. Timeouts
+    are chosen per operation via :meth:`timeout`, so one client serves both
+    short health checks and long generations.
+
+    :param config: Configuration object containing HTTP pool settings.
+    """
+
+    config: Config
+    _clients: dict[str, httpx.AsyncClient] = field(default_factory=dict, init=False)
+
+    @property
+    def limits(self) -> httpx.Limits:
+        """
+        Builds connection limits shared by all clients of the pool.
+
+        :return: An instance of httpx.Limits.
+        """
+        return httpx.Limits(
+            max_connections=self.config.http_max_connections,
+            max_keepalive_connections=self.config.http_max_keepalive_connections,
+            keepalive_expiry=self.config.http_keepalive_expiry,
+        )
+
+    def timeout(self, read: Optional[float]) -> httpx.Timeout:
+        """
+        Builds a timeout for a single operation.
+
+        :param read: Read/write/pool timeout in seconds, None disables it.
+        :return: An instance of httpx.Timeout with the configured connect timeout.
+        """
+        return httpx.Timeout(read, connect=self.config.http_connect_timeout)
+
+    def client(self, base_url: str, http2: bool = False) -> httpx.AsyncClient:
+        """
+        Returns the pooled client for the given upstream, creating it on demand.
+
+        HTTP/2 is negotiated only when requested and the optional `h2` package
+        is installed; otherwise the client falls back to HTTP/1.1.
+
+        :param base_url: Base URL of the upstream service.
+        :param http2: Whether to enable HTTP/2 for the upstream.
+        :return: A long-lived httpx.AsyncClient bound to the base URL.
+        """
+        client = self._clients.get(base_url)
+        if client is None or client.is_closed:
+            if http2 and importlib.util.find_spec("h2") is None:
+                logger.warning("HTTP/2 requested but `h2` is not installed")
+                http2 = False
+            client = httpx.AsyncClient(
+                base_url=base_url,
+                limits=self.limits,
+                timeout=self.timeout(self.config.http_default_timeout),
+                http2=http2,
+            )
+            self._clients[base_url] = client
+        return client
+
+    async def startup(self) -> None:
+        """
+        Opens clients for the configured upstream services.
+
+        :return: None
+        """
+        for base_url in (self.config.ollama_url, self.config.xinference_url):
+            self.client(base_url)
+        if self.config.use_openai:
+            self.client(self.config.openai_url, http2=self.config.openai_http2)
+        logger.info(f"HTTP client pool started for {list(self._clients)}")
+
+    async def shutdown(self) -> None:
+        """
+        Closes all pooled clients and releases their connections.
+
+        :return: None
+        """
+        clients, self._clients = self._clients, {}
+        for client in clients.values():
+            await client.aclose()
+        logger.info("HTTP client pool closed")
@@ -0,0 +1,134 @@
+"""
+Relay of incremental task output from workers to API processes.
+
+Workers publish events of a stream (partial XML, single suggestions, the final
+result) to a Redis pub/sub channel named after the stream id. The API process
+subscribes to the channel before enqueuing the task and forwards the events
+to its HTTP client as they arrive.
+
+Classes:
+    StreamEvent: A single event of a task stream.
+    TaskStreamBus: Publishes and subscribes to task streams.
+    TaskStreamSubscription: An open subscription to one task stream.
+"""
+
+import json
+import logging
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from typing import Any, Optional, TypedDict
+
+from redis.asyncio.client import PubSub, Redis
+
+logger = logging.getLogger(__name__)
+
+FINAL_EVENTS = frozenset({"done", "error"})
+
+
+class StreamEvent(TypedDict):
+    """
+    Represents a single event of a task stream.
+
+    :key event: Event type, e.g. `chunk`, `suggestion`, `done` or `error`.
+    :key data: Event payload.
+    """
+
+    event: str
+    data: Any
+
+
+@dataclass
+class TaskStreamSubscription:
+    """
+    An open subscription to the events of one task stream.
+
+    :param pubsub: Redis pub/sub connection subscribed to the stream channel.
+    """
+
+    pubsub: PubSub
+
+    async def listen(
+        self, idle_timeout: float, heartbeat: float
+    ) -> AsyncIterator[Optional[StreamEvent]]:
+        """
+        Iterates over stream events until a final `done`/`error` event.
+
+        `None` is yielded every `heartbeat` seconds without events, so the
+        caller can keep its connection alive.
+
+        :param idle_timeout: Maximum time in seconds without any event.
+        :param heartbeat: Interval in seconds between heartbeat ticks.
+        :raises TimeoutError: If no event arrives within `idle_timeout`.
+        """
+        idle = 0.0
+        while True:
+            message = await self.pubsub.get_message(
+                ignore_subscribe_messages=True, timeout=heartbeat
+            )
+            if message is None:
+                idle += heartbeat
+                if idle >= idle_timeout:
+                    raise TimeoutError("Task stream is idle")
+                yield None
+                continue
+            idle = 0.0
+            event: StreamEvent = json.loads(message["data"])
+            yield event
+            if event["event"] in FINAL_EVENTS:
+                return
+
+    async def close(self) -> None:
+        """
+        Unsubscribes from the stream and releases the connection.
+
+        :return: None
+        """
+        await self.pubsub.unsubscribe()
+        await self.pubsub.aclose()  # type: ignore
+
+
+@dataclass
+class TaskStreamBus:
+    """
+    Publishes and subscribes to task streams over Redis pub/sub.
+
+    :param redis: Redis client.
+    """
+
+    redis: Redis
+
+    @staticmethod
+    def channel(stream_id: str) -> str:
+        """
+        Builds the pub/sub channel name of a stream.
+
+        :param stream_id: Identifier of the stream.
+        :return: Channel name.
+        """
+        return f"stream:{stream_id}"
+
+    async def publish(self, stream_id: str, event: str, data: Any) -> None:
+        """
+        Publishes an event to the stream.
+
+        :param stream_id: Identifier of the stream.
+        :param event: Event type.
+        :param data: JSON serializable payload.
+        :return: None
+        """
+        await self.redis.publish(
+            self.channel(stream_id),
+            json.dumps(StreamEvent(event=event, data=data), ensure_ascii=False),
+        )
+
+    async def subscribe(self, stream_id: str) -> TaskStreamSubscription:
+        """
+        Subscribes to the stream. Must be called before the task is enqueued,
+        since pub/sub does not replay earlier events.
+
+        :param stream_id: Identifier of the stream.
+        :return: An open subscription.
+        """
+        pubsub = self.redis.pubsub()
+        await pubsub.subscribe(self.channel(stream_id))
+        return TaskStreamSubscription(pubsub)
@@ -0,0 +1,135 @@
+"""
+Shares the upstream state of the worker processes through Redis.
+
+The circuit breakers and retry budgets live in the processes calling the
+upstreams, i.e. in the workers. Every worker publishes the state of an
+upstream to a Redis hash of its own whenever a breaker changes, and the API
+merges the hashes of all workers for the metrics endpoint. The hashes expire
+after a while, so the state of stopped workers and of upstreams no longer
+called disappears by itself.
+
+Publishing is an optimization only: Redis errors are logged and the state is
+published again on the next change.
+
+Classes:
+    RedisUpstreamStats: Publishes and merges the upstream state.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+from dataclasses import dataclass, field
+from typing import Optional
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from utils.upstreams import UpstreamRegistry, UpstreamStats
+
+logger = logging.getLogger(__name__)
+
+KEY_PREFIX = "upstream_stats"
+
+# merged state of an upstream is the worst state of the workers
+_STATE_SEVERITY = {"closed": 0, "half_open": 1, "open": 2}
+
+
+def _process_id() -> str:
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+@dataclass
+class RedisUpstreamStats:
+    """
+    Publishes the upstream state of this process and merges the state of all
+    processes.
+
+    :param redis: Redis client.
+    :param ttl: Seconds the state of a process is kept after its last change.
+    :param process: Identifier of this process.
+    """
+
+    redis: Redis
+    ttl: int
+    process: str = field(default_factory=_process_id)
+    _latest: dict[str, UpstreamStats] = field(default_factory=dict, init=False)
+    _flush: Optional[asyncio.Task[None]] = field(default=None, init=False)
+
+    def attach(self, registry: UpstreamRegistry) -> None:
+        """
+        Publishes every change of the breakers of the registry.
+
+        :param registry: Registry of this process.
+        :return: None
+        """
+        registry.add_listener(self._changed)
+
+    def _changed(self, name: str, stats: UpstreamStats) -> None:
+        self._latest[name] = stats
+        if self._flush is None or self._flush.done():
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                return
+            self._flush = loop.create_task(self.flush())
+
+    async def flush(self) -> None:
+        """
+        Writes the state changed since the last flush.
+
+        Changes made while writing are written by the same call, so the hash
+        of an upstream always ends with its latest state.
+
+        :return: None
+        """
+        while self._latest:
+            name, stats = self._latest.popitem()
+            key = f"{KEY_PREFIX}:{name}:{self.process}"
+            try:
+                async with self.redis.pipeline(transaction=True) as pipe:
+                    pipe.hset(key, mapping={"name": name, **stats})
+                    pipe.expire(key, self.ttl)
+                    await pipe.execute()
+            except RedisError:
+                logger.warning(f"Cannot publish upstream {name}", exc_info=True)
+
+    async def stats(self) -> dict[str, UpstreamStats]:
+        """
+        Returns the state of every upstream merged across the processes.
+
+        An upstream is reported in the worst state of any process, with the
+        longest failure streak and the lowest retry balance; the opened and
+        rejected counters are summed.
+
+        :return: State by upstream name, empty if Redis is unavailable.
+        """
+        merged: dict[str, UpstreamStats] = {}
+        try:
+            async for key in self.redis.scan_iter(match=f"{KEY_PREFIX}:*"):
+                values = await self.redis.hgetall(key)  # type: ignore
+                if not values:
+                    continue
+                name = values[b"name"].decode("utf-8")
+                stats = UpstreamStats(
+                    state=values[b"state"].decode("utf-8"),
+                    failures=int(values[b"failures"]),
+                    opened=int(values[b"opened"]),
+                    rejected=int(values[b"rejected"]),
+                    retry_balance=float(values[b"retry_balance"]),
+                )
+                merged[name] = _merge(merged[name], stats) if name in merged else stats
+        except RedisError:
+            logger.warning("Upstream state is unavailable", exc_info=True)
+            return {}
+        return merged
+
+
+def _merge(a: UpstreamStats, b: UpstreamStats) -> UpstreamStats:
+    return UpstreamStats(
+        state=max(a["state"], b["state"], key=_STATE_SEVERITY.__getitem__),
+        failures=max(a["failures"], b["failures"]),
+        opened=a["opened"] + b["opened"],
+        rejected=a["rejected"] + b["rejected"],
+        retry_balance=min(a["retry_balance"], b["retry_balance"]),
+    )
@@ -1,5 +1,6 @@
 import logging
 from functools import lru_cache
+from pathlib import Path
 from typing import Any, TypeVar, cast
 
 from punq import Container, Scope
@@ -14,11 +15,26 @@ from taskiq_aio_pika import AioPikaBroker
 from taskiq_pipelines import PipelineMiddleware
 from taskiq_redis import RedisAsyncResultBackend, RedisScheduleSource
 
+from infra.audio.ffmpeg import FfmpegTranscoder
+from infra.blobs.base import BlobStore
+from infra.blobs.local import LocalBlobStore
+from infra.blobs.redis import RedisBlobStore
+from infra.brokers.admission import AdmissionController, AdmissionMiddleware
+from infra.brokers.jobs import JobMiddleware
+from infra.brokers.results import ResultNotifyMiddleware, TaskResultListener
+from infra.http.pool import HttpClientPool
+from infra.streams.redis import TaskStreamBus
+from infra.upstreams.redis import RedisUpstreamStats
+from logic.cache import BpmnCache, SuggestionsCache, TranscriptCache
 from logic.services.base import BpmnService
+from logic.services.coalescing import CoalescingBpmnService
 from logic.services.ollama import OllamaService
 from logic.services.openai import OpenAIService
+from logic.services.router import (RouterBackend, RouterBpmnService,
+                                   parse_backends)
 from logic.services.xinference import XinferenceService
 from settings.config import Config
+from utils.upstreams import UpstreamRegistry, upstreams
 
 logger = logging.getLogger(__name__)
 T = TypeVar("T")
@@ -59,25 +75,54 @@ def init_redis(container: TypedContainer) -> None:
         return cast(Redis, Redis.from_url(config.redis_url))
 
     container.register(Redis, factory=_init_redis, scope=Scope.singleton)
+    container.register(TaskStreamBus, scope=Scope.singleton)
+
+
+def init_blobs(container: TypedContainer) -> None:
+    config = container.resolve(Config)
+
+    def _init_blob_store() -> BlobStore:
+        if config.blob_store == "local":
+            return LocalBlobStore(
+                root=Path(config.blob_store_path), ttl=config.blob_ttl
+            )
+        return RedisBlobStore(redis=container.resolve(Redis), ttl=config.blob_ttl)
+
+    container.register(BlobStore, factory=_init_blob_store, scope=Scope.singleton)
 
 
 def init_broker(container: TypedContainer) -> None:
     config = container.resolve(Config)
 
     def _init_res_backend() -> AsyncResultBackend:  # type: ignore
-        return RedisAsyncResultBackend(redis_url=config.redis_url)
+        return RedisAsyncResultBackend(
+            redis_url=config.redis_url, result_ex_time=config.result_ttl or None
+        )
 
     def _init_broker() -> AsyncBroker:
         return (
-            AioPikaBroker(config.rabbitmq_url)
+            AioPikaBroker(
+                config.rabbitmq_url,
+                queue_name=config.broker_queue,
+                max_priority=config.broker_max_priority or None,
+                qos=config.broker_prefetch,
+            )
             .with_result_backend(container.resolve(AsyncResultBackend))
-            .with_middlewares(PipelineMiddleware(), SimpleRetryMiddleware())
+            .with_middlewares(
+                PipelineMiddleware(),
+                SimpleRetryMiddleware(),
+                ResultNotifyMiddleware(container.resolve(Redis)),
+                JobMiddleware(),
+                AdmissionMiddleware(container.resolve(AdmissionController)),
+            )
         )
 
     container.register(
         AsyncResultBackend, factory=_init_res_backend, scope=Scope.singleton
     )
     container.register(AsyncBroker, factory=_init_broker, scope=Scope.singleton)
+    container.register(TaskResultListener, scope=Scope.singleton)
+    container.register(AdmissionController, scope=Scope.singleton)
 
 
 def init_schedulers(container: TypedContainer) -> None:
@@ -118,25 +163,101 @@ def init_notification_mgr(container: TypedContainer) -> None:
     )
 
 
-def init_services(container: TypedContainer) -> None:
+def init_http(container: TypedContainer) -> None:
+    container.register(HttpClientPool, scope=Scope.singleton)
+
+
+def init_caches(container: TypedContainer) -> None:
     config = container.resolve(Config)
 
-    container.register(XinferenceService, scope=Scope.singleton)
-    if config.use_openai:
-        logger.info("Used an OpenAIService")
-        container.register(
-            BpmnService,
-            OpenAIService,
-            scope=Scope.singleton,
+    def _init_bpmn_cache() -> BpmnCache:
+        return BpmnCache(
+            redis=container.resolve(Redis),
+            namespace="bpmn",
+            ttl=config.bpmn_cache_ttl,
+            max_entries=config.bpmn_cache_max_entries,
+        )
+
+    def _init_suggestions_cache() -> SuggestionsCache:
+        return SuggestionsCache(
+            redis=container.resolve(Redis),
+            namespace="suggestions",
+            ttl=config.suggestions_cache_ttl,
+            max_entries=config.suggestions_cache_max_entries,
         )
-    else:
-        logger.info("Used an OllamaService")
-        container.register(
-            BpmnService,
-            OllamaService,
-            scope=Scope.singleton,
+
+    def _init_transcript_cache() -> TranscriptCache:
+        return TranscriptCache(
+            redis=container.resolve(Redis),
+            namespace="transcripts",
+            ttl=config.transcript_cache_ttl,
+            max_entries=config.transcript_cache_max_entries,
+        )
+
+    container.register(BpmnCache, factory=_init_bpmn_cache, scope=Scope.singleton)
+    container.register(
+        SuggestionsCache, factory=_init_suggestions_cache, scope=Scope.singleton
+    )
+    container.register(
+        TranscriptCache, factory=_init_transcript_cache, scope=Scope.singleton
+    )
+
+
+def init_services(container: TypedContainer) -> None:
+    config = container.resolve(Config)
+
+    upstreams.configure(
+        config.circuit_failure_threshold,
+        config.circuit_recovery_time,
+        config.circuit_half_open_calls,
+        config.retry_budget_ratio,
+        config.retry_budget_max,
+    )
+    container.register(UpstreamRegistry, instance=upstreams)
+
+    def _init_upstream_stats() -> RedisUpstreamStats:
+        return RedisUpstreamStats(
+            redis=container.resolve(Redis), ttl=config.upstream_stats_ttl
         )
 
+    container.register(
+        RedisUpstreamStats, factory=_init_upstream_stats, scope=Scope.singleton
+    )
+    container.register(FfmpegTranscoder, scope=Scope.singleton)
+    container.register(XinferenceService, scope=Scope.singleton)
+    container.register(OpenAIService, scope=Scope.singleton)
+    container.register(OllamaService, scope=Scope.singleton)
+
+    def _init_backend(kind: str, url: str) -> BpmnService:
+        http = container.resolve(HttpClientPool)
+        if kind == "openai":
+            return OpenAIService(config, http, url)
+        return OllamaService(config, http, url)
+
+    def _init_bpmn_service() -> BpmnService:
+        service: BpmnService
+        if config.llm_backends:
+            backends = parse_backends(config.llm_backends)
+            logger.info(f"Used a RouterBpmnService over {backends}")
+            service = RouterBpmnService(
+                [
+                    RouterBackend(url, _init_backend(kind, url))
+                    for kind, url in backends
+                ],
+                config,
+            )
+        elif config.use_openai:
+            logger.info("Used an OpenAIService")
+            service = container.resolve(OpenAIService)
+        else:
+            logger.info("Used an OllamaService")
+            service = container.resolve(OllamaService)
+        if config.llm_coalesce_enabled:
+            return CoalescingBpmnService(service, container.resolve(Redis), config)
+        return service
+
+    container.register(BpmnService, factory=_init_bpmn_service, scope=Scope.singleton)
+
 
 def _init_container() -> TypedContainer:
     container = TypedContainer()
@@ -146,9 +267,12 @@ def _init_container() -> TypedContainer:
     )
     init_database(container)
     init_redis(container)
+    init_blobs(container)
     init_broker(container)
     init_schedulers(container)
     init_notification_mgr(container)
+    init_http(container)
+    init_caches(container)
 
     init_services(container)
 
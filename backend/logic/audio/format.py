@@ -0,0 +1,11 @@
+"""
+Audio format the speech-to-text model works on.
+
+Whisper resamples every input to 16 kHz mono, so recordings are converted to
+that format once, before they are stored and sent to the model. `PCM_ARGS`
+are the ffmpeg output options producing 16-bit PCM in this format.
+"""
+
+SAMPLE_RATE = 16000
+CHANNELS = 1
+PCM_ARGS = ("-ac", str(CHANNELS), "-ar", str(SAMPLE_RATE), "-c:a", "pcm_s16le")
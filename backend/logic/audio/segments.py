@@ -0,0 +1,105 @@
+"""
+Splitting of long recordings into segments for parallel transcription.
+
+A recording is cut into segments of about the target length. Cuts are
+placed in the middle of the silence closest to the target, so words are
+rarely split; a segment without any silence is cut hard at the maximum
+length. Every segment after the first starts `overlap` seconds before its
+cut, so a word on a hard cut is heard whole by one of the segments, and the
+duplicated words are removed when the transcripts are stitched back.
+
+Classes:
+    Segment: Time span of one segment.
+
+Functions:
+    plan_segments: Chooses the segments of a recording.
+    stitch_transcripts: Joins the transcripts of consecutive segments.
+"""
+
+import re
+from dataclasses import dataclass
+
+Silence = tuple[float, float]
+
+_WORD = re.compile(r"\w+")
+
+
+@dataclass(frozen=True)
+class Segment:
+    """
+    Time span of one segment in seconds.
+
+    :param start: Start of the segment, including the overlap.
+    :param end: End of the segment.
+    """
+
+    start: float
+    end: float
+
+
+def _cut(silences: list[Silence], start: float, target: float, limit: float) -> float:
+    best = limit
+    for silence_start, silence_end in silences:
+        middle = (silence_start + silence_end) / 2
+        if start < middle < limit and abs(middle - target) < abs(best - target):
+            best = middle
+    return best
+
+
+def plan_segments(
+    duration: float,
+    silences: list[Silence],
+    target: float,
+    max_length: float,
+    overlap: float,
+) -> list[Segment]:
+    """
+    Chooses the segments of a recording.
+
+    :param duration: Duration of the recording in seconds.
+    :param silences: Sorted `(start, end)` spans of silence in seconds.
+    :param target: Preferred length of a segment in seconds.
+    :param max_length: Maximum length of a segment without the overlap.
+    :param overlap: Length of the overlap with the previous segment.
+    :return: Segments covering the whole recording, in order.
+    """
+    segments: list[Segment] = []
+    start = 0.0
+    while duration - start > max_length:
+        end = _cut(silences, start, start + target, start + max_length)
+        segments.append(Segment(max(0.0, start - overlap) if segments else 0.0, end))
+        start = end
+    segments.append(Segment(max(0.0, start - overlap) if segments else 0.0, duration))
+    return segments
+
+
+def _words(text: str) -> list[str]:
+    return [word.lower() for word in _WORD.findall(text)]
+
+
+def _overlap(previous: list[str], following: list[str], max_words: int) -> int:
+    for size in range(min(len(previous), len(following), max_words), 0, -1):
+        if previous[-size:] == following[:size]:
+            return size
+    return 0
+
+
+def stitch_transcripts(texts: list[str], max_overlap_words: int = 8) -> str:
+    """
+    Joins the transcripts of consecutive overlapping segments, dropping the
+    words the next transcript repeats from the end of the previous one.
+
+    :param texts: Transcripts in the order of their segments.
+    :param max_overlap_words: Longest repeated run of words that is dropped.
+    :return: Transcript of the whole recording.
+    """
+    result = ""
+    for text in texts:
+        text = text.strip()
+        if not text:
+            continue
+        size = _overlap(_words(result), _words(text), max_overlap_words)
+        if size:
+            text = text[list(_WORD.finditer(text))[size - 1].end() :].lstrip(" ,.;:")
+        result = f"{result} {text}".strip() if text else result
+    return result
@@ -0,0 +1,200 @@
+"""
+Incremental transcription of audio streamed while the user speaks.
+
+The client sends audio chunks as they are recorded, either raw 16 kHz mono
+16-bit PCM or a WebM stream from `MediaRecorder`. The stream buffers the
+samples and, once enough audio is pending, transcribes it window by window,
+cutting the windows at silences exactly like the segments of an uploaded
+recording. When the user stops, only the last window is left to transcribe,
+so the final transcript is ready shortly after the end of the speech.
+
+WebM chunks are not decodable on their own, so the whole WebM stream is
+decoded again for every window. To keep that cost per window rather than per
+chunk, the stream is decoded only once a window may be ready, judging by the
+bitrate of the part decoded so far. PCM input avoids the cost altogether.
+
+Classes:
+    StreamTooLongError: Raised when the stream exceeds the duration limit.
+    SpeechStream: Audio buffer and transcript of one streaming session.
+"""
+
+import asyncio
+import logging
+from dataclasses import dataclass, field
+from typing import Literal
+
+from infra.audio.ffmpeg import FfmpegTranscoder
+from infra.audio.wav import pcm_to_wav
+from logic.audio.format import CHANNELS, PCM_ARGS, SAMPLE_RATE
+from logic.audio.segments import plan_segments, stitch_transcripts
+from logic.services.xinference import XinferenceService
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+BYTES_PER_SECOND = SAMPLE_RATE * CHANNELS * 2
+# Shorter tails are not worth a request, Whisper hallucinates on them.
+MIN_TAIL_SECONDS = 0.1
+
+StreamFormat = Literal["pcm", "webm"]
+
+
+class StreamTooLongError(ValueError):
+    """
+    Raised when a stream exceeds the maximum duration of a recording.
+    """
+
+
+@dataclass
+class SpeechStream:
+    """
+    Audio buffer and transcript of one streaming session.
+
+    :param config: Configuration object holding the STT settings.
+    :param transcoder: Runner of the ffmpeg subprocesses.
+    :param stt: Speech-to-text service.
+    :param audio_format: Format of the incoming chunks.
+    """
+
+    config: Config
+    transcoder: FfmpegTranscoder
+    stt: XinferenceService
+    audio_format: StreamFormat = "pcm"
+    _encoded: bytearray = field(default_factory=bytearray, init=False)
+    _pcm: bytearray = field(default_factory=bytearray, init=False)
+    _offset: int = field(default=0, init=False)
+    _decoded_bytes: int = field(default=0, init=False)
+    _texts: list[str] = field(default_factory=list, init=False)
+    _lock: asyncio.Lock = field(default_factory=asyncio.Lock, init=False)
+
+    @property
+    def transcript(self) -> str:
+        """
+        Transcript of the windows transcribed so far.
+
+        :return: Stitched transcript.
+        """
+        return stitch_transcripts(self._texts)
+
+    @property
+    def _window(self) -> float:
+        return self.config.stt_stream_window_seconds
+
+    @property
+    def _pending(self) -> float:
+        return (len(self._pcm) - self._offset) / BYTES_PER_SECOND
+
+    async def feed(self, chunk: bytes) -> bool:
+        """
+        Appends a chunk and transcribes the windows it completes.
+
+        Chunks arriving while a window is being transcribed are buffered and
+        picked up by the running transcription.
+
+        :param chunk: Next chunk of the audio stream.
+        :return: True if the transcript has grown.
+        :raises StreamTooLongError: If the stream exceeds the duration limit.
+        :raises TranscodeError: If WebM decoding fails.
+        :raises httpx.HTTPError: If communication with Xinference service fails.
+        """
+        if self.audio_format == "webm":
+            self._encoded += chunk
+        else:
+            self._pcm += chunk
+        if self._lock.locked():
+            return False
+        transcribed = len(self._texts)
+        async with self._lock:
+            if self._decode_due():
+                await self._decode()
+            while self._pending > self._window * 1.5:
+                if not await self._transcribe(final=False):
+                    break
+                if self._decode_due():
+                    await self._decode()
+        return any(text.strip() for text in self._texts[transcribed:])
+
+    async def finish(self) -> str:
+        """
+        Transcribes the rest of the stream.
+
+        :return: Transcript of the whole stream.
+        :raises TranscodeError: If WebM decoding fails.
+        :raises httpx.HTTPError: If communication with Xinference service fails.
+        """
+        async with self._lock:
+            await self._decode()
+            while self._pending > MIN_TAIL_SECONDS:
+                await self._transcribe(final=True)
+        return self.transcript
+
+    def _decode_due(self) -> bool:
+        """
+        Tells whether the WebM stream has grown enough to decode it again.
+
+        Until a second of audio is decoded the bitrate is unknown, and the
+        stream is decoded whenever it doubles in size. Afterwards it is
+        decoded once the estimated pending audio fills a window, or the
+        estimated duration reaches the limit.
+        """
+        if self.audio_format != "webm":
+            return True
+        decoded_seconds = len(self._pcm) / BYTES_PER_SECOND
+        if decoded_seconds < 1:
+            return len(self._encoded) >= 2 * self._decoded_bytes
+        undecoded = (len(self._encoded) - self._decoded_bytes) / (
+            self._decoded_bytes / decoded_seconds
+        )
+        return (
+            self._pending + undecoded > self._window * 1.5
+            or decoded_seconds + undecoded > self.config.upload_max_duration
+        )
+
+    async def _decode(self) -> None:
+        if self.audio_format == "webm" and self._encoded:
+            self._decoded_bytes = len(self._encoded)
+            self._pcm = bytearray(
+                await self.transcoder.transcode(
+                    bytes(self._encoded),
+                    [*PCM_ARGS, "-f", "s16le"],
+                    input_format="webm",
+                )
+            )
+        if len(self._pcm) / BYTES_PER_SECOND > self.config.upload_max_duration:
+            raise StreamTooLongError(
+                f"Stream is longer than the limit of "
+                f"{self.config.upload_max_duration:.0f}s"
+            )
+
+    @staticmethod
+    def _position(seconds: float) -> int:
+        return int(seconds * SAMPLE_RATE) * CHANNELS * 2
+
+    async def _transcribe(self, final: bool) -> bool:
+        pending = bytes(self._pcm[self._offset : len(self._pcm) // 2 * 2])
+        duration = len(pending) / BYTES_PER_SECOND
+        silences = await self.transcoder.detect_silences(
+            pcm_to_wav(pending, SAMPLE_RATE, CHANNELS),
+            self.config.stt_silence_noise_db,
+            self.config.stt_silence_min_seconds,
+        )
+        segments = plan_segments(
+            duration,
+            silences,
+            self._window,
+            self._window * 1.5,
+            self.config.stt_segment_overlap,
+        )
+        # The last segment is still growing unless the stream has ended.
+        segment = segments[0]
+        if len(segments) == 1 and not final:
+            return False
+        window = pending[self._position(segment.start) : self._position(segment.end)]
+        self._texts.append(
+            await self.stt.speach_to_text(pcm_to_wav(window, SAMPLE_RATE, CHANNELS))
+        )
+        if len(segments) == 1:
+            self._offset = len(self._pcm)
+        else:
+            self._offset += self._position(segments[1].start)
+        return True
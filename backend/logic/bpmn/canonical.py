@@ -0,0 +1,146 @@
+"""
+Layout-insensitive canonical form of BPMN diagrams.
+
+Dragging a shape in bpmn-js changes the XML (coordinates in the `bpmndi`
+section) but not the process itself. The canonical form drops everything that
+does not affect the semantics of the process, so equal processes produce equal
+canonical documents:
+
+- the `bpmndi` diagram interchange section and comments are removed;
+- namespace prefixes are replaced by expanded names;
+- attributes are sorted and whitespace in texts and values is collapsed;
+- exporter metadata written by the modeler is dropped;
+- ids generated by bpmn-js (e.g. `Activity_0x1y2z3`) are replaced by ordinal
+  placeholders in document order.
+
+The id mapping is kept, so texts mentioning ids of one diagram (such as
+cached suggestions) can be translated to the ids of an equivalent diagram.
+
+Classes:
+    CanonicalBpmn: Canonical document together with its id mapping.
+
+Functions:
+    canonicalize: Builds the canonical form of a BPMN XML document.
+    strip_layout: Removes the diagram interchange section from a document.
+"""
+
+import re
+import xml.etree.ElementTree as ET
+from dataclasses import dataclass, field
+from typing import Optional
+
+from logic.bpmn.namespaces import BPMNDI_NS, qname
+
+IGNORED_ATTRIBUTES = frozenset({"exporter", "exporterVersion"})
+AUTO_ID = re.compile(r"^[A-Za-z]+_[0-9a-z]{7}$")
+PLACEHOLDER = re.compile(r"\{\{id:(\d+)\}\}")
+
+
+@dataclass
+class CanonicalBpmn:
+    """
+    Canonical form of a BPMN diagram.
+
+    :param xml: Canonical XML document.
+    :param ids: Mapping of generated ids of the diagram to their placeholders.
+    """
+
+    xml: str
+    ids: dict[str, str] = field(default_factory=dict)
+
+    def to_canonical_text(self, text: str) -> str:
+        """
+        Replaces ids of the diagram in a text with their placeholders.
+
+        :param text: Text mentioning element ids of the diagram.
+        :return: Text with placeholders instead of generated ids.
+        """
+        if not self.ids:
+            return text
+        ids = sorted(self.ids, key=len, reverse=True)
+        pattern = re.compile(r"\b(" + "|".join(map(re.escape, ids)) + r")\b")
+        return pattern.sub(lambda m: self.ids[m.group(1)], text)
+
+    def from_canonical_text(self, text: str) -> str:
+        """
+        Replaces placeholders in a text with the ids of the diagram.
+
+        :param text: Text produced by :meth:`to_canonical_text`.
+        :return: Text mentioning element ids of this diagram.
+        """
+        inverse = {placeholder: id_ for id_, placeholder in self.ids.items()}
+        return PLACEHOLDER.sub(lambda m: inverse.get(m.group(0), m.group(0)), text)
+
+
+def _is_layout(element: ET.Element) -> bool:
+    return element.tag.startswith(f"{{{BPMNDI_NS}}}")
+
+
+def _collapse(text: Optional[str]) -> str:
+    return " ".join(text.split()) if text else ""
+
+
+def _collect_ids(element: ET.Element, ids: dict[str, str]) -> None:
+    id_ = element.get("id")
+    if id_ and AUTO_ID.match(id_) and id_ not in ids:
+        ids[id_] = f"{{{{id:{len(ids)}}}}}"
+    for child in element:
+        if not _is_layout(child):
+            _collect_ids(child, ids)
+
+
+def _serialize(element: ET.Element, ids: dict[str, str], out: list[str]) -> None:
+    attributes = sorted(
+        (name, ids.get(value, _collapse(value)))
+        for name, value in element.attrib.items()
+        if name not in IGNORED_ATTRIBUTES
+    )
+    out.append(f"<{element.tag}")
+    for name, value in attributes:
+        out.append(f' {name}="{_escape(value)}"')
+    out.append(">")
+    text = _collapse(element.text)
+    out.append(_escape(ids.get(text, text)))
+    for child in element:
+        if not _is_layout(child):
+            _serialize(child, ids, out)
+    out.append(f"</{element.tag}>")
+
+
+def _escape(value: str) -> str:
+    return value.replace("&", "&amp;").replace("<", "&lt;").replace('"', "&quot;")
+
+
+def canonicalize(bpmn_xml: str) -> Optional[CanonicalBpmn]:
+    """
+    Builds the layout-insensitive canonical form of a BPMN XML document.
+
+    :param bpmn_xml: BPMN XML document.
+    :return: The canonical form, or None if the document is not well-formed.
+    """
+    try:
+        root = ET.fromstring(bpmn_xml)
+    except ET.ParseError:
+        return None
+    ids: dict[str, str] = {}
+    _collect_ids(root, ids)
+    out: list[str] = []
+    _serialize(root, ids, out)
+    return CanonicalBpmn(xml="".join(out), ids=ids)
+
+
+def strip_layout(bpmn_xml: str) -> str:
+    """
+    Removes the `bpmndi` diagram interchange section from a BPMN document.
+
+    The process model and element ids are kept as they are, so the result is
+    a smaller document for prompts that do not need the layout.
+
+    :param bpmn_xml: BPMN XML document.
+    :return: The document without `BPMNDiagram` elements.
+    :raises ET.ParseError: If the document is not well-formed.
+    """
+    root = ET.fromstring(bpmn_xml)
+    for diagram in root.findall(qname(BPMNDI_NS, "BPMNDiagram")):
+        root.remove(diagram)
+    return ET.tostring(root, encoding="unicode")
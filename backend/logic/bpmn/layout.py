@@ -0,0 +1,403 @@
+"""
+Automatic layout of process graphs.
+
+A simplified layered (Sugiyama-style) layout, flowing left to right:
+
+1. cycles are broken by reversing the back edges found by a depth-first
+   search started from the start events;
+2. nodes are assigned to columns by the longest path from a source;
+3. nodes within a column are grouped by lane and ordered by the barycenter
+   of their neighbours, sweeping back and forth to reduce crossings;
+4. every lane becomes a horizontal band tall enough for its fullest column,
+   and edges are routed orthogonally, back edges below the nodes.
+
+Classes:
+    Bounds: Rectangle of a shape.
+    Layout: Bounds of the shapes and waypoints of the edges of a graph.
+
+The layout of an edited graph can instead be merged onto the layout of the
+previous version of the diagram: unchanged elements keep their positions and
+new elements are placed next to their neighbours.
+
+Functions:
+    layout_graph: Computes the layout of a process graph.
+    merge_layout: Lays out an edited graph on top of a previous layout.
+"""
+
+from collections import defaultdict
+from dataclasses import dataclass, field, replace
+from typing import Optional
+
+from logic.bpmn.graph import (EVENT_TYPES, GATEWAY_TYPES, GraphNode,
+                              ProcessGraph)
+
+EVENT_SIZE = (36.0, 36.0)
+GATEWAY_SIZE = (50.0, 50.0)
+TASK_SIZE = (100.0, 80.0)
+
+COLUMN_WIDTH = 150.0
+ROW_HEIGHT = 120.0
+ORIGIN = (160.0, 80.0)
+LANE_PADDING = 50.0
+LANE_HEADER = 30.0
+ORDERING_SWEEPS = 4
+NODE_GAP = COLUMN_WIDTH - TASK_SIZE[0]
+ROW_MARGIN = (ROW_HEIGHT - TASK_SIZE[1]) / 2
+
+Point = tuple[float, float]
+
+
+@dataclass
+class Bounds:
+    """
+    Rectangle of a shape.
+
+    :param x: Left edge.
+    :param y: Top edge.
+    :param width: Width.
+    :param height: Height.
+    """
+
+    x: float
+    y: float
+    width: float
+    height: float
+
+    @property
+    def right(self) -> float:
+        return self.x + self.width
+
+    @property
+    def bottom(self) -> float:
+        return self.y + self.height
+
+    @property
+    def center(self) -> Point:
+        return self.x + self.width / 2, self.y + self.height / 2
+
+
+@dataclass
+class Layout:
+    """
+    Layout of a process graph.
+
+    :param shapes: Bounds of the nodes by node id.
+    :param edges: Waypoints of the flows by flow id.
+    :param lanes: Bounds of the lanes by lane id.
+    :param pool: Bounds of the pool around the lanes, if there are lanes.
+    """
+
+    shapes: dict[str, Bounds] = field(default_factory=dict)
+    edges: dict[str, list[Point]] = field(default_factory=dict)
+    lanes: dict[str, Bounds] = field(default_factory=dict)
+    pool: Optional[Bounds] = None
+
+
+def node_size(node_type: str) -> tuple[float, float]:
+    """
+    Returns the default bpmn-js size of a node.
+
+    :param node_type: BPMN element type.
+    :return: Width and height.
+    """
+    if node_type in EVENT_TYPES:
+        return EVENT_SIZE
+    if node_type in GATEWAY_TYPES:
+        return GATEWAY_SIZE
+    return TASK_SIZE
+
+
+def _back_edges(
+    order: list[str], successors: dict[str, list[str]], roots: list[str]
+) -> set[tuple[str, str]]:
+    back: set[tuple[str, str]] = set()
+    state: dict[str, int] = {}  # 1 - on the stack, 2 - done
+    for root in [*roots, *order]:
+        if root in state:
+            continue
+        state[root] = 1
+        stack = [(root, iter(successors[root]))]
+        while stack:
+            node, children = stack[-1]
+            child = next(children, None)
+            if child is None:
+                state[node] = 2
+                stack.pop()
+            elif state.get(child) == 1:
+                back.add((node, child))
+            elif child not in state:
+                state[child] = 1
+                stack.append((child, iter(successors[child])))
+    return back
+
+
+def _assign_columns(order: list[str], edges: list[tuple[str, str]]) -> dict[str, int]:
+    indegree = dict.fromkeys(order, 0)
+    successors: dict[str, list[str]] = defaultdict(list)
+    for source, target in edges:
+        successors[source].append(target)
+        indegree[target] += 1
+    column = dict.fromkeys(order, 0)
+    ready = [node for node in order if not indegree[node]]
+    while ready:
+        node = ready.pop(0)
+        for child in successors[node]:
+            column[child] = max(column[child], column[node] + 1)
+            indegree[child] -= 1
+            if not indegree[child]:
+                ready.append(child)
+    return column
+
+
+def _order_columns(
+    columns: list[list[str]],
+    lane_of: dict[str, int],
+    successors: dict[str, list[str]],
+    predecessors: dict[str, list[str]],
+) -> None:
+    def sweep(indexes: range, neighbours: dict[str, list[str]], step: int) -> None:
+        for i in indexes:
+            reference = {node: pos for pos, node in enumerate(columns[i - step])}
+            current = {node: pos for pos, node in enumerate(columns[i])}
+
+            def barycenter(node: str) -> float:
+                known = [reference[n] for n in neighbours[node] if n in reference]
+                return sum(known) / len(known) if known else current[node]
+
+            columns[i].sort(key=lambda node: (lane_of[node], barycenter(node)))
+
+    for _ in range(ORDERING_SWEEPS):
+        sweep(range(1, len(columns)), predecessors, 1)
+        sweep(range(len(columns) - 2, -1, -1), successors, -1)
+
+
+def _route(source: Bounds, target: Bounds, backward: bool) -> list[Point]:
+    (sx, sy), (tx, ty) = source.center, target.center
+    if backward:
+        y = max(source.bottom, target.bottom) + ROW_HEIGHT / 4
+        return [(sx, source.bottom), (sx, y), (tx, y), (tx, target.bottom)]
+    if sy == ty:
+        return [(source.right, sy), (target.x, ty)]
+    x = target.x - NODE_GAP / 2
+    return [(source.right, sy), (x, sy), (x, ty), (target.x, ty)]
+
+
+def layout_graph(graph: ProcessGraph) -> Layout:
+    """
+    Computes the layout of a process graph.
+
+    :param graph: Validated process graph.
+    :return: Bounds of all shapes and waypoints of all edges.
+    """
+    nodes = {node["id"]: node for node in graph["nodes"]}
+    order = list(nodes)
+    lane_index = {lane["id"]: i for i, lane in enumerate(graph["lanes"])}
+    lane_of = {id_: lane_index.get(node["lane"], 0) for id_, node in nodes.items()}
+
+    successors: dict[str, list[str]] = defaultdict(list)
+    for flow in graph["flows"]:
+        successors[flow["source"]].append(flow["target"])
+    roots = [id_ for id_, node in nodes.items() if node["type"] == "startEvent"]
+    back = _back_edges(order, successors, roots)
+    forward = [
+        (flow["source"], flow["target"])
+        for flow in graph["flows"]
+        if (flow["source"], flow["target"]) not in back
+        and flow["source"] != flow["target"]
+    ]
+
+    column_of = _assign_columns(order, forward)
+    columns: list[list[str]] = [[] for _ in range(max(column_of.values()) + 1)]
+    for id_ in order:
+        columns[column_of[id_]].append(id_)
+    dag_successors: dict[str, list[str]] = defaultdict(list)
+    dag_predecessors: dict[str, list[str]] = defaultdict(list)
+    for source, target in forward:
+        dag_successors[source].append(target)
+        dag_predecessors[target].append(source)
+    _order_columns(columns, lane_of, dag_successors, dag_predecessors)
+
+    lane_count = max(len(graph["lanes"]), 1)
+    rows = [1] * lane_count
+    for column in columns:
+        for lane in range(lane_count):
+            rows[lane] = max(rows[lane], sum(lane_of[n] == lane for n in column))
+    lane_tops = [ORIGIN[1]]
+    for lane in range(lane_count):
+        lane_tops.append(lane_tops[-1] + rows[lane] * ROW_HEIGHT)
+
+    layout = Layout()
+    for i, column in enumerate(columns):
+        cx = ORIGIN[0] + i * COLUMN_WIDTH + TASK_SIZE[0] / 2
+        for lane in range(lane_count):
+            members = [n for n in column if lane_of[n] == lane]
+            offset = (rows[lane] - len(members)) / 2
+            for row, id_ in enumerate(members):
+                cy = lane_tops[lane] + (offset + row + 0.5) * ROW_HEIGHT
+                width, height = node_size(nodes[id_]["type"])
+                layout.shapes[id_] = Bounds(
+                    cx - width / 2, cy - height / 2, width, height
+                )
+
+    for flow in graph["flows"]:
+        source, target = flow["source"], flow["target"]
+        layout.edges[flow["id"]] = _route(
+            layout.shapes[source],
+            layout.shapes[target],
+            column_of[target] <= column_of[source],
+        )
+
+    if graph["lanes"]:
+        left = ORIGIN[0] - LANE_PADDING
+        width = len(columns) * COLUMN_WIDTH - COLUMN_WIDTH + TASK_SIZE[0]
+        width += 2 * LANE_PADDING
+        for lane_id, i in lane_index.items():
+            layout.lanes[lane_id] = Bounds(
+                left, lane_tops[i], width, lane_tops[i + 1] - lane_tops[i]
+            )
+        layout.pool = Bounds(
+            left - LANE_HEADER,
+            lane_tops[0],
+            width + LANE_HEADER,
+            lane_tops[-1] - lane_tops[0],
+        )
+    return layout
+
+
+def _overlaps(bounds: Bounds, others: list[Bounds]) -> bool:
+    margin = NODE_GAP / 2
+    return any(
+        bounds.x < other.right + margin
+        and other.x < bounds.right + margin
+        and bounds.y < other.bottom + margin
+        and other.y < bounds.bottom + margin
+        for other in others
+    )
+
+
+def _place(
+    node: GraphNode,
+    layout: Layout,
+    anchor: Optional[Bounds],
+    before: bool,
+    band: Optional[Bounds],
+) -> Bounds:
+    width, height = node_size(node["type"])
+    occupied = list(layout.shapes.values())
+    if anchor is None:
+        x = min(b.x for b in occupied)
+        y = max(b.bottom for b in occupied) + NODE_GAP
+    else:
+        x = anchor.x - NODE_GAP - width if before else anchor.right + NODE_GAP
+        y = anchor.center[1] - height / 2
+    if band is not None and not band.y <= y + height / 2 < band.bottom:
+        y = band.y + (ROW_HEIGHT - height) / 2
+    bounds = Bounds(x, y, width, height)
+    while _overlaps(bounds, occupied):
+        bounds.y += ROW_HEIGHT
+    return bounds
+
+
+def _fit_lanes(graph: ProcessGraph, previous: Layout, layout: Layout) -> None:
+    nodes, lanes = list(layout.shapes.values()), list(previous.lanes.values())
+    left = min([b.x - LANE_PADDING for b in nodes] + [b.x for b in lanes])
+    right = max([b.right + LANE_PADDING for b in nodes] + [b.right for b in lanes])
+    if lanes:
+        top = min(b.y for b in lanes)
+    else:
+        top = min(b.y for b in nodes) - LANE_PADDING
+    first = top
+
+    for lane in graph["lanes"]:
+        members = [n["id"] for n in graph["nodes"] if n["lane"] == lane["id"]]
+        old = previous.lanes.get(lane["id"])
+        if old is not None:
+            delta, height = top - old.y, old.height
+        else:
+            upper = min((layout.shapes[id_].y for id_ in members), default=top)
+            delta, height = top + ROW_MARGIN - upper, ROW_HEIGHT
+        for id_ in members:
+            layout.shapes[id_].y += delta
+        bottom = max((layout.shapes[id_].bottom for id_ in members), default=top)
+        height = max(height, bottom + ROW_MARGIN - top)
+        layout.lanes[lane["id"]] = Bounds(left, top, right - left, height)
+        top += height
+    layout.pool = Bounds(
+        left - LANE_HEADER, first, right - left + LANE_HEADER, top - first
+    )
+
+
+def merge_layout(
+    graph: ProcessGraph, previous_graph: ProcessGraph, previous: Layout
+) -> Layout:
+    """
+    Lays out an edited graph on top of the layout of its previous version.
+
+    Nodes present in the previous layout keep their bounds. New nodes are put
+    right of a placed predecessor or left of a placed successor, moving down
+    until they do not overlap other shapes. Lanes are stretched to fit their
+    nodes, and edges keep their waypoints unless an end has moved or the flow
+    was reconnected.
+
+    :param graph: Validated edited graph.
+    :param previous_graph: Graph of the previous version of the diagram.
+    :param previous: Layout of the previous version of the diagram.
+    :return: Bounds of all shapes and waypoints of all edges.
+    """
+    layout = Layout()
+    for node in graph["nodes"]:
+        if node["id"] in previous.shapes:
+            layout.shapes[node["id"]] = replace(previous.shapes[node["id"]])
+    if not layout.shapes:
+        return layout_graph(graph)
+
+    predecessors: dict[str, list[str]] = defaultdict(list)
+    successors: dict[str, list[str]] = defaultdict(list)
+    for flow in graph["flows"]:
+        successors[flow["source"]].append(flow["target"])
+        predecessors[flow["target"]].append(flow["source"])
+
+    pending = [node for node in graph["nodes"] if node["id"] not in layout.shapes]
+    while pending:
+        for node in pending:
+            placed_before = [n for n in predecessors[node["id"]] if n in layout.shapes]
+            placed_after = [n for n in successors[node["id"]] if n in layout.shapes]
+            if placed_before or placed_after:
+                break
+        else:
+            node, placed_before, placed_after = pending[0], [], []
+        anchor = None
+        if placed_before or placed_after:
+            anchor = layout.shapes[(placed_before or placed_after)[0]]
+        layout.shapes[node["id"]] = _place(
+            node,
+            layout,
+            anchor,
+            before=not placed_before,
+            band=previous.lanes.get(node["lane"]),
+        )
+        pending.remove(node)
+
+    if graph["lanes"]:
+        _fit_lanes(graph, previous, layout)
+
+    previous_ends = {
+        flow["id"]: (flow["source"], flow["target"]) for flow in previous_graph["flows"]
+    }
+    for flow in graph["flows"]:
+        source, target = flow["source"], flow["target"]
+        source_bounds, target_bounds = layout.shapes[source], layout.shapes[target]
+        if (
+            flow["id"] in previous.edges
+            and previous_ends.get(flow["id"]) == (source, target)
+            and previous.shapes.get(source) == source_bounds
+            and previous.shapes.get(target) == target_bounds
+        ):
+            layout.edges[flow["id"]] = list(previous.edges[flow["id"]])
+        else:
+            layout.edges[flow["id"]] = _route(
+                source_bounds,
+                target_bounds,
+                target_bounds.center[0] <= source_bounds.center[0],
+            )
+    return layout
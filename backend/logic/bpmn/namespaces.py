@@ -0,0 +1,43 @@
+"""
+XML namespaces of BPMN 2.0 documents.
+
+The namespaces are registered with ElementTree under the prefixes used by
+bpmn-js, so documents serialized by ElementTree look like the ones exported
+by the modeler.
+"""
+
+import xml.etree.ElementTree as ET
+
+MODEL_NS = "http://www.omg.org/spec/BPMN/20100524/MODEL"
+BPMNDI_NS = "http://www.omg.org/spec/BPMN/20100524/DI"
+DC_NS = "http://www.omg.org/spec/DD/20100524/DC"
+DI_NS = "http://www.omg.org/spec/DD/20100524/DI"
+
+PREFIXES = {MODEL_NS: "bpmn", BPMNDI_NS: "bpmndi", DC_NS: "dc", DI_NS: "di"}
+
+for _namespace, _prefix in PREFIXES.items():
+    ET.register_namespace(_prefix, _namespace)
+
+
+def qname(namespace: str, name: str) -> str:
+    """
+    Builds an expanded ElementTree name.
+
+    :param namespace: Namespace URI.
+    :param name: Local name.
+    :return: Name in `{namespace}name` notation.
+    """
+    return f"{{{namespace}}}{name}"
+
+
+def local_name(tag: str) -> tuple[str, str]:
+    """
+    Splits an expanded ElementTree name.
+
+    :param tag: Name in `{namespace}name` notation or a plain local name.
+    :return: Namespace URI (empty if none) and local name.
+    """
+    if tag.startswith("{"):
+        namespace, _, name = tag[1:].partition("}")
+        return namespace, name
+    return "", tag
@@ -0,0 +1,693 @@
+"""
+Patch-based editing of BPMN diagrams.
+
+In patch edit mode the model does not regenerate the diagram. It returns a
+short list of graph operations, and the operations are applied to the parsed
+XML document of the existing diagram. Everything the operations do not touch
+(event definitions, documentation, extension elements, colors, data objects
+and so on) stays as it was.
+
+Only the affected part of the layout is recomputed: new nodes are placed next
+to their neighbours, nodes that changed their type keep their center, and
+edges are re-routed only if one of their ends has changed.
+
+Graph edit mode goes through the same machinery: the edited graph is compared
+with the graph of the document, and only the differences are applied, so the
+elements the graph cannot represent survive the edit as well.
+
+Classes:
+    PatchOperation: Single graph operation.
+    BpmnPatch: List of operations returned by the model.
+    PatchError: Raised for operations that cannot be applied.
+
+Functions:
+    apply_patch: Applies a patch to a BPMN XML document.
+    apply_graph: Applies an edited process graph to a BPMN XML document.
+"""
+
+import copy
+import io
+import xml.etree.ElementTree as ET
+from typing import Any, Optional, TypedDict
+from xml.sax.saxutils import escape
+
+from logic.bpmn.graph import (NODE_TYPES, GraphError, GraphFlow, GraphLane,
+                              GraphNode, ProcessGraph, object_schema,
+                              validate_graph)
+from logic.bpmn.layout import Bounds, Layout, Point, merge_layout, node_size
+from logic.bpmn.namespaces import (BPMNDI_NS, DC_NS, DI_NS, MODEL_NS, PREFIXES,
+                                   local_name, qname)
+from logic.bpmn.serialize import (COLLABORATION_ID, PARTICIPANT_ID,
+                                  XML_DECLARATION, diagram_from_tree)
+
+PATCH_OPERATIONS = (
+    "add_node",
+    "add_flow",
+    "remove",
+    "rename",
+    "reconnect",
+    "change_type",
+)
+KEPT_ON_TYPE_CHANGE = frozenset(
+    {"documentation", "extensionElements", "incoming", "outgoing"}
+)
+XML_NS = "http://www.w3.org/XML/1998/namespace"
+ATTRIBUTE_ENTITIES = {'"': "&quot;", "\n": "&#10;", "\r": "&#13;", "\t": "&#09;"}
+
+
+class PatchOperation(TypedDict):
+    """
+    Single graph operation. Fields not used by the operation are empty.
+
+    - `add_node`: adds node `id` of `type` named `name` into lane `lane`;
+    - `add_flow`: adds flow `id` from `source` to `target` named `name`;
+    - `remove`: removes node or flow `id`, a node with all its flows;
+    - `rename`: sets the name of node, flow or lane `id` to `name`;
+    - `reconnect`: moves flow `id` to `source` and/or `target`;
+    - `change_type`: changes the type of node `id` to `type`.
+
+    :key op: Operation, one of `PATCH_OPERATIONS`.
+    :key id: Id of the element the operation applies to.
+    :key type: BPMN element type of a node.
+    :key name: Name of an element.
+    :key lane: Id of the lane of a new node.
+    :key source: Id of the source node of a flow.
+    :key target: Id of the target node of a flow.
+    """
+
+    op: str
+    id: str
+    type: str
+    name: str
+    lane: str
+    source: str
+    target: str
+
+
+class BpmnPatch(TypedDict):
+    """
+    Patch of a BPMN diagram.
+
+    :key operations: Operations, applied in order.
+    """
+
+    operations: list[PatchOperation]
+
+
+PATCH_SCHEMA: dict[str, Any] = object_schema(
+    {
+        "operations": {
+            "type": "array",
+            "items": object_schema(
+                {
+                    "op": {"type": "string", "enum": list(PATCH_OPERATIONS)},
+                    "id": {"type": "string"},
+                    "type": {"type": "string"},
+                    "name": {"type": "string"},
+                    "lane": {"type": "string"},
+                    "source": {"type": "string"},
+                    "target": {"type": "string"},
+                }
+            ),
+        }
+    }
+)
+
+
+class PatchError(GraphError):
+    """Raised when a patch operation cannot be applied to the diagram."""
+
+
+def _bounds_attributes(bounds: Bounds) -> dict[str, str]:
+    return {
+        "x": f"{bounds.x:g}",
+        "y": f"{bounds.y:g}",
+        "width": f"{bounds.width:g}",
+        "height": f"{bounds.height:g}",
+    }
+
+
+class _Patcher:
+    def __init__(self, definitions: ET.Element) -> None:
+        self.definitions = definitions
+        process = definitions.find(qname(MODEL_NS, "process"))
+        if process is None:
+            raise PatchError("Diagram has no process")
+        self.process = process
+        self.graph, self.layout = diagram_from_tree(definitions)
+        self.previous_graph = copy.deepcopy(self.graph)
+        self.ids = {e.get("id") for e in definitions.iter() if e.get("id")}
+        self.retyped: set[str] = set()
+        plane = definitions.find(
+            f"{qname(BPMNDI_NS, 'BPMNDiagram')}/{qname(BPMNDI_NS, 'BPMNPlane')}"
+        )
+        if plane is None:
+            # A diagram without layout is laid out from scratch by relayout()
+            diagram = ET.SubElement(
+                definitions,
+                qname(BPMNDI_NS, "BPMNDiagram"),
+                {"id": self._free_id("BPMNDiagram_1")},
+            )
+            participant = self._participant()
+            plane = ET.SubElement(
+                diagram,
+                qname(BPMNDI_NS, "BPMNPlane"),
+                {
+                    "id": self._free_id("BPMNPlane_1"),
+                    "bpmnElement": (
+                        self._collaboration().get("id", "")
+                        if participant is not None
+                        else process.get("id", "")
+                    ),
+                },
+            )
+        self.plane = plane
+
+    def _free_id(self, base: str) -> str:
+        id_, suffix = base, 1
+        while id_ in self.ids:
+            suffix += 1
+            id_ = f"{base}_{suffix}"
+        self.ids.add(id_)
+        return id_
+
+    def _collaboration(self) -> ET.Element:
+        collaboration = self.definitions.find(qname(MODEL_NS, "collaboration"))
+        if collaboration is None:
+            collaboration = ET.Element(
+                qname(MODEL_NS, "collaboration"),
+                {"id": self._free_id(COLLABORATION_ID)},
+            )
+            index = list(self.definitions).index(self.process)
+            self.definitions.insert(index, collaboration)
+        return collaboration
+
+    def _participant(self) -> Optional[ET.Element]:
+        for participant in self.definitions.iter(qname(MODEL_NS, "participant")):
+            if participant.get("processRef") == self.process.get("id"):
+                return participant
+        return None
+
+    def _element(self, id_: str) -> ET.Element:
+        for element in self.process.iter():
+            if element.get("id") == id_:
+                return element
+        raise PatchError(f"Element {id_!r} does not exist")
+
+    def _parent(self, child: ET.Element) -> ET.Element:
+        for parent in self.process.iter():
+            if child in list(parent):
+                return parent
+        raise PatchError(f"Element {child.get('id')!r} is not in the process")
+
+    def _node(self, id_: str) -> GraphNode:
+        for node in self.graph["nodes"]:
+            if node["id"] == id_:
+                return node
+        raise PatchError(f"Node {id_!r} does not exist")
+
+    def _flow(self, id_: str) -> GraphFlow:
+        for flow in self.graph["flows"]:
+            if flow["id"] == id_:
+                return flow
+        raise PatchError(f"Flow {id_!r} does not exist")
+
+    def _new_id(self, id_: str) -> str:
+        if not id_ or id_ in self.ids:
+            raise PatchError(f"Id {id_!r} is empty or already used")
+        self.ids.add(id_)
+        return id_
+
+    def _insert_ref(self, node_id: str, kind: str, flow_id: str) -> None:
+        element = self._element(node_id)
+        names = [local_name(child.tag)[1] for child in element]
+        order = ("documentation", "extensionElements", "incoming", "outgoing")
+        preceding = order[: order.index(kind) + 1]
+        index = 0
+        for i, name in enumerate(names):
+            if name in preceding:
+                index = i + 1
+        ref = ET.Element(qname(MODEL_NS, kind))
+        ref.text = flow_id
+        element.insert(index, ref)
+
+    def _remove_ref(self, node_id: str, kind: str, flow_id: str) -> None:
+        element = self._element(node_id)
+        for ref in element.findall(qname(MODEL_NS, kind)):
+            if (ref.text or "").strip() == flow_id:
+                element.remove(ref)
+
+    def _remove_di(self, element_id: str) -> None:
+        for di in list(self.plane):
+            if di.get("bpmnElement") == element_id:
+                self.plane.remove(di)
+
+    def add_node(self, operation: PatchOperation) -> None:
+        if operation["type"] not in NODE_TYPES:
+            raise PatchError(f"Unknown node type {operation['type']!r}")
+        id_ = self._new_id(operation["id"])
+        element = ET.Element(qname(MODEL_NS, operation["type"]), {"id": id_})
+        if operation["name"]:
+            element.set("name", operation["name"])
+        flows = self.process.findall(qname(MODEL_NS, "sequenceFlow"))
+        index = list(self.process).index(flows[0]) if flows else len(self.process)
+        self.process.insert(index, element)
+
+        lane_id = ""
+        if self.graph["lanes"]:
+            lane_ids = [lane["id"] for lane in self.graph["lanes"]]
+            lane_id = (
+                operation["lane"] if operation["lane"] in lane_ids else lane_ids[0]
+            )
+            ref = ET.SubElement(self._element(lane_id), qname(MODEL_NS, "flowNodeRef"))
+            ref.text = id_
+        self.graph["nodes"].append(
+            GraphNode(
+                id=id_, type=operation["type"], name=operation["name"], lane=lane_id
+            )
+        )
+
+    def add_flow(self, operation: PatchOperation) -> None:
+        source, target = operation["source"], operation["target"]
+        self._node(source)
+        self._node(target)
+        id_ = self._new_id(operation["id"])
+        element = ET.SubElement(
+            self.process,
+            qname(MODEL_NS, "sequenceFlow"),
+            {"id": id_, "sourceRef": source, "targetRef": target},
+        )
+        if operation["name"]:
+            element.set("name", operation["name"])
+        self._insert_ref(source, "outgoing", id_)
+        self._insert_ref(target, "incoming", id_)
+        self.graph["flows"].append(
+            GraphFlow(id=id_, source=source, target=target, name=operation["name"])
+        )
+
+    def _remove_flow(self, flow: GraphFlow) -> None:
+        element = self._element(flow["id"])
+        self._parent(element).remove(element)
+        self._remove_ref(flow["source"], "outgoing", flow["id"])
+        self._remove_ref(flow["target"], "incoming", flow["id"])
+        self._remove_di(flow["id"])
+        self.graph["flows"].remove(flow)
+
+    def remove(self, operation: PatchOperation) -> None:
+        id_ = operation["id"]
+        if any(flow["id"] == id_ for flow in self.graph["flows"]):
+            self._remove_flow(self._flow(id_))
+            return
+        node = self._node(id_)
+        for flow in list(self.graph["flows"]):
+            if id_ in (flow["source"], flow["target"]):
+                self._remove_flow(flow)
+        element = self._element(id_)
+        self._parent(element).remove(element)
+        for lane in self.process.iter(qname(MODEL_NS, "lane")):
+            for ref in lane.findall(qname(MODEL_NS, "flowNodeRef")):
+                if (ref.text or "").strip() == id_:
+                    lane.remove(ref)
+        self._remove_di(id_)
+        self.graph["nodes"].remove(node)
+
+    def rename(self, operation: PatchOperation) -> None:
+        element = self._element(operation["id"])
+        if operation["name"]:
+            element.set("name", operation["name"])
+        else:
+            element.attrib.pop("name", None)
+        for item in [*self.graph["nodes"], *self.graph["flows"], *self.graph["lanes"]]:
+            if item["id"] == operation["id"]:
+                item["name"] = operation["name"]
+
+    def reconnect(self, operation: PatchOperation) -> None:
+        flow = self._flow(operation["id"])
+        element = self._element(flow["id"])
+        source = operation["source"] or flow["source"]
+        target = operation["target"] or flow["target"]
+        self._node(source)
+        self._node(target)
+        if source != flow["source"]:
+            self._remove_ref(flow["source"], "outgoing", flow["id"])
+            self._insert_ref(source, "outgoing", flow["id"])
+            element.set("sourceRef", source)
+        if target != flow["target"]:
+            self._remove_ref(flow["target"], "incoming", flow["id"])
+            self._insert_ref(target, "incoming", flow["id"])
+            element.set("targetRef", target)
+        flow["source"], flow["target"] = source, target
+
+    def change_type(self, operation: PatchOperation) -> None:
+        if operation["type"] not in NODE_TYPES:
+            raise PatchError(f"Unknown node type {operation['type']!r}")
+        node = self._node(operation["id"])
+        element = self._element(node["id"])
+        element.tag = qname(MODEL_NS, operation["type"])
+        for child in list(element):
+            if local_name(child.tag)[1] not in KEPT_ON_TYPE_CHANGE:
+                element.remove(child)
+        node["type"] = operation["type"]
+        self.retyped.add(node["id"])
+
+    def _lane_refs(self) -> list[tuple[ET.Element, ET.Element]]:
+        return [
+            (lane, ref)
+            for lane in self.process.iter(qname(MODEL_NS, "lane"))
+            for ref in lane.findall(qname(MODEL_NS, "flowNodeRef"))
+        ]
+
+    def add_lane(self, lane: GraphLane) -> None:
+        lane_set = self.process.find(qname(MODEL_NS, "laneSet"))
+        if lane_set is None:
+            lane_set = ET.Element(
+                qname(MODEL_NS, "laneSet"), {"id": self._free_id("LaneSet_1")}
+            )
+            names = [local_name(child.tag)[1] for child in self.process]
+            preceding = ("documentation", "extensionElements")
+            index = sum(1 for name in names if name in preceding)
+            self.process.insert(index, lane_set)
+            if self._participant() is None:
+                # Lanes are drawn inside a pool, which needs a participant
+                participant = ET.SubElement(
+                    self._collaboration(),
+                    qname(MODEL_NS, "participant"),
+                    {
+                        "id": self._free_id(PARTICIPANT_ID),
+                        "processRef": self.process.get("id", ""),
+                    },
+                )
+                if self.graph["name"]:
+                    participant.set("name", self.graph["name"])
+                if self.plane.get("bpmnElement") == self.process.get("id"):
+                    self.plane.set("bpmnElement", self._collaboration().get("id", ""))
+        element = ET.SubElement(
+            lane_set, qname(MODEL_NS, "lane"), {"id": self._new_id(lane["id"])}
+        )
+        if lane["name"]:
+            element.set("name", lane["name"])
+        self.graph["lanes"].append(GraphLane(id=lane["id"], name=lane["name"]))
+        if len(self.graph["lanes"]) == 1:
+            for node in self.graph["nodes"]:
+                self.move_to_lane(node["id"], lane["id"])
+
+    def move_to_lane(self, node_id: str, lane_id: str) -> None:
+        for lane, ref in self._lane_refs():
+            if (ref.text or "").strip() == node_id:
+                lane.remove(ref)
+        ref = ET.SubElement(self._element(lane_id), qname(MODEL_NS, "flowNodeRef"))
+        ref.text = node_id
+        self._node(node_id)["lane"] = lane_id
+
+    def remove_lane(self, lane_id: str) -> None:
+        element = self._element(lane_id)
+        lane_set = self._parent(element)
+        lane_set.remove(element)
+        if not len(lane_set):
+            self._parent(lane_set).remove(lane_set)
+        self._remove_di(lane_id)
+        self.graph["lanes"] = [
+            lane for lane in self.graph["lanes"] if lane["id"] != lane_id
+        ]
+
+    def relayout(self) -> None:
+        graph = validate_graph(self.graph)
+        previous = Layout(
+            shapes=dict(self.layout.shapes),
+            edges=dict(self.layout.edges),
+            lanes=dict(self.layout.lanes),
+            pool=self.layout.pool,
+        )
+        for id_ in self.retyped:
+            if id_ in previous.shapes:
+                (cx, cy), (width, height) = (
+                    previous.shapes[id_].center,
+                    node_size(self._node(id_)["type"]),
+                )
+                previous.shapes[id_] = Bounds(
+                    cx - width / 2, cy - height / 2, width, height
+                )
+        for flow in graph["flows"]:
+            if flow["source"] in self.retyped or flow["target"] in self.retyped:
+                previous.edges.pop(flow["id"], None)
+
+        layout = merge_layout(graph, self.previous_graph, previous)
+        old = {**self.layout.shapes, **self.layout.lanes}
+        for id_, bounds in [*layout.shapes.items(), *layout.lanes.items()]:
+            if bounds != old.get(id_):
+                self._write_shape(id_, bounds)
+        if layout.pool is not None and layout.pool != self.layout.pool:
+            participant = self._participant()
+            if participant is not None:
+                self._write_shape(participant.get("id", ""), layout.pool)
+        for id_, waypoints in layout.edges.items():
+            if waypoints != self.layout.edges.get(id_):
+                self._write_edge(id_, waypoints)
+
+    def _di(self, tag: str, element_id: str) -> Optional[ET.Element]:
+        for di in self.plane.findall(qname(BPMNDI_NS, tag)):
+            if di.get("bpmnElement") == element_id:
+                return di
+        return None
+
+    def _write_shape(self, element_id: str, bounds: Bounds) -> None:
+        shape = self._di("BPMNShape", element_id)
+        if shape is None:
+            shape = ET.SubElement(
+                self.plane,
+                qname(BPMNDI_NS, "BPMNShape"),
+                {"id": f"{element_id}_di", "bpmnElement": element_id},
+            )
+        for child in list(shape):
+            shape.remove(child)
+        ET.SubElement(shape, qname(DC_NS, "Bounds"), _bounds_attributes(bounds))
+
+    def _write_edge(self, element_id: str, waypoints: list[Point]) -> None:
+        edge = self._di("BPMNEdge", element_id)
+        if edge is None:
+            edge = ET.SubElement(
+                self.plane,
+                qname(BPMNDI_NS, "BPMNEdge"),
+                {"id": f"{element_id}_di", "bpmnElement": element_id},
+            )
+        for child in list(edge):
+            edge.remove(child)
+        for x, y in waypoints:
+            ET.SubElement(
+                edge, qname(DI_NS, "waypoint"), {"x": f"{x:g}", "y": f"{y:g}"}
+            )
+
+
+def _document_prefixes(bpmn_xml: str) -> dict[str, str]:
+    events = ET.iterparse(io.BytesIO(bpmn_xml.encode("utf-8")), events=("start-ns",))
+    prefixes: dict[str, str] = {}
+    for _, (prefix, uri) in events:
+        if prefix and uri not in prefixes and prefix not in prefixes.values():
+            prefixes[uri] = prefix
+    return prefixes
+
+
+def _free_prefix(prefix: str, taken: set[str]) -> str:
+    counter = 0
+    while not prefix or prefix in taken:
+        prefix, counter = f"ns{counter}", counter + 1
+    return prefix
+
+
+def _parse(bpmn_xml: str) -> tuple[ET.Element, dict[str, str]]:
+    parser = ET.XMLParser(target=ET.TreeBuilder(insert_comments=True))
+    try:
+        definitions = ET.fromstring(bpmn_xml, parser=parser)
+        prefixes = _document_prefixes(bpmn_xml)
+    except ET.ParseError as e:
+        raise PatchError(f"Malformed BPMN XML: {e}") from e
+    return definitions, prefixes
+
+
+def _serialize(definitions: ET.Element, prefixes: dict[str, str]) -> str:
+    """
+    Serializes a document with the namespace prefixes of the original.
+
+    ElementTree takes the prefixes from its process-wide registry, so the
+    document is written here instead. All namespaces are declared on the
+    root element: those of the original document under its prefixes (values
+    such as `xsi:type="bpmn2:tFormalExpression"` refer to them), the others
+    under the prefixes of bpmn-js or generated ones.
+
+    :param definitions: Root element of the document.
+    :param prefixes: Prefixes of the original document by namespace URI.
+    :return: BPMN XML document.
+    """
+    ET.indent(definitions, space="  ")
+    prefixes = dict(prefixes)
+    for element in definitions.iter():
+        if not isinstance(element.tag, str):
+            continue
+        for key in (element.tag, *element.attrib):
+            namespace, _ = local_name(key)
+            if namespace and namespace != XML_NS and namespace not in prefixes:
+                prefixes[namespace] = _free_prefix(
+                    PREFIXES.get(namespace, ""), set(prefixes.values())
+                )
+
+    def name(key: str) -> str:
+        namespace, local = local_name(key)
+        if not namespace:
+            return local
+        return f"{'xml' if namespace == XML_NS else prefixes[namespace]}:{local}"
+
+    def attribute(key: str, value: str) -> str:
+        return f' {key}="{escape(value, ATTRIBUTE_ENTITIES)}"'
+
+    out: list[str] = [XML_DECLARATION]
+
+    def write(element: ET.Element, declarations: str = "") -> None:
+        tag: Any = element.tag
+        if tag is ET.Comment:
+            out.append(f"<!--{element.text or ''}-->")
+        elif tag is ET.ProcessingInstruction:
+            out.append(f"<?{element.text or ''}?>")
+        else:
+            out.append(f"<{name(tag)}{declarations}")
+            out.extend(attribute(name(k), v) for k, v in element.attrib.items())
+            if element.text or len(element):
+                out.append(">" + escape(element.text or ""))
+                for child in element:
+                    write(child)
+                out.append(f"</{name(tag)}>")
+            else:
+                out.append(" />")
+        out.append(escape(element.tail or ""))
+
+    write(
+        definitions,
+        "".join(attribute(f"xmlns:{p}", uri) for uri, p in prefixes.items()),
+    )
+    return "".join(out)
+
+
+def apply_patch(bpmn_xml: str, patch: BpmnPatch) -> str:
+    """
+    Applies a patch to a BPMN XML document.
+
+    :param bpmn_xml: BPMN XML document with a process and a BPMNPlane.
+    :param patch: Operations to apply, in order.
+    :return: The patched BPMN XML document.
+    :raises PatchError: If the document cannot be patched or an operation
+        refers to a missing element, reuses an id or has an unknown type.
+    :raises GraphError: If the patched process is inconsistent.
+    """
+    definitions, prefixes = _parse(bpmn_xml)
+    patcher = _Patcher(definitions)
+    for operation in patch["operations"]:
+        if operation["op"] not in PATCH_OPERATIONS:
+            raise PatchError(f"Unknown operation {operation['op']!r}")
+        getattr(patcher, operation["op"])(operation)
+    patcher.relayout()
+    return _serialize(definitions, prefixes)
+
+
+def _operation(op: str, id_: str, **fields: str) -> PatchOperation:
+    operation = PatchOperation(
+        op=op, id=id_, type="", name="", lane="", source="", target=""
+    )
+    operation.update(fields)  # type: ignore[typeddict-item]
+    return operation
+
+
+def apply_graph(bpmn_xml: str, graph: ProcessGraph) -> str:
+    """
+    Applies an edited process graph to a BPMN XML document.
+
+    The graph is compared with the graph read from the document, and the
+    differences are applied as patch operations. Elements the graph does not
+    represent (event definitions, boundary attachments, subprocess contents,
+    conditions, documentation, other processes and so on) are kept unless
+    their node is removed.
+
+    :param bpmn_xml: BPMN XML document with a process.
+    :param graph: Validated edited graph of the process.
+    :return: The edited BPMN XML document.
+    :raises PatchError: If the document cannot be edited or the graph reuses
+        an id of an element it does not represent.
+    :raises GraphError: If the edited process is inconsistent.
+    """
+    definitions, prefixes = _parse(bpmn_xml)
+    patcher = _Patcher(definitions)
+    previous = copy.deepcopy(patcher.graph)
+    old_nodes = {node["id"]: node for node in previous["nodes"]}
+    old_flows = {flow["id"]: flow for flow in previous["flows"]}
+    old_lanes = {lane["id"]: lane for lane in previous["lanes"]}
+    new_nodes = {node["id"]: node for node in graph["nodes"]}
+    new_flows = {flow["id"]: flow for flow in graph["flows"]}
+    new_lanes = {lane["id"]: lane for lane in graph["lanes"]}
+
+    for lane in graph["lanes"]:
+        if lane["id"] not in old_lanes:
+            patcher.add_lane(lane)
+        elif lane["name"] != old_lanes[lane["id"]]["name"]:
+            patcher.rename(_operation("rename", lane["id"], name=lane["name"]))
+    for flow_id in old_flows.keys() - new_flows.keys():
+        patcher.remove(_operation("remove", flow_id))
+    for node_id in old_nodes.keys() - new_nodes.keys():
+        patcher.remove(_operation("remove", node_id))
+
+    for node in graph["nodes"]:
+        old = old_nodes.get(node["id"])
+        if old is None:
+            patcher.add_node(
+                _operation(
+                    "add_node",
+                    node["id"],
+                    type=node["type"],
+                    name=node["name"],
+                    lane=node["lane"],
+                )
+            )
+            continue
+        if node["type"] != old["type"]:
+            patcher.change_type(
+                _operation("change_type", node["id"], type=node["type"])
+            )
+        if node["name"] != old["name"]:
+            patcher.rename(_operation("rename", node["id"], name=node["name"]))
+        if node["lane"] and node["lane"] != patcher._node(node["id"])["lane"]:
+            patcher.move_to_lane(node["id"], node["lane"])
+
+    for flow in graph["flows"]:
+        old_flow = old_flows.get(flow["id"])
+        if old_flow is None:
+            patcher.add_flow(
+                _operation(
+                    "add_flow",
+                    flow["id"],
+                    name=flow["name"],
+                    source=flow["source"],
+                    target=flow["target"],
+                )
+            )
+            continue
+        if (flow["source"], flow["target"]) != (old_flow["source"], old_flow["target"]):
+            patcher.reconnect(
+                _operation(
+                    "reconnect",
+                    flow["id"],
+                    source=flow["source"],
+                    target=flow["target"],
+                )
+            )
+        if flow["name"] != old_flow["name"]:
+            patcher.rename(_operation("rename", flow["id"], name=flow["name"]))
+
+    for lane_id in old_lanes.keys() - new_lanes.keys():
+        patcher.remove_lane(lane_id)
+    if graph["name"] and graph["name"] != previous["name"]:
+        patcher.rename(
+            _operation("rename", patcher.process.get("id", ""), name=graph["name"])
+        )
+        participant = patcher._participant()
+        if participant is not None and participant.get("name"):
+            participant.set("name", graph["name"])
+        patcher.graph["name"] = graph["name"]
+    patcher.relayout()
+    return _serialize(definitions, prefixes)
@@ -0,0 +1,275 @@
+"""
+Serialization of process graphs to BPMN 2.0 XML and back.
+
+The document has the structure bpmn-js exports: a process with its flow
+nodes and sequence flows, a collaboration with a single participant when the
+process has lanes, and the `bpmndi` section computed by the layout engine.
+
+Reading a document back is lossy: only the first process is read, event
+definitions, data objects and annotations are dropped, and flow node types
+outside the graph vocabulary are approximated (e.g. a `boundaryEvent`
+becomes an `intermediateCatchEvent`).
+
+Functions:
+    graph_to_xml: Serializes a process graph with its layout.
+    diagram_from_tree: Reads the process graph and the layout of a parsed
+        document.
+    diagram_from_xml: Reads the process graph and the layout of a document.
+"""
+
+import xml.etree.ElementTree as ET
+from typing import Optional
+
+from logic.bpmn.graph import (NODE_TYPES, GraphError, GraphFlow, GraphLane,
+                              GraphNode, ProcessGraph)
+from logic.bpmn.layout import Bounds, Layout, layout_graph
+from logic.bpmn.namespaces import (BPMNDI_NS, DC_NS, DI_NS, MODEL_NS,
+                                   local_name, qname)
+
+XML_DECLARATION = '<?xml version="1.0" encoding="UTF-8"?>\n'
+TARGET_NAMESPACE = "http://bpmn.io/schema/bpmn"
+
+PROCESS_ID = "Process_1"
+COLLABORATION_ID = "Collaboration_1"
+PARTICIPANT_ID = "Participant_1"
+
+
+def _model(parent: ET.Element, tag: str, **attributes: str) -> ET.Element:
+    return ET.SubElement(parent, qname(MODEL_NS, tag), attributes)
+
+
+def _shape(
+    plane: ET.Element, element: str, bounds: Bounds, **attributes: str
+) -> ET.Element:
+    shape = ET.SubElement(
+        plane,
+        qname(BPMNDI_NS, "BPMNShape"),
+        {"id": f"{element}_di", "bpmnElement": element, **attributes},
+    )
+    ET.SubElement(
+        shape,
+        qname(DC_NS, "Bounds"),
+        {
+            "x": f"{bounds.x:g}",
+            "y": f"{bounds.y:g}",
+            "width": f"{bounds.width:g}",
+            "height": f"{bounds.height:g}",
+        },
+    )
+    return shape
+
+
+def _process(definitions: ET.Element, graph: ProcessGraph) -> None:
+    process = _model(definitions, "process", id=PROCESS_ID, isExecutable="false")
+    if graph["name"]:
+        process.set("name", graph["name"])
+    if graph["lanes"]:
+        lane_set = _model(process, "laneSet", id="LaneSet_1")
+        for lane in graph["lanes"]:
+            element = _model(lane_set, "lane", id=lane["id"], name=lane["name"])
+            for node in graph["nodes"]:
+                if node["lane"] == lane["id"]:
+                    _model(element, "flowNodeRef").text = node["id"]
+
+    for node in graph["nodes"]:
+        element = _model(process, node["type"], id=node["id"])
+        if node["name"]:
+            element.set("name", node["name"])
+        for flow in graph["flows"]:
+            if flow["target"] == node["id"]:
+                _model(element, "incoming").text = flow["id"]
+        for flow in graph["flows"]:
+            if flow["source"] == node["id"]:
+                _model(element, "outgoing").text = flow["id"]
+    for flow in graph["flows"]:
+        element = _model(
+            process,
+            "sequenceFlow",
+            id=flow["id"],
+            sourceRef=flow["source"],
+            targetRef=flow["target"],
+        )
+        if flow["name"]:
+            element.set("name", flow["name"])
+
+
+def _diagram(definitions: ET.Element, graph: ProcessGraph, layout: Layout) -> None:
+    diagram = ET.SubElement(
+        definitions, qname(BPMNDI_NS, "BPMNDiagram"), {"id": "BPMNDiagram_1"}
+    )
+    plane = ET.SubElement(
+        diagram,
+        qname(BPMNDI_NS, "BPMNPlane"),
+        {
+            "id": "BPMNPlane_1",
+            "bpmnElement": COLLABORATION_ID if layout.pool else PROCESS_ID,
+        },
+    )
+    if layout.pool:
+        _shape(plane, PARTICIPANT_ID, layout.pool, isHorizontal="true")
+        for lane_id, bounds in layout.lanes.items():
+            _shape(plane, lane_id, bounds, isHorizontal="true")
+    for node in graph["nodes"]:
+        attributes: dict[str, str] = {}
+        if node["type"] == "exclusiveGateway":
+            attributes["isMarkerVisible"] = "true"
+        _shape(plane, node["id"], layout.shapes[node["id"]], **attributes)
+    for flow in graph["flows"]:
+        edge = ET.SubElement(
+            plane,
+            qname(BPMNDI_NS, "BPMNEdge"),
+            {"id": f"{flow['id']}_di", "bpmnElement": flow["id"]},
+        )
+        for x, y in layout.edges[flow["id"]]:
+            ET.SubElement(
+                edge, qname(DI_NS, "waypoint"), {"x": f"{x:g}", "y": f"{y:g}"}
+            )
+
+
+def graph_to_xml(graph: ProcessGraph, layout: Optional[Layout] = None) -> str:
+    """
+    Serializes a process graph to a BPMN 2.0 XML document.
+
+    :param graph: Validated process graph.
+    :param layout: Layout of the graph, computed by `layout_graph` if omitted.
+    :return: BPMN XML document with the `bpmndi` section.
+    """
+    if layout is None:
+        layout = layout_graph(graph)
+    definitions = ET.Element(
+        qname(MODEL_NS, "definitions"),
+        {"id": "Definitions_1", "targetNamespace": TARGET_NAMESPACE},
+    )
+    if layout.pool:
+        collaboration = _model(definitions, "collaboration", id=COLLABORATION_ID)
+        participant = _model(
+            collaboration, "participant", id=PARTICIPANT_ID, processRef=PROCESS_ID
+        )
+        if graph["name"]:
+            participant.set("name", graph["name"])
+    _process(definitions, graph)
+    _diagram(definitions, graph, layout)
+    ET.indent(definitions, space="  ")
+    return XML_DECLARATION + ET.tostring(definitions, encoding="unicode")
+
+
+def _node_type(tag: str) -> Optional[str]:
+    namespace, name = local_name(tag)
+    if namespace != MODEL_NS:
+        return None
+    if name in NODE_TYPES:
+        return name
+    if name.endswith("Task"):
+        return "task"
+    if name.endswith("Gateway"):
+        return "exclusiveGateway"
+    if name.endswith("Event"):
+        return "intermediateCatchEvent"
+    if name in ("transaction", "adHocSubProcess"):
+        return "subProcess"
+    return None
+
+
+def _read_graph(definitions: ET.Element) -> ProcessGraph:
+    process = definitions.find(qname(MODEL_NS, "process"))
+    if process is None:
+        raise GraphError("Document has no process")
+    participant = definitions.find(
+        f"{qname(MODEL_NS, 'collaboration')}/{qname(MODEL_NS, 'participant')}"
+    )
+    name = process.get("name", "")
+    if not name and participant is not None:
+        name = participant.get("name", "")
+
+    lanes: list[GraphLane] = []
+    lane_of: dict[str, str] = {}
+    for lane in process.iter(qname(MODEL_NS, "lane")):
+        lanes.append(GraphLane(id=lane.get("id", ""), name=lane.get("name", "")))
+        for ref in lane.findall(qname(MODEL_NS, "flowNodeRef")):
+            lane_of[(ref.text or "").strip()] = lane.get("id", "")
+
+    nodes: list[GraphNode] = []
+    flows: list[GraphFlow] = []
+    for element in process:
+        id_ = element.get("id")
+        node_type = _node_type(element.tag)
+        if id_ and node_type:
+            nodes.append(
+                GraphNode(
+                    id=id_,
+                    type=node_type,
+                    name=element.get("name", ""),
+                    lane=lane_of.get(id_, ""),
+                )
+            )
+    node_ids = {node["id"] for node in nodes}
+    for element in process.findall(qname(MODEL_NS, "sequenceFlow")):
+        source, target = element.get("sourceRef"), element.get("targetRef")
+        if element.get("id") and source in node_ids and target in node_ids:
+            flows.append(
+                GraphFlow(
+                    id=element.get("id", ""),
+                    source=source or "",
+                    target=target or "",
+                    name=element.get("name", ""),
+                )
+            )
+    return ProcessGraph(name=name, lanes=lanes, nodes=nodes, flows=flows)
+
+
+def _read_layout(definitions: ET.Element, graph: ProcessGraph) -> Layout:
+    lane_ids = {lane["id"] for lane in graph["lanes"]}
+    participant_ids = {
+        participant.get("id")
+        for participant in definitions.iter(qname(MODEL_NS, "participant"))
+    }
+    layout = Layout()
+    for shape in definitions.iter(qname(BPMNDI_NS, "BPMNShape")):
+        bounds = shape.find(qname(DC_NS, "Bounds"))
+        element = shape.get("bpmnElement")
+        if bounds is None or not element:
+            continue
+        rectangle = Bounds(
+            *(float(bounds.get(attr, 0)) for attr in ("x", "y", "width", "height"))
+        )
+        if element in lane_ids:
+            layout.lanes[element] = rectangle
+        elif element in participant_ids:
+            layout.pool = rectangle
+        else:
+            layout.shapes[element] = rectangle
+    for edge in definitions.iter(qname(BPMNDI_NS, "BPMNEdge")):
+        element = edge.get("bpmnElement")
+        if element:
+            layout.edges[element] = [
+                (float(point.get("x", 0)), float(point.get("y", 0)))
+                for point in edge.findall(qname(DI_NS, "waypoint"))
+            ]
+    return layout
+
+
+def diagram_from_tree(definitions: ET.Element) -> tuple[ProcessGraph, Layout]:
+    """
+    Reads the process graph and the layout of a parsed BPMN document.
+
+    :param definitions: Root `definitions` element of the document.
+    :return: The process graph and the layout of its shapes and edges.
+    :raises GraphError: If the document has no process.
+    """
+    graph = _read_graph(definitions)
+    return graph, _read_layout(definitions, graph)
+
+
+def diagram_from_xml(bpmn_xml: str) -> tuple[ProcessGraph, Layout]:
+    """
+    Reads the process graph and the layout of a BPMN XML document.
+
+    :param bpmn_xml: BPMN XML document.
+    :return: The process graph and the layout of its shapes and edges.
+    :raises GraphError: If the document is malformed or has no process.
+    """
+    try:
+        definitions = ET.fromstring(bpmn_xml)
+    except ET.ParseError as e:
+        raise GraphError(f"Malformed BPMN XML: {e}") from e
+    return diagram_from_tree(definitions)
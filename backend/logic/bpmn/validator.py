@@ -0,0 +1,345 @@
+"""
+Deterministic structural validation of BPMN diagrams.
+
+The validator finds the structural problems that do not need a language model:
+malformed XML, duplicate ids, dangling `sourceRef`/`targetRef`, missing
+`BPMNDiagram`/`BPMNPlane`, shapes without bounds, unconnected gateways and
+similar. The document is read with a streaming parser in a single pass, and
+the findings are returned as the same `Suggestion` objects the LLM produces.
+
+Functions:
+    validate_bpmn: Returns structural suggestions for a BPMN XML document.
+"""
+
+import io
+import xml.etree.ElementTree as ET
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Optional
+
+from logic.bpmn.namespaces import BPMNDI_NS, DC_NS, DI_NS, local_name
+from logic.services.base import Suggestion
+
+ACTIVITY_TAGS = frozenset(
+    {"subProcess", "callActivity", "transaction", "adHocSubProcess"}
+)
+
+
+def _is_flow_node(name: str) -> bool:
+    return (
+        name == "task"
+        or name in ACTIVITY_TAGS
+        or (name.endswith(("Task", "Event", "Gateway")))
+    )
+
+
+@dataclass
+class _Shape:
+    element: Optional[str]
+    has_bounds: bool = False
+    width: float = 0
+    height: float = 0
+
+
+@dataclass
+class _Scan:
+    ids: Counter[str] = field(default_factory=Counter)
+    model_ids: set[str] = field(default_factory=set)
+    nodes: dict[str, str] = field(default_factory=dict)
+    flows: dict[str, tuple[Optional[str], Optional[str]]] = field(default_factory=dict)
+    message_flows: dict[str, tuple[Optional[str], Optional[str]]] = field(
+        default_factory=dict
+    )
+    processes: int = 0
+    diagrams: int = 0
+    planes: int = 0
+    shapes: list[_Shape] = field(default_factory=list)
+    edges: dict[Optional[str], int] = field(default_factory=dict)
+
+
+def _scan(bpmn_xml: str) -> _Scan:
+    scan = _Scan()
+    shape: Optional[_Shape] = None
+    edge: Optional[str] = None
+    label_depth = 0
+    events = ET.iterparse(io.BytesIO(bpmn_xml.encode("utf-8")), ("start", "end"))
+    for event, element in events:
+        ns, name = local_name(element.tag)
+        if event == "end":
+            if ns == BPMNDI_NS and name == "BPMNShape" and shape is not None:
+                scan.shapes.append(shape)
+                shape = None
+            elif ns == BPMNDI_NS and name == "BPMNEdge":
+                edge = None
+            elif ns == BPMNDI_NS and name == "BPMNLabel":
+                label_depth -= 1
+            element.clear()
+            continue
+
+        id_ = element.get("id")
+        if id_:
+            scan.ids[id_] += 1
+        if ns == BPMNDI_NS:
+            if name == "BPMNDiagram":
+                scan.diagrams += 1
+            elif name == "BPMNPlane":
+                scan.planes += 1
+            elif name == "BPMNShape":
+                shape = _Shape(element.get("bpmnElement"))
+            elif name == "BPMNEdge":
+                edge = element.get("bpmnElement")
+                scan.edges[edge] = 0
+            elif name == "BPMNLabel":
+                label_depth += 1
+            continue
+        if ns == DC_NS and name == "Bounds":
+            if shape is not None and label_depth == 0:
+                shape.has_bounds = True
+                shape.width = float(element.get("width") or 0)
+                shape.height = float(element.get("height") or 0)
+            continue
+        if ns == DI_NS and name == "waypoint":
+            if edge in scan.edges:
+                scan.edges[edge] += 1
+            continue
+
+        if id_:
+            scan.model_ids.add(id_)
+        if name == "process":
+            scan.processes += 1
+        elif name == "sequenceFlow" and id_:
+            scan.flows[id_] = (element.get("sourceRef"), element.get("targetRef"))
+        elif name == "messageFlow" and id_:
+            scan.message_flows[id_] = (
+                element.get("sourceRef"),
+                element.get("targetRef"),
+            )
+        elif _is_flow_node(name) and id_:
+            scan.nodes[id_] = name
+    return scan
+
+
+def _check_ids(scan: _Scan) -> list[Suggestion]:
+    return [
+        Suggestion(
+            error=f"Повторяющийся id {id_} (встречается {count} раз)",
+            correction=f"Сделать id уникальными, например {id_}_2",
+        )
+        for id_, count in scan.ids.items()
+        if count > 1
+    ]
+
+
+def _check_process(scan: _Scan) -> list[Suggestion]:
+    suggestions: list[Suggestion] = []
+    if not scan.processes:
+        suggestions.append(
+            Suggestion(
+                error="Отсутствует элемент <process>",
+                correction="Добавить <process> с элементами процесса",
+            )
+        )
+    kinds = set(scan.nodes.values())
+    if "startEvent" not in kinds:
+        suggestions.append(
+            Suggestion(
+                error="Отсутствует стартовое событие <startEvent>",
+                correction="Добавить startEvent в начало процесса",
+            )
+        )
+    if "endEvent" not in kinds:
+        suggestions.append(
+            Suggestion(
+                error="Отсутствует конечное событие <endEvent>",
+                correction="Добавить endEvent в конец процесса",
+            )
+        )
+    return suggestions
+
+
+def _check_flows(scan: _Scan) -> list[Suggestion]:
+    suggestions: list[Suggestion] = []
+    incoming: Counter[str] = Counter()
+    outgoing: Counter[str] = Counter()
+    messages: Counter[str] = Counter()
+    for flow_id, (source, target) in [*scan.flows.items(), *scan.message_flows.items()]:
+        for attr, ref in (("sourceRef", source), ("targetRef", target)):
+            if not ref:
+                suggestions.append(
+                    Suggestion(
+                        error=f"У потока {flow_id} не указан {attr}",
+                        correction=f"Указать в {attr} id существующего элемента",
+                    )
+                )
+            elif ref not in scan.model_ids:
+                suggestions.append(
+                    Suggestion(
+                        error=(
+                            f"Поток {flow_id} ссылается в {attr} "
+                            f"на несуществующий элемент {ref}"
+                        ),
+                        correction=(
+                            f"Исправить {attr} на id существующего элемента "
+                            f"или удалить поток {flow_id}"
+                        ),
+                    )
+                )
+        if flow_id in scan.message_flows:
+            # Message flows connect participants, not the sequence of a process
+            messages.update(ref for ref in (source, target) if ref)
+            continue
+        if source:
+            outgoing[source] += 1
+        if target:
+            incoming[target] += 1
+
+    for node_id, kind in scan.nodes.items():
+        if kind == "startEvent":
+            if incoming[node_id]:
+                suggestions.append(
+                    Suggestion(
+                        error=f"Стартовое событие {node_id} имеет входящий поток",
+                        correction="Удалить входящие потоки стартового события",
+                    )
+                )
+            if not outgoing[node_id]:
+                suggestions.append(
+                    Suggestion(
+                        error=f"Стартовое событие {node_id} не имеет исходящих потоков",
+                        correction=f"Соединить {node_id} со следующим шагом процесса",
+                    )
+                )
+        elif kind == "endEvent":
+            if outgoing[node_id]:
+                suggestions.append(
+                    Suggestion(
+                        error=f"Конечное событие {node_id} имеет исходящий поток",
+                        correction="Удалить исходящие потоки конечного события",
+                    )
+                )
+            if not incoming[node_id]:
+                suggestions.append(
+                    Suggestion(
+                        error=f"Конечное событие {node_id} не имеет входящих потоков",
+                        correction=f"Соединить последний шаг процесса с {node_id}",
+                    )
+                )
+        elif kind.endswith("Gateway") and not (incoming[node_id] and outgoing[node_id]):
+            missing = "входящих" if not incoming[node_id] else "исходящих"
+            suggestions.append(
+                Suggestion(
+                    error=f"Шлюз {node_id} не имеет {missing} потоков",
+                    correction=f"Соединить шлюз {node_id} с элементами процесса",
+                )
+            )
+        elif kind != "boundaryEvent" and not (
+            incoming[node_id] or outgoing[node_id] or messages[node_id]
+        ):
+            suggestions.append(
+                Suggestion(
+                    error=f"Элемент {node_id} не связан ни с одним потоком",
+                    correction=f"Соединить {node_id} потоками или удалить его",
+                )
+            )
+    return suggestions
+
+
+def _check_diagram(scan: _Scan) -> list[Suggestion]:
+    if not scan.diagrams or not scan.planes:
+        missing = "<bpmndi:BPMNDiagram>" if not scan.diagrams else "<bpmndi:BPMNPlane>"
+        return [
+            Suggestion(
+                error=f"Отсутствует {missing}, диаграмма не отобразится в bpmn-js",
+                correction=(
+                    "Добавить <bpmndi:BPMNDiagram> с <bpmndi:BPMNPlane>, "
+                    "ссылающимся на процесс"
+                ),
+            )
+        ]
+
+    suggestions: list[Suggestion] = []
+    shaped: set[Optional[str]] = set()
+    for shape in scan.shapes:
+        shaped.add(shape.element)
+        if shape.element not in scan.model_ids:
+            suggestions.append(
+                Suggestion(
+                    error=(
+                        f"BPMNShape ссылается на несуществующий элемент {shape.element}"
+                    ),
+                    correction="Удалить BPMNShape или исправить bpmnElement",
+                )
+            )
+        elif not shape.has_bounds:
+            suggestions.append(
+                Suggestion(
+                    error=f"У фигуры элемента {shape.element} нет <dc:Bounds>",
+                    correction="Добавить <dc:Bounds> с координатами и размерами",
+                )
+            )
+        elif shape.width <= 0 or shape.height <= 0:
+            suggestions.append(
+                Suggestion(
+                    error=f"У фигуры элемента {shape.element} нулевой размер",
+                    correction="Задать положительные width и height в <dc:Bounds>",
+                )
+            )
+    for node_id in scan.nodes:
+        if node_id not in shaped:
+            suggestions.append(
+                Suggestion(
+                    error=f"Для элемента {node_id} нет <bpmndi:BPMNShape>",
+                    correction=f'Добавить BPMNShape с bpmnElement="{node_id}"',
+                )
+            )
+
+    for edge_element, waypoints in scan.edges.items():
+        if edge_element not in scan.model_ids:
+            suggestions.append(
+                Suggestion(
+                    error=(
+                        f"BPMNEdge ссылается на несуществующий элемент {edge_element}"
+                    ),
+                    correction="Удалить BPMNEdge или исправить bpmnElement",
+                )
+            )
+        elif waypoints < 2:
+            suggestions.append(
+                Suggestion(
+                    error=f"У линии потока {edge_element} меньше двух waypoint",
+                    correction="Добавить начальную и конечную точки <di:waypoint>",
+                )
+            )
+    for flow_id in scan.flows:
+        if flow_id not in scan.edges:
+            suggestions.append(
+                Suggestion(
+                    error=f"Для потока {flow_id} нет <bpmndi:BPMNEdge>",
+                    correction=f'Добавить BPMNEdge с bpmnElement="{flow_id}"',
+                )
+            )
+    return suggestions
+
+
+def validate_bpmn(bpmn_xml: str) -> list[Suggestion]:
+    """
+    Validates the structure of a BPMN XML document.
+
+    :param bpmn_xml: BPMN XML document.
+    :return: Structural suggestions; a single one if the XML is malformed.
+    """
+    try:
+        scan = _scan(bpmn_xml)
+    except ET.ParseError as e:
+        return [
+            Suggestion(
+                error=f"Некорректный XML: {e}",
+                correction="Закрыть все теги и экранировать спецсимволы в атрибутах",
+            )
+        ]
+    return [
+        *_check_ids(scan),
+        *_check_process(scan),
+        *_check_flows(scan),
+        *_check_diagram(scan),
+    ]
@@ -0,0 +1,34 @@
+"""
+Result caches of the business logic.
+
+Every cache is a separate `RedisLRUCache` subclass, so it can be registered
+and resolved from the DI container by its type.
+
+Classes:
+    BpmnCache: Cache of generated BPMN diagrams.
+    SuggestionsCache: Cache of suggestions for BPMN diagrams.
+    TranscriptCache: Cache of transcripts of uploaded recordings.
+"""
+
+from infra.cache.redis import RedisLRUCache
+
+
+class BpmnCache(RedisLRUCache):
+    """
+    Cache of generated BPMN diagrams keyed on a hash of the prompt parts,
+    the model name, the system prompt and the sampling options.
+    """
+
+
+class SuggestionsCache(RedisLRUCache):
+    """
+    Cache of suggestions keyed on the layout-insensitive canonical form of the
+    diagram, the model name, the system prompt and the sampling options.
+    """
+
+
+class TranscriptCache(RedisLRUCache):
+    """
+    Cache of transcripts keyed on the hash of the raw upload, the STT model
+    name and the segmentation options.
+    """
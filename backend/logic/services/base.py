@@ -1,5 +1,14 @@
+from collections.abc import AsyncIterator
 from typing import Generic, List, NotRequired, Protocol, TypedDict, TypeVar
 
+import httpx
+import openai
+
+from logic.bpmn.graph import ProcessGraph
+from logic.bpmn.patch import BpmnPatch
+from settings.config import Config
+from utils.upstreams import CircuitOpenError
+
 T = TypeVar("T")
 
 
@@ -19,6 +28,46 @@ class Suggestion(TypedDict):
     correction: str
 
 
+class SamplingOptions(TypedDict):
+    """
+    Sampling options shared by all model backends.
+
+    :key temperature: Sampling temperature (0-1).
+    :key top_p: Top-p sampling value (0-1).
+    :key top_k: Top-k sampling value (1-100).
+    :key seed: Fixed random seed, set in deterministic mode only.
+    """
+
+    temperature: float
+    top_p: float
+    top_k: int
+    seed: NotRequired[int]
+
+
+def sampling_options(config: Config) -> SamplingOptions:
+    """
+    Builds sampling options from the configuration.
+
+    In deterministic mode the temperature is forced to 0 and the seed is
+    fixed, so equal prompts produce equal answers and can be cached.
+
+    :param config: Configuration object containing the LLM settings.
+    :return: Sampling options for a generation request.
+    """
+    if config.llm_deterministic:
+        return SamplingOptions(
+            temperature=0.0,
+            top_p=config.llm_top_p,
+            top_k=config.llm_top_k,
+            seed=config.llm_seed,
+        )
+    return SamplingOptions(
+        temperature=config.llm_temperature,
+        top_p=config.llm_top_p,
+        top_k=config.llm_top_k,
+    )
+
+
 class GenerateResponse(TypedDict, Generic[T]):
     """
     Represents the response returned by the generation API.
@@ -61,6 +110,9 @@ class BpmnService(Protocol):
 
     All methods are asynchronous and intended for use in AI-powered BPMN tooling.
 
+    Attributes:
+        model_name (str): Name of the model answering the requests.
+
     Methods:
         model_ready() -> bool:
             Checks if the underlying model or service is ready to accept requests.
@@ -68,11 +120,32 @@ class BpmnService(Protocol):
         generate_bpmn(prompt: str) -> GenerateResponse[Xml]:
             Generates BPMN-compliant XML from a natural language desc of a process.
 
+        stream_bpmn(prompt: str) -> AsyncIterator[str]:
+            Streams the raw ``{"xml": ...}`` answer of the model fragment by fragment.
+
+        generate_graph(prompt: str) -> GenerateResponse[ProcessGraph]:
+            Generates the semantic process graph only, without any layout.
+
+        generate_patch(prompt: str) -> GenerateResponse[BpmnPatch]:
+            Generates graph operations editing an existing process.
+
         get_suggestions(prompt: str) -> GenerateResponse[list[Suggestion]]:
             Analyzes a BPMN description (text or XML) and returns suggested improvements
             or corrections in the form of errors and their corresponding suggestions.
+
+        stream_suggestions(prompt: str) -> AsyncIterator[str]:
+            Streams the raw JSON array of suggestions fragment by fragment.
     """
 
+    @property
+    def model_name(self) -> str:
+        """
+        Name of the model answering the requests.
+
+        :return: Model name.
+        """
+        ...
+
     async def model_ready(self) -> bool:
         """
         Checks if the BPMN generation model is ready.
@@ -90,6 +163,33 @@ class BpmnService(Protocol):
         """
         ...
 
+    def stream_bpmn(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Streams the raw JSON envelope of a BPMN generation as it is produced.
+
+        :param prompt: Input prompt string.
+        :return: An async iterator over text fragments of ``{"xml": "..."}``.
+        """
+        ...
+
+    async def generate_graph(self, prompt: str) -> GenerateResponse[ProcessGraph]:
+        """
+        Generates the process graph (nodes, flows and lanes) from a given prompt.
+
+        :param prompt: Input prompt string.
+        :return: A GenerateResponse object containing the process graph.
+        """
+        ...
+
+    async def generate_patch(self, prompt: str) -> GenerateResponse[BpmnPatch]:
+        """
+        Generates the operations (add, remove, rename, reconnect) editing a process.
+
+        :param prompt: Input prompt string with the current process and the change.
+        :return: A GenerateResponse object containing the patch.
+        """
+        ...
+
     async def get_suggestions(self, prompt: str) -> GenerateResponse[list[Suggestion]]:
         """
         Generates suggestions (errors and corrections) from a BPMN diagram prompt.
@@ -99,4 +199,32 @@ class BpmnService(Protocol):
         """
         ...
 
+    def stream_suggestions(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Streams the raw JSON array of suggestions as it is produced.
+
+        :param prompt: Input BPMN XML string or natural language.
+        :return: An async iterator over text fragments of ``[{"error": ...}]``.
+        """
+        ...
+
     async def create_model(self) -> None: ...
+
+
+def is_backend_failure(error: BaseException) -> bool:
+    """
+    Tells whether an error is a fault of the backend rather than the request.
+
+    :param error: Raised error.
+    :return: True for connection errors, timeouts, 5xx answers and calls
+        rejected by an open circuit breaker.
+    """
+    if isinstance(
+        error, (httpx.TransportError, openai.APIConnectionError, CircuitOpenError)
+    ):
+        return True
+    if isinstance(error, httpx.HTTPStatusError):
+        return error.response.status_code >= 500
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code >= 500
+    return False
@@ -0,0 +1,204 @@
+"""
+Single-flight coalescing of identical model requests.
+
+Concurrent calls with the same fingerprint (method, model, sampling options
+and prompt) share one upstream generation. Inside a process the callers await
+a shared future; across workers the first caller takes a Redis lock and
+publishes the answer under a short-lived result key, which the other callers
+poll until the lock is released.
+
+Only callers that were waiting while the lock was held take the shared
+answer. A call arriving after the lock is released generates anew, so a
+retry of a task that failed on the answer does not get the same answer.
+
+Coalescing is an optimization only: if Redis is unavailable, or the lock
+holder dies without an answer, the caller generates on its own.
+
+Classes:
+    CoalescingBpmnService: BpmnService wrapper coalescing identical requests.
+"""
+
+import asyncio
+import json
+import logging
+import uuid
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Any, Optional, TypeVar, cast
+
+from redis.asyncio.client import Redis
+from redis.exceptions import RedisError
+
+from infra.cache.redis import content_key
+from logic.bpmn.graph import ProcessGraph
+from logic.bpmn.patch import BpmnPatch
+from logic.services.base import (BpmnService, GenerateResponse, Suggestion,
+                                 Xml, sampling_options)
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+R = TypeVar("R")
+
+# Deletes the lock only if it is still held by the given token.
+RELEASE_SCRIPT = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+@dataclass
+class CoalescingBpmnService(BpmnService):
+    """
+    Wraps a model service so identical concurrent requests run only once.
+
+    Streaming methods are passed through, since a stream consumed by one
+    caller cannot be replayed to another.
+
+    :param service: Wrapped model service.
+    :param redis: Redis client holding the locks and the shared answers.
+    :param config: Configuration object holding the coalescing settings.
+    """
+
+    service: BpmnService
+    redis: Redis
+    config: Config
+    _inflight: dict[str, asyncio.Future[Any]] = field(default_factory=dict, init=False)
+
+    @property
+    def model_name(self) -> str:
+        return self.service.model_name
+
+    async def model_ready(self) -> bool:
+        return await self.service.model_ready()
+
+    async def create_model(self) -> None:
+        await self.service.create_model()
+
+    async def generate_bpmn(self, prompt: str) -> GenerateResponse[Xml]:
+        return await self._coalesce("generate_bpmn", prompt, self.service.generate_bpmn)
+
+    def stream_bpmn(self, prompt: str) -> AsyncIterator[str]:
+        return self.service.stream_bpmn(prompt)
+
+    async def generate_graph(self, prompt: str) -> GenerateResponse[ProcessGraph]:
+        return await self._coalesce(
+            "generate_graph", prompt, self.service.generate_graph
+        )
+
+    async def generate_patch(self, prompt: str) -> GenerateResponse[BpmnPatch]:
+        return await self._coalesce(
+            "generate_patch", prompt, self.service.generate_patch
+        )
+
+    async def get_suggestions(self, prompt: str) -> GenerateResponse[list[Suggestion]]:
+        return await self._coalesce(
+            "get_suggestions", prompt, self.service.get_suggestions
+        )
+
+    def stream_suggestions(self, prompt: str) -> AsyncIterator[str]:
+        return self.service.stream_suggestions(prompt)
+
+    def _fingerprint(self, method: str, prompt: str) -> str:
+        return content_key(
+            method, self.model_name, sampling_options(self.config), prompt
+        )
+
+    async def _coalesce(
+        self, method: str, prompt: str, call: Callable[[str], Awaitable[R]]
+    ) -> R:
+        """
+        Runs the call once per fingerprint for all concurrent callers.
+
+        :param method: Name of the service method, part of the fingerprint.
+        :param prompt: Prompt passed to the call.
+        :param call: Method of the wrapped service.
+        :return: Answer of the call, shared by all concurrent callers.
+        """
+        key = self._fingerprint(method, prompt)
+        if (shared := self._inflight.get(key)) is not None:
+            try:
+                return cast(R, await asyncio.shield(shared))
+            except asyncio.CancelledError:
+                if not shared.cancelled():
+                    raise
+                # The caller running the request was cancelled, not this one.
+                return await self._coalesce(method, prompt, call)
+
+        shared = asyncio.get_running_loop().create_future()
+        self._inflight[key] = shared
+        try:
+            result = await self._run_once(key, lambda: call(prompt))
+        except asyncio.CancelledError:
+            shared.cancel()
+            raise
+        except Exception as e:
+            shared.set_exception(e)
+            # Retrieved here, so a future without waiters is not reported.
+            shared.exception()
+            raise
+        else:
+            shared.set_result(result)
+            return result
+        finally:
+            del self._inflight[key]
+
+    async def _run_once(self, key: str, call: Callable[[], Awaitable[R]]) -> R:
+        """
+        Runs the call once per fingerprint across workers.
+
+        :param key: Fingerprint of the request.
+        :param call: Call generating the answer.
+        :return: Answer of this call or the one shared by another worker.
+        """
+        lock_key = f"singleflight:{key}:lock"
+        result_key = f"singleflight:{key}:result"
+        token = str(uuid.uuid4())
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + self.config.llm_coalesce_lock_ttl
+        try:
+            while not await self.redis.set(
+                lock_key, token, nx=True, ex=self.config.llm_coalesce_lock_ttl
+            ):
+                if loop.time() >= deadline:
+                    logger.warning("Coalesced request is stuck, generating anew")
+                    return await call()
+                await asyncio.sleep(self.config.llm_coalesce_poll_interval)
+                if (shared := await self._shared_result(result_key)) is not None:
+                    return cast(R, shared)
+            # Waiters of the next holder must not take the previous answer.
+            await self.redis.delete(result_key)
+        except RedisError:
+            logger.warning("Request coalescing is unavailable", exc_info=True)
+            return await call()
+
+        try:
+            result = await call()
+            try:
+                # Kept just long enough for the waiters to poll it once.
+                ttl = max(
+                    self.config.llm_coalesce_result_ttl,
+                    2 * self.config.llm_coalesce_poll_interval,
+                )
+                await self.redis.set(
+                    result_key,
+                    json.dumps(result, ensure_ascii=False),
+                    px=int(ttl * 1000),
+                )
+            except RedisError:
+                logger.warning("Cannot share a coalesced answer", exc_info=True)
+            return result
+        finally:
+            await self._release(lock_key, token)
+
+    async def _release(self, lock_key: str, token: str) -> None:
+        try:
+            await self.redis.eval(RELEASE_SCRIPT, 1, lock_key, token)  # type: ignore
+        except RedisError:
+            logger.warning("Cannot release a coalescing lock", exc_info=True)
+
+    async def _shared_result(self, result_key: str) -> Optional[Any]:
+        value = await self.redis.get(result_key)
+        return None if value is None else json.loads(value)
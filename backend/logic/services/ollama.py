@@ -1,16 +1,40 @@
 import json
 import logging
+from collections.abc import AsyncIterator
 from dataclasses import dataclass
-from typing import Any, NotRequired, TypedDict
+from typing import Any, NotRequired, TypedDict, cast
 
 import httpx
 
-from logic.services.base import BpmnService, GenerateResponse, Suggestion, Xml
+from infra.http.pool import HttpClientPool
+from logic.bpmn.graph import GRAPH_SCHEMA, ProcessGraph
+from logic.bpmn.patch import PATCH_SCHEMA, BpmnPatch
+from logic.services.base import (BpmnService, GenerateResponse, Suggestion,
+                                 Xml, is_backend_failure, sampling_options)
 from settings.config import Config
 from utils.decorators.retry import async_retry
 
 logger = logging.getLogger(__name__)
 
+XML_FORMAT: dict[str, Any] = {
+    "type": "object",
+    "properties": {
+        "xml": {"type": "string"},
+    },
+    "required": ["xml"],
+}
+SUGGESTIONS_FORMAT: dict[str, Any] = {
+    "type": "array",
+    "items": {
+        "type": "object",
+        "properties": {
+            "error": {"type": "string"},
+            "correction": {"type": "string"},
+        },
+        "required": ["error", "correction"],
+    },
+}
+
 
 class ModelOptions(TypedDict):
     """
@@ -20,12 +44,14 @@ class ModelOptions(TypedDict):
     :key top_p: Top-p sampling value (0-1).
     :key top_k: Top-k sampling value (1-100).
     :key num_ctx: Maximum number of context tokens (1-128000).
+    :key seed: Random seed, makes the output reproducible.
     """
 
     temperature: float  # 0-1
     top_p: float  # 0-1
     top_k: int  # 1-100
     num_ctx: int  # 1-128000
+    seed: NotRequired[int]
 
 
 class GenerateRequest(TypedDict):
@@ -48,15 +74,47 @@ class GenerateRequest(TypedDict):
     format: NotRequired[dict[str, Any]]
 
 
+def _upstream(service: "OllamaService", *args: Any, **kwargs: Any) -> str:
+    """
+    Names the upstream of a service call for its circuit breaker.
+
+    :param service: Service the method is called on.
+    :return: Upstream name, `ollama:<url>`.
+    """
+    return f"ollama:{service.url or service.config.ollama_url}"
+
+
 @dataclass
 class OllamaService(BpmnService):
     """
     Service for interacting with the Ollama model API.
 
     :param config: Configuration object containing API settings.
+    :param http: Pool of long-lived HTTP clients.
+    :param url: URL of the Ollama API, `OLLAMA_URL` if empty.
     """
 
     config: Config
+    http: HttpClientPool
+    url: str = ""
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Returns the pooled HTTP client bound to the Ollama API.
+
+        :return: An instance of httpx.AsyncClient.
+        """
+        return self.http.client(self.url or self.config.ollama_url)
+
+    @property
+    def model_name(self) -> str:
+        """
+        Name of the Ollama model answering the requests.
+
+        :return: Model name.
+        """
+        return self.config.ollama_model
 
     @property
     def headers(self) -> dict[str, str]:
@@ -89,7 +147,13 @@ class OllamaService(BpmnService):
         """
         return await self._create_model()
 
-    @async_retry(3, (httpx.HTTPStatusError, httpx.TimeoutException), 1)
+    @async_retry(
+        3,
+        (httpx.HTTPStatusError, httpx.TransportError),
+        1,
+        upstream=_upstream,
+        is_failure=is_backend_failure,
+    )
     async def generate_bpmn(self, prompt: str) -> GenerateResponse[Xml]:  # type: ignore
         """
         Generates BPMN XML output from a given prompt.
@@ -99,6 +163,53 @@ class OllamaService(BpmnService):
         """
         return await self._generate(prompt)
 
+    def stream_bpmn(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Streams the raw JSON envelope of a BPMN generation as it is produced.
+
+        :param prompt: Input prompt string.
+        :return: An async iterator over text fragments of ``{"xml": "..."}``.
+        """
+        return self._stream(self.config.generate_bpmn_agent, prompt, XML_FORMAT)
+
+    @async_retry(
+        3,
+        (httpx.HTTPStatusError, httpx.TransportError),
+        1,
+        upstream=_upstream,
+        is_failure=is_backend_failure,
+    )
+    async def generate_graph(self, prompt: str) -> GenerateResponse[ProcessGraph]:
+        """
+        Generates the process graph (nodes, flows and lanes) from a given prompt.
+
+        :param prompt: Input prompt string.
+        :return: A GenerateResponse object containing the process graph.
+        """
+        result = await self._generate_json(
+            self.config.generate_bpmn_graph_agent, prompt, GRAPH_SCHEMA
+        )
+        return cast(GenerateResponse[ProcessGraph], result)
+
+    @async_retry(
+        3,
+        (httpx.HTTPStatusError, httpx.TransportError),
+        1,
+        upstream=_upstream,
+        is_failure=is_backend_failure,
+    )
+    async def generate_patch(self, prompt: str) -> GenerateResponse[BpmnPatch]:
+        """
+        Generates the operations (add, remove, rename, reconnect) editing a process.
+
+        :param prompt: Input prompt string with the current process and the change.
+        :return: A GenerateResponse object containing the patch.
+        """
+        result = await self._generate_json(
+            self.config.edit_bpmn_patch_agent, prompt, PATCH_SCHEMA
+        )
+        return cast(GenerateResponse[BpmnPatch], result)
+
     async def get_suggestions(self, prompt: str) -> GenerateResponse[list[Suggestion]]:
         """
         Generates suggestions (errors and corrections) from a BPMN diagram prompt.
@@ -108,101 +219,101 @@ class OllamaService(BpmnService):
         """
         return await self._get_suggestions_from_bpmn(prompt)
 
+    def stream_suggestions(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Streams the raw JSON array of suggestions as it is produced.
+
+        :param prompt: Input BPMN XML string or natural language.
+        :return: An async iterator over text fragments of ``[{"error": ...}]``.
+        """
+        return self._stream(self.config.suggestions_agent, prompt, SUGGESTIONS_FORMAT)
+
     async def _model_ready(self) -> bool:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.get(f"{self.config.ollama_url}/api/tags")
-            if response.is_error:
-                return False
-            data = response.json()
-            for model in data.get("models", []):
-                if model["name"] == self.config.ollama_model:
-                    return True
+        response = await self.client.get(
+            "api/tags", timeout=self.http.timeout(self.config.http_health_timeout)
+        )
+        if response.is_error:
             return False
+        data = response.json()
+        for model in data.get("models", []):
+            if model["name"] == self.config.ollama_model:
+                return True
+        return False
 
     async def _create_model(self) -> None:
-        async with httpx.AsyncClient(timeout=None) as client:
-            ollama_payload = {
-                "model": self.config.ollama_model,
-            }
-            response = await client.post(
-                f"{self.config.ollama_url}/api/pull",
-                json=ollama_payload,
-                headers=self.headers,
-            )
-            response.raise_for_status()
+        ollama_payload = {
+            "model": self.config.ollama_model,
+        }
+        response = await self.client.post(
+            "api/pull",
+            json=ollama_payload,
+            headers=self.headers,
+            timeout=self.http.timeout(None),
+        )
+        response.raise_for_status()
 
-    async def _generate(self, prompt: str) -> GenerateResponse[Xml]:
-        async with httpx.AsyncClient(
-            base_url=self.config.ollama_url, timeout=None
-        ) as client:
-            response = await client.post(
-                url="api/generate",
-                json=GenerateRequest(
-                    model=self.config.ollama_model,
-                    system=self.config.generate_bpmn_agent,
-                    prompt=prompt,
-                    stream=False,
-                    options=ModelOptions(
-                        temperature=0.7,
-                        top_p=0.9,
-                        top_k=40,
-                        num_ctx=16384
-                    ),
-                    format={
-                        "type": "object",
-                        "properties": {
-                            "xml": {"type": "string"},
-                        },
-                        "required": ["xml"],
-                    },
-                ),
-                headers=self.headers,
-            )
+    def _request(
+        self, system: str, prompt: str, format: dict[str, Any], stream: bool
+    ) -> GenerateRequest:
+        return GenerateRequest(
+            model=self.config.ollama_model,
+            system=system,
+            prompt=prompt,
+            stream=stream,
+            options=ModelOptions(
+                **sampling_options(self.config), num_ctx=self.config.llm_num_ctx
+            ),
+            format=format,
+        )
+
+    async def _generate_json(
+        self, system: str, prompt: str, format: dict[str, Any]
+    ) -> dict[str, Any]:
+        response = await self.client.post(
+            url="api/generate",
+            json=self._request(system, prompt, format, stream=False),
+            headers=self.headers,
+            timeout=self.http.timeout(self.config.ollama_generate_timeout),
+        )
+        response.raise_for_status()
+        result: dict[str, Any] = response.json()
+        result['response'] = json.loads(result['response'])
+        logger.debug(result)
+        return result
+
+    async def _stream(
+        self, system: str, prompt: str, format: dict[str, Any]
+    ) -> AsyncIterator[str]:
+        async with self.client.stream(
+            "POST",
+            url="api/generate",
+            json=self._request(system, prompt, format, stream=True),
+            headers=self.headers,
+            timeout=self.http.timeout(self.config.ollama_generate_timeout),
+        ) as response:
             response.raise_for_status()
-            response = response.json()
-            response['response'] = json.loads(response['response'])
+            async for line in response.aiter_lines():
+                if not line:
+                    continue
+                data = json.loads(line)
+                if "error" in data:
+                    raise httpx.HTTPError(data["error"])
+                if data.get("response"):
+                    yield data["response"]
+                if data.get("done"):
+                    logger.debug(data)
+                    return
 
-            result: GenerateResponse[Xml] = response
-            logger.debug(result)
-            return result
+    async def _generate(self, prompt: str) -> GenerateResponse[Xml]:
+        result = await self._generate_json(
+            self.config.generate_bpmn_agent, prompt, XML_FORMAT
+        )
+        return cast(GenerateResponse[Xml], result)
 
     async def _get_suggestions_from_bpmn(
         self, prompt: str
     ) -> GenerateResponse[list[Suggestion]]:
-        async with httpx.AsyncClient(
-            base_url=self.config.ollama_url, timeout=None
-        ) as client:
-            response = await client.post(
-                url="api/generate",
-                json=GenerateRequest(
-                    model=self.config.ollama_model,
-                    system=self.config.suggestions_agent,
-                    prompt=prompt,
-                    stream=False,
-                    options=ModelOptions(
-                        temperature=0.7,
-                        top_p=0.9,
-                        top_k=40,
-                        num_ctx=16384
-                    ),
-                    format={
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "error": {"type": "string"},
-                                "correction": {"type": "string"},
-                            },
-                            "required": ["error", "correction"],
-                        },
-                    },
-                ),
-                headers=self.headers,
-            )
-            response.raise_for_status()
-            response = response.json()
-            response['response'] = json.loads(response['response'])
-
-            result: GenerateResponse[list[Suggestion]] = response
-            logger.debug(result)
-            return result
+        result = await self._generate_json(
+            self.config.suggestions_agent, prompt, SUGGESTIONS_FORMAT
+        )
+        return cast(GenerateResponse[list[Suggestion]], result)
@@ -1,15 +1,71 @@
 import json
 import logging
-from dataclasses import dataclass
-from typing import TypedDict
+from collections.abc import AsyncIterator
+from dataclasses import dataclass, field
+from typing import Any, Optional, TypedDict
 
 from openai import AsyncOpenAI
 
-from logic.services.base import BpmnService, GenerateResponse, Suggestion, Xml
+from infra.http.pool import HttpClientPool
+from logic.bpmn.graph import GRAPH_SCHEMA, ProcessGraph
+from logic.bpmn.patch import PATCH_SCHEMA, BpmnPatch
+from logic.services.base import (BpmnService, GenerateResponse, Suggestion,
+                                 Xml, sampling_options)
 from settings.config import Config
 
 logger = logging.getLogger(__name__)
 
+XML_RESPONSE_FORMAT: Any = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "xml_response",
+        "strict": True,
+        "schema": {
+            "type": "object",
+            "properties": {
+                "xml": {"type": "string"},
+            },
+            "required": ["xml"],
+            "additionalProperties": False,
+        },
+    },
+}
+GRAPH_RESPONSE_FORMAT: Any = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "graph_response",
+        "strict": True,
+        "schema": GRAPH_SCHEMA,
+    },
+}
+PATCH_RESPONSE_FORMAT: Any = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "patch_response",
+        "strict": True,
+        "schema": PATCH_SCHEMA,
+    },
+}
+SUGGESTIONS_RESPONSE_FORMAT: Any = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "xml_response",
+        "strict": True,
+        "schema": {
+            "type": "array",
+            "items": {
+                "type": "object",
+                "properties": {
+                    "error": {"type": "string"},
+                    "correction": {"type": "string"},
+                },
+                "required": ["error", "correction"],
+                "additionalProperties": False,
+            },
+        },
+    },
+}
+
 
 class GenerateRequestMessage(TypedDict):
     role: str
@@ -27,18 +83,33 @@ class GenerateRequest(TypedDict):
 @dataclass
 class OpenAIService(BpmnService):
     config: Config
+    http: HttpClientPool
+    url: str = ""
+    _client: Optional[AsyncOpenAI] = field(default=None, init=False)
 
     @property
     def client(self) -> AsyncOpenAI:
         """
-        Instantiates and returns an AsyncOpenAI client.
+        Returns the AsyncOpenAI client shared by the worker process.
+
+        The client is created once on top of the pooled HTTP client, so
+        connections (and TLS sessions) are reused between requests. It is
+        rebuilt only after the pool has been closed.
 
         :return: An instance of AsyncOpenAI configured with the provided API token
                  and base URL.
         """
-        return AsyncOpenAI(
-            api_key=self.config.openai_api_token, base_url=self.config.openai_url
-        )
+        if self._client is None or self._client.is_closed():
+            self._client = AsyncOpenAI(
+                api_key=self.config.openai_api_token,
+                base_url=self.base_url,
+                timeout=self.http.timeout(self.config.openai_timeout),
+                max_retries=self.config.openai_max_retries,
+                http_client=self.http.client(
+                    self.base_url, http2=self.config.openai_http2
+                ),
+            )
+        return self._client
 
     def __post_init__(self) -> None:
         """
@@ -46,9 +117,38 @@ class OpenAIService(BpmnService):
 
         :raises ValueError: If the OpenAI API URL is not provided in the config.
         """
-        if not self.config.openai_url:
+        if not self.base_url:
             raise ValueError("Cannot provide OPENAPI_URL")
 
+    @property
+    def base_url(self) -> str:
+        """
+        URL of the OpenAI-compatible API, `OPENAI_URL` if not set.
+
+        :return: Base URL.
+        """
+        return self.url or self.config.openai_url
+
+    @property
+    def model_name(self) -> str:
+        """
+        Name of the OpenAI model answering the requests.
+
+        :return: Model name.
+        """
+        return self.config.openai_model
+
+    @property
+    def _sampling(self) -> dict[str, Any]:
+        options = sampling_options(self.config)
+        sampling: dict[str, Any] = {
+            "temperature": options["temperature"],
+            "top_p": options["top_p"],
+        }
+        if "seed" in options:
+            sampling["seed"] = options["seed"]
+        return sampling
+
     @property
     def headers(self) -> dict[str, str]:
         """
@@ -84,6 +184,63 @@ class OpenAIService(BpmnService):
         """
         return await self._generate_bpmn(prompt)
 
+    def stream_bpmn(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Streams the raw JSON envelope of a BPMN generation as it is produced.
+
+        :param prompt: Input prompt string.
+        :return: An async iterator over text fragments of ``{"xml": "..."}``.
+        """
+        return self._stream(
+            self.config.generate_bpmn_agent, prompt, XML_RESPONSE_FORMAT
+        )
+
+    async def generate_graph(self, prompt: str) -> GenerateResponse[ProcessGraph]:
+        """
+        Generates the process graph (nodes, flows and lanes) from a given prompt.
+
+        :param prompt: Input prompt string.
+        :return: A GenerateResponse object containing the process graph.
+        """
+        result = await self.client.chat.completions.create(
+            model=self.config.openai_model,
+            messages=[
+                {"role": "system", "content": self.config.generate_bpmn_graph_agent},
+                {"role": "user", "content": prompt},
+            ],
+            **self._sampling,
+            response_format=GRAPH_RESPONSE_FORMAT,
+        )
+        logger.debug(result)
+        graph: ProcessGraph = json.loads(result.choices[0].message.content or "{}")
+        return GenerateResponse[ProcessGraph](
+            model=self.config.openai_model, response=graph
+        )
+
+    async def generate_patch(self, prompt: str) -> GenerateResponse[BpmnPatch]:
+        """
+        Generates the operations (add, remove, rename, reconnect) editing a process.
+
+        :param prompt: Input prompt string with the current process and the change.
+        :return: A GenerateResponse object containing the patch.
+        """
+        result = await self.client.chat.completions.create(
+            model=self.config.openai_model,
+            messages=[
+                {"role": "system", "content": self.config.edit_bpmn_patch_agent},
+                {"role": "user", "content": prompt},
+            ],
+            **self._sampling,
+            response_format=PATCH_RESPONSE_FORMAT,
+        )
+        logger.debug(result)
+        patch: BpmnPatch = json.loads(
+            result.choices[0].message.content or '{"operations": []}'
+        )
+        return GenerateResponse[BpmnPatch](
+            model=self.config.openai_model, response=patch
+        )
+
     async def get_suggestions(self, prompt: str) -> GenerateResponse[list[Suggestion]]:
         """
         Generates suggestions (errors and corrections) from a BPMN diagram prompt.
@@ -93,6 +250,17 @@ class OpenAIService(BpmnService):
         """
         return await self._get_suggestions(prompt)
 
+    def stream_suggestions(self, prompt: str) -> AsyncIterator[str]:
+        """
+        Streams the raw JSON array of suggestions as it is produced.
+
+        :param prompt: Input BPMN XML string or natural language.
+        :return: An async iterator over text fragments of ``[{"error": ...}]``.
+        """
+        return self._stream(
+            self.config.suggestions_agent, prompt, SUGGESTIONS_RESPONSE_FORMAT
+        )
+
     async def _generate_bpmn(self, prompt: str) -> GenerateResponse[Xml]:
         result = await self.client.chat.completions.create(
             model=self.config.openai_model,
@@ -100,23 +268,8 @@ class OpenAIService(BpmnService):
                 {"role": "system", "content": self.config.generate_bpmn_agent},
                 {"role": "user", "content": prompt},
             ],
-            temperature=0.7,
-            top_p=0.9,
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "xml_response",
-                    "strict": True,
-                    "schema": {
-                        "type": "object",
-                        "properties": {
-                            "xml": {"type": "string"},
-                        },
-                        "required": ["xml"],
-                        "additionalProperties": False,
-                    },
-                },
-            },
+            **self._sampling,
+            response_format=XML_RESPONSE_FORMAT,
         )
         logger.debug(result)
         generated_text = result.choices[0].message.content or "{'xml': ''}"
@@ -125,6 +278,24 @@ class OpenAIService(BpmnService):
             model=self.config.openai_model, response={"xml": xml_data}
         )
 
+    async def _stream(
+        self, system: str, prompt: str, response_format: Any
+    ) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.config.openai_model,
+            messages=[
+                {"role": "system", "content": system},
+                {"role": "user", "content": prompt},
+            ],
+            **self._sampling,
+            response_format=response_format,
+            stream=True,
+        )
+        async with stream:
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+
     async def _get_suggestions(self, prompt: str) -> GenerateResponse[list[Suggestion]]:
         result = await self.client.chat.completions.create(
             model=self.config.openai_model,
@@ -132,27 +303,8 @@ class OpenAIService(BpmnService):
                 {"role": "system", "content": self.config.suggestions_agent},
                 {"role": "user", "content": prompt},
             ],
-            temperature=0.7,
-            top_p=0.9,
-            response_format={
-                "type": "json_schema",
-                "json_schema": {
-                    "name": "xml_response",
-                    "strict": True,
-                    "schema": {
-                        "type": "array",
-                        "items": {
-                            "type": "object",
-                            "properties": {
-                                "error": {"type": "string"},
-                                "correction": {"type": "string"},
-                            },
-                            "required": ["error", "correction"],
-                            "additionalProperties": False,
-                        },
-                    },
-                },
-            },
+            **self._sampling,
+            response_format=SUGGESTIONS_RESPONSE_FORMAT,
         )
         generated_text = result.choices[0].message.content or "[]"
         suggestions: list[Suggestion] = json.loads(generated_text)
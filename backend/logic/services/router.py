@@ -0,0 +1,268 @@
+"""
+Routing of model requests over a pool of backends.
+
+Every request goes to the healthy backend with the lowest cost: the number
+of its outstanding requests, or that number weighted by the EWMA of its
+response time. A backend whose latency is not known yet is assumed to be as
+fast as the others on average (or to take ADMISSION_SERVICE_TIME if no
+latency is known at all), so it gets its share of the traffic without
+taking all of it.
+
+Health is tracked passively: a backend failing several requests in a row is
+ejected for a while, and a request that failed on a backend is retried on
+the next one. Besides, the backends are asked periodically whether they
+serve the model (`/api/tags` of Ollama), and those that do not are skipped.
+If no backend is healthy, all of them are tried.
+
+The state is kept per process, every worker balances its own requests.
+
+Classes:
+    RouterBackend: A backend of the pool with its routing state.
+    RouterBpmnService: BpmnService routing requests over the backends.
+
+Functions:
+    parse_backends: Parses the `LLM_BACKENDS` setting.
+"""
+
+import asyncio
+import logging
+import random
+import time
+from collections.abc import AsyncIterator, Awaitable, Callable
+from dataclasses import dataclass, field
+from typing import Optional, TypeVar
+
+from logic.bpmn.graph import ProcessGraph
+from logic.bpmn.patch import BpmnPatch
+from logic.services.base import (BpmnService, GenerateResponse, Suggestion,
+                                 Xml, is_backend_failure)
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+BACKEND_KINDS = ("ollama", "openai")
+
+R = TypeVar("R")
+
+
+def parse_backends(spec: str) -> list[tuple[str, str]]:
+    """
+    Parses a comma-separated list of `kind=url` backends.
+
+    :param spec: Value of the `LLM_BACKENDS` setting,
+        e.g. `ollama=http://gpu-1:11434,openai=https://llm.local/v1`.
+    :return: Kinds and URLs of the backends.
+    :raises ValueError: If a backend has no URL or an unknown kind.
+    """
+    backends = []
+    for item in spec.split(","):
+        if not item.strip():
+            continue
+        kind, _, url = item.strip().partition("=")
+        if kind not in BACKEND_KINDS or not url:
+            raise ValueError(f"Invalid LLM backend {item!r}, expected kind=url")
+        backends.append((kind, url))
+    return backends
+
+
+@dataclass
+class RouterBackend:
+    """
+    A backend of the pool with its routing state.
+
+    :param name: Name of the backend in logs, usually its URL.
+    :param service: Model service bound to the backend.
+    """
+
+    name: str
+    service: BpmnService
+    outstanding: int = 0
+    latency: Optional[float] = None
+    failures: int = 0
+    ejected_until: float = 0.0
+    serves_model: bool = True
+
+    def healthy(self, now: float) -> bool:
+        return self.serves_model and now >= self.ejected_until
+
+
+@dataclass
+class RouterBpmnService(BpmnService):
+    """
+    Routes model requests over a pool of backends.
+
+    :param backends: Backends of the pool.
+    :param config: Configuration object holding the routing settings.
+    """
+
+    backends: list[RouterBackend]
+    config: Config
+    _checked_at: float = field(default=float("-inf"), init=False)
+    _checking: Optional[asyncio.Task[None]] = field(default=None, init=False)
+
+    @property
+    def model_name(self) -> str:
+        return "+".join(sorted({b.service.model_name for b in self.backends}))
+
+    async def model_ready(self) -> bool:
+        await self._check_models()
+        return any(backend.serves_model for backend in self.backends)
+
+    async def create_model(self) -> None:
+        """
+        Pulls the model on every backend. Fails only if no backend has it.
+
+        :return: None
+        """
+        results = await asyncio.gather(
+            *(backend.service.create_model() for backend in self.backends),
+            return_exceptions=True,
+        )
+        for backend, result in zip(self.backends, results):
+            if isinstance(result, BaseException):
+                logger.error(f"Cannot create the model on {backend.name}: {result}")
+        errors = [r for r in results if isinstance(r, BaseException)]
+        if len(errors) == len(self.backends):
+            raise errors[0]
+
+    async def generate_bpmn(self, prompt: str) -> GenerateResponse[Xml]:
+        return await self._route(lambda service: service.generate_bpmn(prompt))
+
+    def stream_bpmn(self, prompt: str) -> AsyncIterator[str]:
+        return self._stream(lambda service: service.stream_bpmn(prompt))
+
+    async def generate_graph(self, prompt: str) -> GenerateResponse[ProcessGraph]:
+        return await self._route(lambda service: service.generate_graph(prompt))
+
+    async def generate_patch(self, prompt: str) -> GenerateResponse[BpmnPatch]:
+        return await self._route(lambda service: service.generate_patch(prompt))
+
+    async def get_suggestions(self, prompt: str) -> GenerateResponse[list[Suggestion]]:
+        return await self._route(lambda service: service.get_suggestions(prompt))
+
+    def stream_suggestions(self, prompt: str) -> AsyncIterator[str]:
+        return self._stream(lambda service: service.stream_suggestions(prompt))
+
+    def _prior_latency(self) -> float:
+        known = [b.latency for b in self.backends if b.latency is not None]
+        if not known:
+            return self.config.admission_service_time
+        return sum(known) / len(known)
+
+    def _cost(self, backend: RouterBackend) -> float:
+        if self.config.llm_routing == "ewma":
+            latency = backend.latency
+            if latency is None:
+                latency = self._prior_latency()
+            return (backend.outstanding + 1) * latency
+        return backend.outstanding
+
+    def _pick(self, tried: set[str]) -> RouterBackend:
+        self._schedule_model_check()
+        now = time.monotonic()
+        candidates = [b for b in self.backends if b.name not in tried]
+        healthy = [b for b in candidates if b.healthy(now)] or candidates
+        return min(
+            healthy, key=lambda b: (self._cost(b), b.outstanding, random.random())
+        )
+
+    def _succeeded(self, backend: RouterBackend, elapsed: float) -> None:
+        alpha = self.config.llm_latency_ewma_alpha
+        if backend.latency is None:
+            backend.latency = elapsed
+        else:
+            backend.latency = alpha * elapsed + (1 - alpha) * backend.latency
+        backend.failures = 0
+
+    def _failed(self, backend: RouterBackend, error: BaseException) -> None:
+        backend.failures += 1
+        if backend.failures >= self.config.llm_eject_failures:
+            backend.failures = 0
+            backend.ejected_until = time.monotonic() + self.config.llm_eject_seconds
+            logger.warning(f"LLM backend {backend.name} is ejected: {error}")
+
+    async def _route(self, call: Callable[[BpmnService], Awaitable[R]]) -> R:
+        """
+        Runs the call on the cheapest backend, failing over to the next ones
+        on backend faults.
+
+        :param call: Call of a method of the backend service.
+        :return: Answer of the first backend that succeeded.
+        """
+        tried: set[str] = set()
+        while True:
+            backend = self._pick(tried)
+            tried.add(backend.name)
+            backend.outstanding += 1
+            started = time.monotonic()
+            try:
+                result = await call(backend.service)
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                self._failed(backend, e)
+                if len(tried) == len(self.backends):
+                    raise
+                logger.warning(f"LLM backend {backend.name} failed, rerouting: {e}")
+                continue
+            else:
+                self._succeeded(backend, time.monotonic() - started)
+                return result
+            finally:
+                backend.outstanding -= 1
+
+    async def _stream(
+        self, call: Callable[[BpmnService], AsyncIterator[str]]
+    ) -> AsyncIterator[str]:
+        """
+        Streams the answer of the cheapest backend, failing over to the next
+        ones on backend faults before the first fragment. Once a fragment has
+        been yielded the stream is not rerouted, since the fragments may
+        already have been consumed.
+
+        :param call: Call of a streaming method of the backend service.
+        :return: An async iterator over the fragments of the answer.
+        """
+        tried: set[str] = set()
+        while True:
+            backend = self._pick(tried)
+            tried.add(backend.name)
+            backend.outstanding += 1
+            started = time.monotonic()
+            yielded = False
+            try:
+                async for fragment in call(backend.service):
+                    yielded = True
+                    yield fragment
+            except Exception as e:
+                if not is_backend_failure(e):
+                    raise
+                self._failed(backend, e)
+                if yielded or len(tried) == len(self.backends):
+                    raise
+                logger.warning(f"LLM backend {backend.name} failed, rerouting: {e}")
+                continue
+            else:
+                self._succeeded(backend, time.monotonic() - started)
+                return
+            finally:
+                backend.outstanding -= 1
+
+    def _schedule_model_check(self) -> None:
+        if self._checking is not None and not self._checking.done():
+            return
+        if time.monotonic() - self._checked_at < self.config.llm_models_refresh:
+            return
+        self._checking = asyncio.create_task(self._check_models())
+
+    async def _check_models(self) -> None:
+        self._checked_at = time.monotonic()
+        ready = await asyncio.gather(
+            *(backend.service.model_ready() for backend in self.backends),
+            return_exceptions=True,
+        )
+        for backend, serves_model in zip(self.backends, ready):
+            serves_model = serves_model is True
+            if backend.serves_model and not serves_model:
+                logger.warning(f"LLM backend {backend.name} does not serve the model")
+            backend.serves_model = serves_model
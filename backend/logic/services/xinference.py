@@ -4,6 +4,8 @@ from typing import cast
 
 import httpx
 
+from infra.http.pool import HttpClientPool
+from logic.services.base import is_backend_failure
 from settings.config import Config
 from utils.decorators.retry import async_retry
 
@@ -16,9 +18,20 @@ class XinferenceService:
     Service for interacting with the Xinference audio model API.
 
     :param config: Configuration object that holds Xinference settings.
+    :param http: Pool of long-lived HTTP clients.
     """
 
     config: Config
+    http: HttpClientPool
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        Returns the pooled HTTP client bound to the Xinference API.
+
+        :return: An instance of httpx.AsyncClient.
+        """
+        return self.http.client(self.config.xinference_url)
 
     async def model_ready(self) -> bool:
         """
@@ -42,7 +55,13 @@ class XinferenceService:
             return
         await self._create_model()
 
-    @async_retry(3, httpx.TimeoutException, 1)
+    @async_retry(
+        3,
+        (httpx.TransportError, httpx.HTTPStatusError),
+        1,
+        upstream="xinference",
+        is_failure=is_backend_failure,
+    )
     async def speach_to_text(self, raw_file: bytes) -> str:
         """
         Transcribes speech from the given raw audio file using the Xinference model.
@@ -53,46 +72,44 @@ class XinferenceService:
         return await self._stt(raw_file)
 
     async def _get_model(self) -> bool:
-        async with httpx.AsyncClient(timeout=10) as client:
-            response = await client.get(
-                f"{self.config.xinference_url}/v1/models",
-            )
-            if not response.is_success:
-                return False
-            data = response.json()
-            for model in data.get("data", []):
-                if model.get("model_name", None) == self.config.xinference_model:
-                    return True
+        response = await self.client.get(
+            "v1/models",
+            timeout=self.http.timeout(self.config.http_health_timeout),
+        )
+        if not response.is_success:
             return False
+        data = response.json()
+        for model in data.get("data", []):
+            if model.get("model_name", None) == self.config.xinference_model:
+                return True
+        return False
 
     async def _create_model(self) -> None:
-        async with httpx.AsyncClient(timeout=None) as client:
-            xinference_payload = {
-                "model_name": self.config.xinference_model,
-                "model_type": "audio",
-                "replica": self.config.xinference_model_replica,
-                "n_gpu": self.config.xinference_n_gpu,
-            }
-            response = await client.post(
-                f"{self.config.xinference_url}/v1/models",
-                json=xinference_payload,
-                headers={
-                    "accept": "application/json",
-                    "Content-Type": "application/json",
-                },
-            )
-            response.raise_for_status()
+        xinference_payload = {
+            "model_name": self.config.xinference_model,
+            "model_type": "audio",
+            "replica": self.config.xinference_model_replica,
+            "n_gpu": self.config.xinference_n_gpu,
+        }
+        response = await self.client.post(
+            "v1/models",
+            json=xinference_payload,
+            headers={
+                "accept": "application/json",
+                "Content-Type": "application/json",
+            },
+            timeout=self.http.timeout(None),
+        )
+        response.raise_for_status()
 
     async def _stt(self, raw_file: bytes) -> str:
-        async with httpx.AsyncClient(
-            base_url=self.config.xinference_url, timeout=10
-        ) as client:
-            response = await client.post(
-                url="v1/audio/transcriptions",
-                data={"model": self.config.xinference_model},
-                files={"file": raw_file},
-            )
-            response.raise_for_status()
-            result = response.json()
-            logger.debug(result)
-            return cast(str, result["text"].strip())
+        response = await self.client.post(
+            url="v1/audio/transcriptions",
+            data={"model": self.config.xinference_model},
+            files={"file": raw_file},
+            timeout=self.http.timeout(self.config.xinference_stt_timeout),
+        )
+        response.raise_for_status()
+        result = response.json()
+        logger.debug(result)
+        return cast(str, result["text"].strip())
@@ -1,16 +1,23 @@
-from logic.tasks.bpmn_create import bpmn_create, pipeline_bpmn_step
+from logic.tasks.blobs import purge_blobs
+from logic.tasks.bpmn_create import (bpmn_create, bpmn_create_stream,
+                                     pipeline_bpmn_step)
 from logic.tasks.bpmn_suggestions import (bpmn_get_suggestions,
+                                          bpmn_get_suggestions_stream,
                                           pipeline_bpmn_suggestions_step)
-from logic.tasks.stt import pipeline_stt_step, stt
+from logic.tasks.stt import audio_to_text, pipeline_stt_step, stt
 from logic.tasks.webm_convert import pipeline_webm_covert_step, webm_convert
 
 __all__ = [
     "stt",
+    "audio_to_text",
     "pipeline_stt_step",
     "bpmn_create",
+    "bpmn_create_stream",
     "pipeline_bpmn_step",
     "bpmn_get_suggestions",
+    "bpmn_get_suggestions_stream",
     "pipeline_bpmn_suggestions_step",
     "webm_convert",
     "pipeline_webm_covert_step",
+    "purge_blobs",
 ]
@@ -1,7 +1,15 @@
-from typing import Any, NamedTuple
+from typing import Any, NamedTuple, Optional
+
+# AMQP priorities of the tasks, higher ones are delivered first. Requests a
+# user is waiting for go ahead of background pipelines and maintenance.
+PRIORITY_INTERACTIVE = 9
+PRIORITY_PIPELINE = 5
+PRIORITY_MAINTENANCE = 1
 
 
 class PipelineValue(NamedTuple):
     user_id: str
     pipeline_id: str
     value: Any
+    audio_ref: Optional[str] = None
+    transcript: Optional[str] = None
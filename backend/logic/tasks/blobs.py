@@ -0,0 +1,28 @@
+import logging
+
+from fast_depends import Depends, inject
+
+from infra.blobs.base import BlobStore
+from infra.brokers.taskiq import broker
+from logic import TypedContainer, init_container
+from logic.tasks.base import PRIORITY_MAINTENANCE
+from settings.config import Config
+
+logger = logging.getLogger(__name__)
+
+
+@broker.task(
+    schedule=[{"cron": init_container().resolve(Config).blob_purge_cron}],
+    priority=PRIORITY_MAINTENANCE,
+)
+@inject
+async def purge_blobs(container: TypedContainer = Depends(init_container)) -> int:
+    """Scheduled task deleting expired blobs.
+
+    Redis blobs expire on their own, so the task only does work for the
+    local store.
+
+    :param container: Dependency injection container.
+    :return: Number of deleted blobs.
+    """
+    return await container.resolve(BlobStore).purge()
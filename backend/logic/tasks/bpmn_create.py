@@ -1,21 +1,181 @@
+import asyncio
 import logging
+import xml.etree.ElementTree as ET
+from collections.abc import Awaitable, Callable
 
 import httpx
 from fast_depends import Depends, inject
 from socketio import AsyncManager
 
+from infra.brokers.admission import mark_cache_hit
+from infra.brokers.jobs import job_running, report_job_progress
 from infra.brokers.taskiq import broker
+from infra.cache.redis import content_key
+from infra.streams.redis import TaskStreamBus
 from logic import TypedContainer, init_container
-from logic.services.base import BpmnService
-from logic.tasks.base import PipelineValue
+from logic.bpmn.graph import GraphError, graph_to_text, validate_graph
+from logic.bpmn.patch import apply_graph, apply_patch
+from logic.bpmn.serialize import diagram_from_xml, graph_to_xml
+from logic.cache import BpmnCache
+from logic.services.base import BpmnService, sampling_options
+from logic.tasks.base import (PRIORITY_INTERACTIVE, PRIORITY_PIPELINE,
+                              PipelineValue)
+from settings.config import Config
+from utils.json_stream import JsonStringFieldParser
 
 logger = logging.getLogger(__name__)
 
+# Expected size of a new diagram, used to estimate the progress of a job
+JOB_EXPECTED_BPMN_SIZE = 8000
+
 
 def bpmn_postprocess(bpmn_xml: str) -> str:
     return bpmn_xml.replace("BMN", "BPMN")
 
 
+def ensure_well_formed(bpmn_xml: str) -> str:
+    """Checks that the generated BPMN is a well-formed XML document.
+
+    :param bpmn_xml: BPMN XML to check.
+    :return: The same BPMN XML.
+    :raises ValueError: If the XML cannot be parsed.
+    """
+    try:
+        ET.fromstring(bpmn_xml)
+    except ET.ParseError as e:
+        raise ValueError(f"Generated BPMN XML is not well-formed: {e}") from e
+    return bpmn_xml
+
+
+def _generation_mode(config: Config, bpmn_xml: str | None) -> str:
+    if bpmn_xml:
+        return config.bpmn_edit_mode
+    return config.bpmn_generation_mode
+
+
+def _generation_agent(config: Config, mode: str) -> str:
+    if mode == "patch":
+        return config.edit_bpmn_patch_agent
+    if mode == "graph":
+        return config.generate_bpmn_graph_agent
+    return config.generate_bpmn_agent
+
+
+def _bpmn_cache_key(
+    description: str, bpmn_xml: str | None, container: TypedContainer
+) -> str:
+    config = container.resolve(Config)
+    mode = _generation_mode(config, bpmn_xml)
+    return content_key(
+        " ".join(description.split()),
+        (bpmn_xml or "").strip(),
+        container.resolve(BpmnService).model_name,
+        mode,
+        _generation_agent(config, mode),
+        sampling_options(config),
+    )
+
+
+def _bpmn_prompt(description: str, bpmn_xml: str | None) -> str:
+    if bpmn_xml:
+        bpmn_xml = f"Сделай на основе старой диаграммы {bpmn_xml}"
+    else:
+        bpmn_xml = ""
+    return f"{description}.{bpmn_xml}"
+
+
+def _bpmn_edit_prompt(description: str, bpmn_text: str) -> str:
+    return (
+        f"{description}. Измени существующий процесс, сохранив id неизменённых "
+        f"элементов, дорожек и потоков. Текущий процесс:\n{bpmn_text}"
+    )
+
+
+def _bpmn_patch_prompt(description: str, bpmn_text: str) -> str:
+    return (
+        f"{description}. Верни только операции, которые нужно применить "
+        f"к существующему процессу. Текущий процесс:\n{bpmn_text}"
+    )
+
+
+async def _bpmn_from_xml(
+    bpmn_service: BpmnService, description: str, bpmn_xml: str | None
+) -> str:
+    result = await bpmn_service.generate_bpmn(_bpmn_prompt(description, bpmn_xml))
+    return ensure_well_formed(bpmn_postprocess(result["response"]["xml"]))
+
+
+async def _bpmn_from_graph(
+    bpmn_service: BpmnService, description: str, bpmn_xml: str | None
+) -> str:
+    """Generates the process graph and lays it out locally.
+
+    An existing diagram is passed to the model in the compact text encoding
+    of its graph instead of the full XML. The edited graph is applied to the
+    original document, so unchanged elements keep their positions and the
+    details the graph does not carry (event definitions, conditions,
+    documentation and so on). A diagram that cannot be read is passed as XML
+    and laid out from scratch.
+
+    :param bpmn_service: Model service.
+    :param description: Text description of the desired BPMN diagram.
+    :param bpmn_xml: Existing BPMN XML to modify (optional).
+    :return: BPMN XML with the `bpmndi` section computed by the layout engine.
+    :raises GraphError: If the generated graph is inconsistent or cannot be
+        applied to the diagram.
+    """
+    previous = None
+    if bpmn_xml:
+        try:
+            previous = diagram_from_xml(bpmn_xml)
+        except GraphError as e:
+            logger.warning(f"Cannot read the diagram to edit, sending XML: {e}")
+    if bpmn_xml is None or previous is None:
+        result = await bpmn_service.generate_graph(_bpmn_prompt(description, bpmn_xml))
+        return graph_to_xml(validate_graph(result["response"]))
+
+    previous_graph, _ = previous
+    prompt = _bpmn_edit_prompt(description, graph_to_text(previous_graph))
+    result = await bpmn_service.generate_graph(prompt)
+    return apply_graph(bpmn_xml, validate_graph(result["response"]))
+
+
+async def _bpmn_from_patch(
+    bpmn_service: BpmnService, description: str, bpmn_xml: str
+) -> str:
+    """Edits an existing diagram with graph operations generated by the model.
+
+    The model receives the compact text encoding of the process and returns
+    a list of operations, which are applied to the existing XML document.
+    Only the affected part of the layout is recomputed. A diagram that cannot
+    be read is regenerated from XML.
+
+    :param bpmn_service: Model service.
+    :param description: Text description of the change.
+    :param bpmn_xml: Existing BPMN XML to modify.
+    :return: Patched BPMN XML.
+    :raises GraphError: If the operations cannot be applied.
+    """
+    try:
+        graph, _ = diagram_from_xml(bpmn_xml)
+    except GraphError as e:
+        logger.warning(f"Cannot read the diagram to patch, sending XML: {e}")
+        return await _bpmn_from_xml(bpmn_service, description, bpmn_xml)
+    prompt = _bpmn_patch_prompt(description, graph_to_text(graph))
+    result = await bpmn_service.generate_patch(prompt)
+    return apply_patch(bpmn_xml, result["response"])
+
+
+async def _bpmn_generate(
+    bpmn_service: BpmnService, mode: str, description: str, bpmn_xml: str | None
+) -> str:
+    if mode == "patch" and bpmn_xml:
+        return await _bpmn_from_patch(bpmn_service, description, bpmn_xml)
+    if mode == "graph":
+        return await _bpmn_from_graph(bpmn_service, description, bpmn_xml)
+    return await _bpmn_from_xml(bpmn_service, description, bpmn_xml)
+
+
 @inject
 async def _bpmn_create(
     description: str,
@@ -26,6 +186,10 @@ async def _bpmn_create(
 
     Creates or updates a BPMN diagram based on the provided description.
     Can optionally modify an existing diagram if BPMN XML is provided.
+    In graph generation (or edit) mode the model returns the process graph
+    only and the layout is computed locally; in patch edit mode it returns
+    the operations to apply to the existing diagram. Results are cached by
+    content, so repeated requests skip the model.
 
     :param description: Text description of the desired BPMN diagram.
     :param bpmn_xml: Existing BPMN XML to modify (optional).
@@ -33,18 +197,84 @@ async def _bpmn_create(
     :return: Generated BPMN XML as string.
     :raises httpx.HTTPError: If communication with Ollama service fails.
     """
-    if bpmn_xml:
-        bpmn_xml = f"Сделай на основе старой диаграммы {bpmn_xml}"
-    else:
-        bpmn_xml = ""
+    config = container.resolve(Config)
+    cache = container.resolve(BpmnCache)
+    cache_key = _bpmn_cache_key(description, bpmn_xml, container)
+    if config.bpmn_cache_enabled and (cached := await cache.get(cache_key)):
+        mark_cache_hit()
+        return cached
+
+    bpmn_service = container.resolve(BpmnService)
+    mode = _generation_mode(config, bpmn_xml)
+    xml = await _bpmn_generate(bpmn_service, mode, description, bpmn_xml)
+    if config.bpmn_cache_enabled:
+        await cache.set(cache_key, xml)
+    return xml
 
+
+@inject
+async def _bpmn_create_stream(
+    description: str,
+    bpmn_xml: str | None,
+    on_chunk: Callable[[str, int], Awaitable[None]],
+    container: TypedContainer = Depends(init_container),
+) -> str:
+    """Generates BPMN XML from description, reporting partial XML on the way.
+
+    The JSON envelope streamed by the model is decoded incrementally. Decoded
+    XML is passed to `on_chunk` in batches, at most once per configured flush
+    interval, together with the offset of the batch in the document. A cached
+    diagram, as well as a diagram laid out from a generated graph or patched,
+    is passed as a single chunk.
+
+    :param description: Text description of the desired BPMN diagram.
+    :param bpmn_xml: Existing BPMN XML to modify (optional).
+    :param on_chunk: Callback receiving a partial XML chunk and its offset.
+    :param container: Dependency injection container.
+    :return: Generated and validated BPMN XML as string.
+    :raises httpx.HTTPError: If communication with the model service fails.
+    :raises ValueError: If the generated XML or graph is not valid.
+    """
     bpmn_service = container.resolve(BpmnService)
-    prompt = f"{description}.{bpmn_xml}"
-    result = await bpmn_service.generate_bpmn(prompt)
-    return bpmn_postprocess(result["response"]["xml"])
+    config = container.resolve(Config)
+    cache = container.resolve(BpmnCache)
+    cache_key = _bpmn_cache_key(description, bpmn_xml, container)
+    if config.bpmn_cache_enabled and (cached := await cache.get(cache_key)):
+        mark_cache_hit()
+        await on_chunk(cached, 0)
+        return cached
 
+    mode = _generation_mode(config, bpmn_xml)
+    if mode != "xml":
+        xml = await _bpmn_generate(bpmn_service, mode, description, bpmn_xml)
+        await on_chunk(xml, 0)
+        if config.bpmn_cache_enabled:
+            await cache.set(cache_key, xml)
+        return xml
 
-@broker.task(retry_on_error=True)
+    loop = asyncio.get_running_loop()
+    parser = JsonStringFieldParser("xml")
+    pending = ""
+    offset = 0
+    flushed_at = loop.time()
+
+    async for fragment in bpmn_service.stream_bpmn(_bpmn_prompt(description, bpmn_xml)):
+        pending += parser.feed(fragment)
+        if pending and loop.time() - flushed_at >= config.bpmn_stream_flush_interval:
+            await on_chunk(pending, offset)
+            offset += len(pending)
+            pending = ""
+            flushed_at = loop.time()
+    if pending:
+        await on_chunk(pending, offset)
+
+    xml = ensure_well_formed(bpmn_postprocess(parser.value))
+    if config.bpmn_cache_enabled:
+        await cache.set(cache_key, xml)
+    return xml
+
+
+@broker.task(retry_on_error=True, priority=PRIORITY_PIPELINE)
 @inject
 async def pipeline_bpmn_step(
     data: PipelineValue,
@@ -52,8 +282,26 @@ async def pipeline_bpmn_step(
     container: TypedContainer = Depends(init_container),
 ) -> PipelineValue:
     notification_mgr = container.resolve(AsyncManager)
+    config = container.resolve(Config)
+
+    async def _emit_progress(chunk: str, offset: int) -> None:
+        await notification_mgr.emit(
+            "pipeline",
+            {
+                "pipeline_id": data.pipeline_id,
+                "data": {"chunk": chunk, "offset": offset},
+                "step": "bpmn",
+                "status": "progress",
+            },
+            namespace="/",
+            room=data.user_id,
+        )
+
     try:
-        xml = await _bpmn_create(data.value, bpmn_xml)
+        if config.bpmn_streaming:
+            xml = await _bpmn_create_stream(data.value, bpmn_xml, _emit_progress)
+        else:
+            xml = await _bpmn_create(data.value, bpmn_xml)
         await notification_mgr.emit(
             "pipeline",
             {"pipeline_id": data.pipeline_id, "data": {"xml": xml}, "step": "bpmn"},
@@ -79,15 +327,62 @@ async def pipeline_bpmn_step(
         raise
 
 
-@broker.task(retry_on_error=True)
+@broker.task(retry_on_error=True, priority=PRIORITY_INTERACTIVE)
 async def bpmn_create(description: str, bpmn_xml: str | None = None) -> str:
     """Standalone task for BPMN diagram creation.
 
-    Creates BPMN diagram without pipeline integration or notifications.
+    Creates BPMN diagram without pipeline integration or notifications. Run as
+    a job, it streams the XML and reports the progress of the job: the share
+    of the expected size generated so far, the size of the edited diagram or
+    `JOB_EXPECTED_BPMN_SIZE`, capped below completion.
+
+    :param description: Text description of the desired BPMN diagram.
+    :param bpmn_xml: Existing BPMN XML to modify (optional).
+    :return: Generated BPMN XML as string.
+    """
+    if not job_running():
+        return await _bpmn_create(description, bpmn_xml)
+
+    expected_size = len(bpmn_xml) if bpmn_xml else JOB_EXPECTED_BPMN_SIZE
+
+    async def _report_chunk(chunk: str, offset: int) -> None:
+        generated = offset + len(chunk)
+        await report_job_progress(min(0.95, generated / expected_size), generated)
+
+    return await _bpmn_create_stream(description, bpmn_xml, _report_chunk)
+
+
+@broker.task(priority=PRIORITY_INTERACTIVE)
+@inject
+async def bpmn_create_stream(
+    stream_id: str,
+    description: str,
+    bpmn_xml: str | None = None,
+    container: TypedContainer = Depends(init_container),
+) -> str:
+    """Standalone task for BPMN diagram creation with incremental output.
+
+    Publishes partial XML chunks and the final XML to the task stream
+    `stream_id`, so the API can relay them to an HTTP client. The task is not
+    retried, since a consumer cannot rewind an already relayed stream.
 
+    :param stream_id: Identifier of the task stream to publish to.
     :param description: Text description of the desired BPMN diagram.
     :param bpmn_xml: Existing BPMN XML to modify (optional).
+    :param container: Dependency injection container.
     :return: Generated BPMN XML as string.
     """
-    xml = await _bpmn_create(description, bpmn_xml)
+    streams = container.resolve(TaskStreamBus)
+
+    async def _publish_chunk(chunk: str, offset: int) -> None:
+        await streams.publish(stream_id, "chunk", {"chunk": chunk, "offset": offset})
+
+    try:
+        xml = await _bpmn_create_stream(description, bpmn_xml, _publish_chunk)
+    except Exception as e:
+        logger.error("Process bpmn create stream error: ")
+        logger.exception(e)
+        await streams.publish(stream_id, "error", {"detail": "Cannot create BPMN"})
+        raise
+    await streams.publish(stream_id, "done", {"bpmn_xml": xml})
     return xml
@@ -1,52 +1,203 @@
+import json
 import logging
+from collections.abc import Awaitable, Callable
+from typing import Optional
 
 import httpx
 from fast_depends import Depends, inject
 from socketio import AsyncManager
 
+from infra.brokers.admission import mark_cache_hit
+from infra.brokers.jobs import job_running, report_job_progress
 from infra.brokers.taskiq import broker
+from infra.cache.redis import content_key
+from infra.streams.redis import TaskStreamBus
 from logic import TypedContainer, init_container
-from logic.services.base import BpmnService, Suggestion
-from logic.tasks.base import PipelineValue
+from logic.bpmn.canonical import CanonicalBpmn, canonicalize, strip_layout
+from logic.bpmn.validator import validate_bpmn
+from logic.cache import SuggestionsCache
+from logic.services.base import BpmnService, Suggestion, sampling_options
+from logic.tasks.base import (PRIORITY_INTERACTIVE, PRIORITY_PIPELINE,
+                              PipelineValue)
+from settings.config import Config
+from utils.json_stream import JsonArrayItemsParser
 
 logger = logging.getLogger(__name__)
 
 
+def _suggestions_prompt(xml: str) -> str:
+    return (
+        "Проанализируй BPMN процесс в формате xml "
+        "и верни ошибки error и способ эту ошибку исправить correction. "
+        "Структура диаграммы (синтаксис XML, уникальность id, ссылки sourceRef "
+        "и targetRef, связность шлюзов, стартовые и конечные события, разметка "
+        "BPMNDiagram) уже проверена автоматически, не повторяй эти проверки. "
+        "Найди только смысловые и логические ошибки процесса.\n"
+        f"BPMN XML: {xml}"
+    )
+
+
+def _suggestions_cache_key(canonical: CanonicalBpmn, container: TypedContainer) -> str:
+    config = container.resolve(Config)
+    return content_key(
+        canonical.xml,
+        container.resolve(BpmnService).model_name,
+        config.suggestions_agent,
+        _suggestions_prompt(""),
+        sampling_options(config),
+    )
+
+
+async def _get_cached_suggestions(
+    canonical: CanonicalBpmn, container: TypedContainer
+) -> Optional[list[Suggestion]]:
+    cache = container.resolve(SuggestionsCache)
+    cached = await cache.get(_suggestions_cache_key(canonical, container))
+    if cached is None:
+        return None
+    mark_cache_hit()
+    return [
+        Suggestion(
+            error=canonical.from_canonical_text(suggestion["error"]),
+            correction=canonical.from_canonical_text(suggestion["correction"]),
+        )
+        for suggestion in json.loads(cached)
+    ]
+
+
+async def _cache_suggestions(
+    canonical: CanonicalBpmn,
+    suggestions: list[Suggestion],
+    container: TypedContainer,
+) -> None:
+    cache = container.resolve(SuggestionsCache)
+    canonical_suggestions = [
+        Suggestion(
+            error=canonical.to_canonical_text(suggestion["error"]),
+            correction=canonical.to_canonical_text(suggestion["correction"]),
+        )
+        for suggestion in suggestions
+    ]
+    await cache.set(
+        _suggestions_cache_key(canonical, container),
+        json.dumps(canonical_suggestions, ensure_ascii=False),
+    )
+
+
 @inject
 async def _bpmn_validate(
-    xml: str, container: TypedContainer = Depends(init_container)
+    xml: str,
+    on_structural: Optional[Callable[[list[Suggestion]], Awaitable[None]]] = None,
+    container: TypedContainer = Depends(init_container),
 ) -> list[Suggestion]:
     """Validates BPMN XML and generates improvement suggestions.
 
-    Analyzes the provided BPMN diagram and returns a list of suggestions
-    containing errors and their potential corrections.
+    Structural problems are found by the local validator first and reported
+    through `on_structural` before the model is called. The model is asked for
+    semantic issues only and receives the diagram without its layout; it is
+    skipped altogether when the XML is malformed. Model suggestions are cached
+    on the canonical form of the diagram, so layout-only edits skip the model.
 
     :param xml: BPMN diagram in XML format to analyze.
+    :param on_structural: Callback receiving the structural suggestions.
     :param container: Dependency injection container.
     :return: List of Suggestion objects containing errors and corrections.
     :raises httpx.HTTPError: If communication with Ollama service fails.
     """
+    structural = validate_bpmn(xml)
+    if on_structural:
+        await on_structural(structural)
+    canonical = canonicalize(xml)
+    if canonical is None:
+        return structural
+
+    cache_enabled = container.resolve(Config).suggestions_cache_enabled
+    cached = (
+        await _get_cached_suggestions(canonical, container) if cache_enabled else None
+    )
+    if cached is not None:
+        return [*structural, *cached]
+
     bpmn_service = container.resolve(BpmnService)
-    prompt = (
-        "Проанализируй BPMN диаграмму для bpmn-js в формате xml"
-        "и верни ошибки error и способ эту ошибку исправить correction."
-        f"BPMN XML: {xml}"
+    suggest_data = await bpmn_service.get_suggestions(
+        _suggestions_prompt(strip_layout(xml))
     )
-    suggest_data = await bpmn_service.get_suggestions(prompt)
     suggestions_objects: list[Suggestion] = suggest_data["response"]
 
-    return suggestions_objects
+    if cache_enabled:
+        await _cache_suggestions(canonical, suggestions_objects, container)
+    return [*structural, *suggestions_objects]
+
+
+@inject
+async def _bpmn_validate_stream(
+    xml: str,
+    on_suggestion: Callable[[Suggestion], Awaitable[None]],
+    container: TypedContainer = Depends(init_container),
+) -> list[Suggestion]:
+    """Validates BPMN XML, reporting every suggestion as soon as it is complete.
+
+    Structural suggestions of the local validator are reported first, followed
+    by the semantic suggestions of the model as it completes them.
+
+    :param xml: BPMN diagram in XML format to analyze.
+    :param on_suggestion: Callback receiving each completed suggestion.
+    :param container: Dependency injection container.
+    :return: List of Suggestion objects containing errors and corrections.
+    :raises httpx.HTTPError: If communication with the model service fails.
+    """
+    structural = validate_bpmn(xml)
+    for suggestion in structural:
+        await on_suggestion(suggestion)
+    canonical = canonicalize(xml)
+    if canonical is None:
+        return structural
+
+    cache_enabled = container.resolve(Config).suggestions_cache_enabled
+    cached = (
+        await _get_cached_suggestions(canonical, container) if cache_enabled else None
+    )
+    if cached is not None:
+        for suggestion in cached:
+            await on_suggestion(suggestion)
+        return [*structural, *cached]
+
+    bpmn_service = container.resolve(BpmnService)
+    parser = JsonArrayItemsParser()
+    prompt = _suggestions_prompt(strip_layout(xml))
+    async for fragment in bpmn_service.stream_suggestions(prompt):
+        for suggestion in parser.feed(fragment):
+            await on_suggestion(suggestion)
+    suggestions: list[Suggestion] = parser.items
+
+    if cache_enabled:
+        await _cache_suggestions(canonical, suggestions, container)
+    return [*structural, *suggestions]
 
 
-@broker.task(retry_on_error=True)
+@broker.task(retry_on_error=True, priority=PRIORITY_PIPELINE)
 @inject
 async def pipeline_bpmn_suggestions_step(
     data: PipelineValue,
     container: TypedContainer = Depends(init_container),
 ) -> PipelineValue:
     notification_mgr = container.resolve(AsyncManager)
+
+    async def _emit_structural(suggestions: list[Suggestion]) -> None:
+        await notification_mgr.emit(
+            "pipeline",
+            {
+                "pipeline_id": data.pipeline_id,
+                "data": {"suggestions": suggestions},
+                "step": "suggestions",
+                "status": "partial",
+            },
+            namespace="/",
+            room=data.user_id,
+        )
+
     try:
-        suggestions = await _bpmn_validate(data.value)
+        suggestions = await _bpmn_validate(data.value, _emit_structural)
         await notification_mgr.emit(
             "pipeline",
             {
@@ -76,13 +227,60 @@ async def pipeline_bpmn_suggestions_step(
         raise
 
 
-@broker.task(retry_on_error=True)
+@broker.task(retry_on_error=True, priority=PRIORITY_INTERACTIVE)
 async def bpmn_get_suggestions(context: str) -> list[Suggestion]:
     """Standalone task for BPMN validation.
 
-    Validates BPMN diagram without pipeline integration or notifications.
+    Validates BPMN diagram without pipeline integration or notifications. Run
+    as a job, it streams the suggestions and reports their number so far as
+    the progress of the job; the share of the work done is not known.
+
+    :param context: BPMN diagram in XML format to validate.
+    :return: List of Suggestion objects containing errors and corrections.
+    """
+    if not job_running():
+        return await _bpmn_validate(context)
+
+    count = 0
+
+    async def _report_suggestion(suggestion: Suggestion) -> None:
+        nonlocal count
+        count += 1
+        await report_job_progress(None, count)
+
+    return await _bpmn_validate_stream(context, _report_suggestion)
+
+
+@broker.task(priority=PRIORITY_INTERACTIVE)
+@inject
+async def bpmn_get_suggestions_stream(
+    stream_id: str,
+    context: str,
+    container: TypedContainer = Depends(init_container),
+) -> list[Suggestion]:
+    """Standalone task for BPMN validation with incremental output.
+
+    Publishes every suggestion as soon as the model completes it, then the
+    full list, to the task stream `stream_id`.
 
+    :param stream_id: Identifier of the task stream to publish to.
     :param context: BPMN diagram in XML format to validate.
+    :param container: Dependency injection container.
     :return: List of Suggestion objects containing errors and corrections.
     """
-    return await _bpmn_validate(context)
+    streams = container.resolve(TaskStreamBus)
+
+    async def _publish_suggestion(suggestion: Suggestion) -> None:
+        await streams.publish(stream_id, "suggestion", suggestion)
+
+    try:
+        suggestions = await _bpmn_validate_stream(context, _publish_suggestion)
+    except Exception as e:
+        logger.error("Process suggestions stream error: ")
+        logger.exception(e)
+        await streams.publish(
+            stream_id, "error", {"detail": "Cannot get BPMN suggestions"}
+        )
+        raise
+    await streams.publish(stream_id, "done", {"suggestions": suggestions})
+    return suggestions
@@ -1,38 +1,173 @@
-import base64
+import asyncio
 import logging
+from collections.abc import Awaitable, Callable
+from typing import Optional
 
 import httpx
 from fast_depends import Depends, inject
 from socketio import AsyncManager
 
+from infra.audio.ffmpeg import FfmpegTranscoder
+from infra.audio.wav import seal_wav, slice_wav, wav_duration
+from infra.blobs.base import BlobStore
 from infra.brokers.taskiq import broker
+from infra.cache.redis import content_key
 from logic import TypedContainer, init_container
+from logic.audio.segments import plan_segments, stitch_transcripts
+from logic.cache import TranscriptCache
 from logic.services.xinference import XinferenceService
-from logic.tasks.base import PipelineValue
+from logic.tasks.base import (PRIORITY_INTERACTIVE, PRIORITY_PIPELINE,
+                              PipelineValue)
+from logic.tasks.webm_convert import convert_blob
+from settings.config import Config
 
 logger = logging.getLogger(__name__)
 
 
+SegmentCallback = Callable[[int, int, str], Awaitable[None]]
+
+
+def _transcript_cache_key(audio_ref: str, config: Config) -> str:
+    # The duration limit decides which recordings are rejected, so a cached
+    # transcript must not outlive a change of the limit.
+    return content_key(
+        audio_ref,
+        config.xinference_model,
+        config.upload_max_duration,
+        config.stt_segment_seconds,
+        config.stt_segment_max_seconds,
+        config.stt_segment_overlap,
+        config.stt_silence_noise_db,
+        config.stt_silence_min_seconds,
+    )
+
+
+@inject
+async def cached_transcript(
+    audio_ref: str, container: TypedContainer = Depends(init_container)
+) -> Optional[str]:
+    """Looks up the transcript of an uploaded recording.
+
+    :param audio_ref: Blob reference of the raw upload.
+    :param container: Dependency injection container.
+    :return: Cached transcript, or None on a miss or with the cache disabled.
+    """
+    config = container.resolve(Config)
+    if not config.transcript_cache_enabled:
+        return None
+    return await container.resolve(TranscriptCache).get(
+        _transcript_cache_key(audio_ref, config)
+    )
+
+
+@inject
+async def cache_transcript(
+    audio_ref: str, text: str, container: TypedContainer = Depends(init_container)
+) -> None:
+    """Stores the transcript of an uploaded recording. Empty transcripts,
+    usually of silence or noise, are not cached.
+
+    :param audio_ref: Blob reference of the raw upload.
+    :param text: Transcript of the recording.
+    :param container: Dependency injection container.
+    :return: None
+    """
+    config = container.resolve(Config)
+    if config.transcript_cache_enabled and text:
+        await container.resolve(TranscriptCache).set(
+            _transcript_cache_key(audio_ref, config), text
+        )
+
+
+async def split_audio(audio: bytes, container: TypedContainer) -> list[bytes]:
+    """Splits a long recording into overlapping segments cut at silences.
+
+    Recordings not longer than the maximum segment length are returned
+    whole. Segments are encoded in the configured STT audio format.
+
+    :param audio: Converted recording, 16 kHz mono WAV or FLAC.
+    :param container: Dependency injection container.
+    :return: Audio files of the segments, in order.
+    :raises TranscodeError: If decoding or silence detection fails.
+    """
+    config = container.resolve(Config)
+    transcoder = container.resolve(FfmpegTranscoder)
+    wav = audio
+    if audio[:4] != b"RIFF":
+        wav = seal_wav(await transcoder.transcode(audio, ["-f", "wav"]))
+    duration = wav_duration(wav)
+    if duration <= config.stt_segment_max_seconds:
+        return [audio]
+
+    silences = await transcoder.detect_silences(
+        wav, config.stt_silence_noise_db, config.stt_silence_min_seconds
+    )
+    segments = plan_segments(
+        duration,
+        silences,
+        config.stt_segment_seconds,
+        config.stt_segment_max_seconds,
+        config.stt_segment_overlap,
+    )
+    logger.info(f"Split {duration:.0f}s of audio into {len(segments)} segments")
+    parts = [slice_wav(wav, segment.start, segment.end) for segment in segments]
+    if config.stt_audio_format == "flac":
+        parts = await asyncio.gather(
+            *(
+                transcoder.transcode(part, ["-c:a", "flac", "-f", "flac"], "wav")
+                for part in parts
+            )
+        )
+    return parts
+
+
 @inject
 async def process_stt(
-    b64_content: str, container: TypedContainer = Depends(init_container)
+    ref: str,
+    on_segment: Optional[SegmentCallback] = None,
+    container: TypedContainer = Depends(init_container),
 ) -> str:
-    """Converts base64 encoded audio to text using Xinference service.
+    """Converts stored audio to text using Xinference service.
 
-    Decodes the base64 audio content and processes it through the
-    speech-to-text model.
+    Long recordings are split into segments transcribed concurrently, at most
+    one per model replica, and stitched back in order.
 
-    :param content: Base64 encoded audio content.
+    :param ref: Blob reference of the audio.
+    :param on_segment: Called in order with the segment index, the number of
+        segments and the transcript so far, when there is more than one.
     :param container: Dependency injection container.
     :return: Extracted text from the audio.
+    :raises BlobNotFoundError: If the audio blob has expired.
     :raises httpx.HTTPError: If communication with Xinference service fails.
     """
-    raw_data = base64.b64decode(b64_content)
+    raw_data = await container.resolve(BlobStore).get(ref)
     xinf_sevice = container.resolve(XinferenceService)
-    return await xinf_sevice.speach_to_text(raw_data)
+    parts = await split_audio(raw_data, container)
+    if len(parts) == 1:
+        return await xinf_sevice.speach_to_text(parts[0])
+
+    slots = asyncio.Semaphore(
+        max(1, container.resolve(Config).xinference_model_replica)
+    )
+
+    async def _transcribe(part: bytes) -> str:
+        async with slots:
+            return await xinf_sevice.speach_to_text(part)
+
+    tasks = [asyncio.ensure_future(_transcribe(part)) for part in parts]
+    texts: list[str] = []
+    try:
+        for index, task in enumerate(tasks):
+            texts.append(await task)
+            if on_segment:
+                await on_segment(index, len(tasks), stitch_transcripts(texts))
+    finally:
+        for task in tasks:
+            task.cancel()
+    return stitch_transcripts(texts)
 
 
-@broker.task(retry_on_error=True)
+@broker.task(retry_on_error=True, priority=PRIORITY_PIPELINE)
 @inject
 async def pipeline_stt_step(
     data: PipelineValue,
@@ -40,8 +175,26 @@ async def pipeline_stt_step(
 ) -> PipelineValue:
     notification_mgr = container.resolve(AsyncManager)
 
+    async def _emit_segment(index: int, count: int, text: str) -> None:
+        await notification_mgr.emit(
+            "pipeline",
+            {
+                "pipeline_id": data.pipeline_id,
+                "data": {"text": text, "segment": index, "segments": count},
+                "step": "stt",
+                "status": "partial",
+            },
+            namespace="/",
+            room=data.user_id,
+        )
+
     try:
-        text = await process_stt(data.value)
+        if data.transcript is not None:
+            text = data.transcript
+        else:
+            text = await process_stt(data.value, _emit_segment)
+            if data.audio_ref:
+                await cache_transcript(data.audio_ref, text)
         await notification_mgr.emit(
             "pipeline",
             {"pipeline_id": data.pipeline_id, "data": {"text": text}, "step": "stt"},
@@ -68,14 +221,30 @@ async def pipeline_stt_step(
         raise
 
 
-@broker.task(retry_on_error=True)
-async def stt(content: str) -> str:
+@broker.task(retry_on_error=True, priority=PRIORITY_INTERACTIVE)
+async def stt(ref: str) -> str:
     """Standalone task for speech-to-text conversion.
 
     Converts audio to text without pipeline integration or notifications.
 
-    :param content: Base64 encoded audio content.
+    :param ref: Blob reference of the audio.
+    :return: Extracted text from the audio.
+    """
+    text = await process_stt(ref)
+    return text
+
+
+@broker.task(retry_on_error=True, priority=PRIORITY_INTERACTIVE)
+async def audio_to_text(ref: str) -> str:
+    """Standalone task converting and transcribing a recording.
+
+    Runs the conversion and the speech-to-text in one worker, so the
+    converted audio never returns to the caller and the caller waits for a
+    single result. The transcript is cached for the raw upload.
+
+    :param ref: Blob reference of the raw recording.
     :return: Extracted text from the audio.
     """
-    text = await process_stt(content)
+    text = await process_stt(await convert_blob(ref))
+    await cache_transcript(ref, text)
     return text
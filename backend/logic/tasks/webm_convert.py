@@ -1,40 +1,92 @@
-import base64
-import io
 import logging
 
 import httpx
 from fast_depends import Depends, inject
-from pydub import AudioSegment
 from socketio import AsyncManager
 
+from infra.audio.ffmpeg import FfmpegTranscoder
+from infra.audio.wav import is_pcm_wav, seal_wav, wav_duration
+from infra.blobs.base import BlobStore
 from infra.brokers.taskiq import broker
 from logic import TypedContainer, init_container
-from logic.tasks.base import PipelineValue
+from logic.audio.format import CHANNELS, PCM_ARGS, SAMPLE_RATE
+from logic.tasks.base import (PRIORITY_INTERACTIVE, PRIORITY_PIPELINE,
+                              PipelineValue)
+from settings.config import Config
 
 logger = logging.getLogger(__name__)
 
 
-def process_webm_convert(b64_content: str) -> str:
-    """Converts WebM audio to base64-encoded WAV format.
+class AudioTooLongError(ValueError):
+    """Raised when a recording exceeds the configured maximum duration."""
 
-    Processes the input WebM audio bytes, converts to WAV format,
-    and returns as base64 encoded string.
 
-    :param content: Raw bytes of WebM audio file.
-    :return: Base64 encoded WAV audio content.
-    :raises Exception: If audio conversion fails.
+async def process_webm_convert(
+    content: bytes,
+    transcoder: FfmpegTranscoder,
+    max_duration: float,
+    audio_format: str = "wav",
+) -> bytes:
+    """Converts a recording to the input format of Whisper.
+
+    The recording (WebM, Ogg/Opus, WAV, MP3 or any other format ffmpeg
+    detects) is downmixed and resampled to 16 kHz mono 16-bit PCM, which is
+    what Whisper works on. A WAV file already in that format skips the
+    transcoding. The recording is cut one second past `max_duration`, so an
+    overlong upload is rejected without decoding all of it.
+
+    :param content: Raw bytes of the recording.
+    :param transcoder: Runner of the ffmpeg subprocesses.
+    :param max_duration: Maximum duration of the recording in seconds.
+    :param audio_format: Output format, `wav` or lossless `flac`.
+    :return: Raw bytes of the converted audio file.
+    :raises AudioTooLongError: If the recording is longer than `max_duration`.
+    :raises TranscodeError: If audio conversion fails.
+    """
+    if is_pcm_wav(content, SAMPLE_RATE, CHANNELS):
+        wav = content
+    else:
+        wav = seal_wav(
+            await transcoder.transcode(
+                content, ["-t", f"{max_duration + 1:g}", *PCM_ARGS, "-f", "wav"]
+            )
+        )
+    if wav_duration(wav) > max_duration:
+        raise AudioTooLongError(
+            f"Recording is longer than the limit of {max_duration:.0f}s"
+        )
+    if audio_format == "flac":
+        return await transcoder.transcode(
+            wav, ["-c:a", "flac", "-f", "flac"], input_format="wav"
+        )
+    return wav
+
+
+@inject
+async def convert_blob(
+    ref: str, container: TypedContainer = Depends(init_container)
+) -> str:
+    """Converts a recording blob to a blob in the input format of Whisper.
+
+    :param ref: Blob reference of the recording.
+    :param container: Dependency injection container.
+    :return: Blob reference of the converted audio.
+    :raises BlobNotFoundError: If the recording blob has expired.
+    :raises AudioTooLongError: If the recording exceeds the configured duration.
+    :raises TranscodeError: If audio conversion fails.
     """
-    decoded = base64.b64decode(b64_content)
-    webm_buf = io.BytesIO(decoded)
-    audio = AudioSegment.from_file(webm_buf, format="webm")
-    wav_buf = io.BytesIO()
-    audio.export(wav_buf, format="wav")
-    wav_buf.seek(0)
-    encoded_content = base64.b64encode(wav_buf.getvalue()).decode("utf-8")
-    return encoded_content
+    config = container.resolve(Config)
+    blobs = container.resolve(BlobStore)
+    audio = await process_webm_convert(
+        await blobs.get(ref),
+        container.resolve(FfmpegTranscoder),
+        config.upload_max_duration,
+        config.stt_audio_format,
+    )
+    return await blobs.put(audio)
 
 
-@broker.task(retry_on_error=True)
+@broker.task(retry_on_error=True, priority=PRIORITY_PIPELINE)
 @inject
 async def pipeline_webm_covert_step(
     data: PipelineValue,
@@ -43,9 +95,12 @@ async def pipeline_webm_covert_step(
     notification_mgr = container.resolve(AsyncManager)
 
     try:
-        encoded_content = process_webm_convert(data.value)
+        audio_ref = await convert_blob(data.value)
         return PipelineValue(
-            value=encoded_content, user_id=data.user_id, pipeline_id=data.pipeline_id
+            value=audio_ref,
+            user_id=data.user_id,
+            pipeline_id=data.pipeline_id,
+            audio_ref=data.audio_ref,
         )
     except Exception as e:
         logger.error("Process webm convert error: ")
@@ -63,14 +118,13 @@ async def pipeline_webm_covert_step(
         raise
 
 
-@broker.task(retry_on_error=True)
-async def webm_convert(b64_content: str) -> str:
-    """Standalone task for WebM audio conversion.
+@broker.task(retry_on_error=True, priority=PRIORITY_INTERACTIVE)
+async def webm_convert(ref: str) -> str:
+    """Standalone task for audio conversion.
 
-    Converts WebM to base64-encoded WAV without pipeline integration.
+    Converts a recording to 16 kHz mono audio without pipeline integration.
 
-    :param content: Raw bytes of WebM audio file.
-    :return: Base64 encoded WAV audio content.
+    :param ref: Blob reference of the recording.
+    :return: Blob reference of the converted audio.
     """
-    encoded_content = process_webm_convert(b64_content)
-    return encoded_content
+    return await convert_blob(ref)
@@ -1,4 +1,4 @@
-from typing import Annotated, Optional
+from typing import Annotated, Literal, Optional
 
 from pydantic import AfterValidator, BeforeValidator, Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -70,10 +70,55 @@ class Config(BaseSettings):
     rabbitmq_username: str = Field("root", alias="RABBITMQ_USERNAME")
     rabbitmq_host: str = Field("rabbitmq", alias="RABBITMQ_HOST")
     rabbitmq_port: int = Field(5672, alias="RABBITMQ_PORT")
+    broker_queue: str = Field("taskiq", alias="BROKER_QUEUE")
+    broker_max_priority: int = Field(10, alias="BROKER_MAX_PRIORITY")
+    broker_prefetch: int = Field(10, alias="BROKER_PREFETCH")
+    result_fallback_poll_interval: float = Field(
+        5.0, alias="RESULT_FALLBACK_POLL_INTERVAL"
+    )
+    result_ttl: int = Field(86400, alias="RESULT_TTL")
+
+    # Admission control
+    admission_enabled: bool = Field(True, alias="ADMISSION_ENABLED")
+    admission_capacity: int = Field(4, alias="ADMISSION_CAPACITY")
+    admission_user_max_inflight: int = Field(2, alias="ADMISSION_USER_MAX_INFLIGHT")
+    admission_lease_ttl: int = Field(600, alias="ADMISSION_LEASE_TTL")
+    admission_service_time: float = Field(20.0, alias="ADMISSION_SERVICE_TIME")
+    admission_ewma_alpha: float = Field(0.2, alias="ADMISSION_EWMA_ALPHA")
+    admission_stats_ttl: int = Field(3600, alias="ADMISSION_STATS_TTL")
+    bpmn_request_timeout: float = Field(60.0, alias="BPMN_REQUEST_TIMEOUT")
+    job_deadline: float = Field(600.0, alias="JOB_DEADLINE")
+
+    # Blob store
+    blob_store: Literal["local", "redis"] = Field("redis", alias="BLOB_STORE")
+    blob_store_path: str = Field("/var/lib/bpmn-builder/blobs", alias="BLOB_STORE_PATH")
+    blob_ttl: int = Field(3600, alias="BLOB_TTL")
+    blob_purge_cron: str = Field("*/10 * * * *", alias="BLOB_PURGE_CRON")
+
+    # Audio uploads
+    upload_max_bytes: int = Field(200 * 1024 * 1024, alias="UPLOAD_MAX_BYTES")
+    upload_max_duration: float = Field(3600.0, alias="UPLOAD_MAX_DURATION")
+    upload_chunk_size: int = Field(1024 * 1024, alias="UPLOAD_CHUNK_SIZE")
+
+    # Audio transcoding
+    ffmpeg_path: str = Field("ffmpeg", alias="FFMPEG_PATH")
+    ffmpeg_max_concurrency: int = Field(2, alias="FFMPEG_MAX_CONCURRENCY")
+    ffmpeg_timeout: float = Field(300.0, alias="FFMPEG_TIMEOUT")
+    stt_audio_format: Literal["wav", "flac"] = Field("wav", alias="STT_AUDIO_FORMAT")
 
     # Main model options
     require_models: bool = Field(True, alias="REQUIRE_MODELS")
 
+    # HTTP client pool
+    http_max_connections: int = Field(100, alias="HTTP_MAX_CONNECTIONS")
+    http_max_keepalive_connections: int = Field(
+        20, alias="HTTP_MAX_KEEPALIVE_CONNECTIONS"
+    )
+    http_keepalive_expiry: float = Field(30.0, alias="HTTP_KEEPALIVE_EXPIRY")
+    http_connect_timeout: float = Field(5.0, alias="HTTP_CONNECT_TIMEOUT")
+    http_default_timeout: float = Field(10.0, alias="HTTP_DEFAULT_TIMEOUT")
+    http_health_timeout: float = Field(10.0, alias="HTTP_HEALTH_TIMEOUT")
+
     # Xinference
     xinference_url: str = Field("http://xinference:9997", alias="XINFERENCE_API_URL")
     xinference_model: str = Field("whisper-large-v3-turbo", alias="XINFERENCE_MODEL")
@@ -81,10 +126,26 @@ class Config(BaseSettings):
     xinference_n_gpu: Annotated[
         Optional[str], BeforeValidator(lambda x: None if x == "" else x)
     ] = Field(None, alias="XINFERENCE_N_GPU")
+    xinference_stt_timeout: float = Field(10.0, alias="XINFERENCE_STT_TIMEOUT")
+    stt_segment_seconds: float = Field(30.0, alias="STT_SEGMENT_SECONDS")
+    stt_segment_max_seconds: float = Field(45.0, alias="STT_SEGMENT_MAX_SECONDS")
+    stt_segment_overlap: float = Field(1.0, alias="STT_SEGMENT_OVERLAP")
+    stt_silence_noise_db: float = Field(-35.0, alias="STT_SILENCE_NOISE_DB")
+    stt_silence_min_seconds: float = Field(0.4, alias="STT_SILENCE_MIN_SECONDS")
+    stt_upload_timeout: float = Field(300.0, alias="STT_UPLOAD_TIMEOUT")
+    stt_stream_window_seconds: float = Field(10.0, alias="STT_STREAM_WINDOW_SECONDS")
+    transcript_cache_enabled: bool = Field(True, alias="TRANSCRIPT_CACHE_ENABLED")
+    transcript_cache_ttl: int = Field(86400, alias="TRANSCRIPT_CACHE_TTL")
+    transcript_cache_max_entries: int = Field(
+        1000, alias="TRANSCRIPT_CACHE_MAX_ENTRIES"
+    )
 
     # ollama
     ollama_url: str = Field("http://ollama:11434", alias="OLLAMA_URL")
     ollama_model: str = Field("gemma3:1b", alias="OLLAMA_MODEL")
+    ollama_generate_timeout: Annotated[
+        Optional[float], BeforeValidator(lambda x: None if x == "" else x)
+    ] = Field(None, alias="OLLAMA_GENERATE_TIMEOUT")
 
     # openai
     use_openai: bool = Field(default=False, alias="USE_OPENAI")
@@ -94,7 +155,62 @@ class Config(BaseSettings):
     openai_chat_completions_endpoint: str = Field(
         default="/chat/completions", alias="OPENAI_CHAT_COMPLETIONS_ENDPOINT"
     )
+    openai_http2: bool = Field(default=True, alias="OPENAI_HTTP2")
+    openai_timeout: float = Field(default=120.0, alias="OPENAI_TIMEOUT")
+    openai_max_retries: int = Field(default=2, alias="OPENAI_MAX_RETRIES")
+
+    # llm backend pool
+    llm_backends: str = Field("", alias="LLM_BACKENDS")
+    llm_routing: Literal["least_outstanding", "ewma"] = Field(
+        "ewma", alias="LLM_ROUTING"
+    )
+    llm_latency_ewma_alpha: float = Field(0.3, alias="LLM_LATENCY_EWMA_ALPHA")
+    llm_eject_failures: int = Field(3, alias="LLM_EJECT_FAILURES")
+    llm_eject_seconds: float = Field(30.0, alias="LLM_EJECT_SECONDS")
+    llm_models_refresh: float = Field(30.0, alias="LLM_MODELS_REFRESH")
+
+    # upstream failure handling
+    circuit_failure_threshold: int = Field(5, alias="CIRCUIT_FAILURE_THRESHOLD")
+    circuit_recovery_time: float = Field(30.0, alias="CIRCUIT_RECOVERY_TIME")
+    circuit_half_open_calls: int = Field(1, alias="CIRCUIT_HALF_OPEN_CALLS")
+    retry_budget_ratio: float = Field(0.2, alias="RETRY_BUDGET_RATIO")
+    retry_budget_max: float = Field(10.0, alias="RETRY_BUDGET_MAX")
+    upstream_stats_ttl: int = Field(600, alias="UPSTREAM_STATS_TTL")
+
+    # llm sampling
+    llm_temperature: float = Field(0.7, alias="LLM_TEMPERATURE")
+    llm_top_p: float = Field(0.9, alias="LLM_TOP_P")
+    llm_top_k: int = Field(40, alias="LLM_TOP_K")
+    llm_num_ctx: int = Field(16384, alias="LLM_NUM_CTX")
+    llm_deterministic: bool = Field(False, alias="LLM_DETERMINISTIC")
+    llm_seed: int = Field(42, alias="LLM_SEED")
+    llm_coalesce_enabled: bool = Field(True, alias="LLM_COALESCE_ENABLED")
+    llm_coalesce_lock_ttl: int = Field(300, alias="LLM_COALESCE_LOCK_TTL")
+    llm_coalesce_result_ttl: float = Field(2.0, alias="LLM_COALESCE_RESULT_TTL")
+    llm_coalesce_poll_interval: float = Field(0.5, alias="LLM_COALESCE_POLL_INTERVAL")
+
+    # bpmn generation
+    bpmn_generation_mode: Literal["xml", "graph"] = Field(
+        "xml", alias="BPMN_GENERATION_MODE"
+    )
+    bpmn_edit_mode: Literal["xml", "graph", "patch"] = Field(
+        "xml", alias="BPMN_EDIT_MODE"
+    )
+    bpmn_streaming: bool = Field(True, alias="BPMN_STREAMING")
+    bpmn_stream_flush_interval: float = Field(0.3, alias="BPMN_STREAM_FLUSH_INTERVAL")
+    bpmn_stream_idle_timeout: float = Field(60.0, alias="BPMN_STREAM_IDLE_TIMEOUT")
+    bpmn_stream_heartbeat: float = Field(15.0, alias="BPMN_STREAM_HEARTBEAT")
+    bpmn_cache_enabled: bool = Field(True, alias="BPMN_CACHE_ENABLED")
+    bpmn_cache_ttl: int = Field(86400, alias="BPMN_CACHE_TTL")
+    bpmn_cache_max_entries: int = Field(1000, alias="BPMN_CACHE_MAX_ENTRIES")
+    suggestions_cache_enabled: bool = Field(True, alias="SUGGESTIONS_CACHE_ENABLED")
+    suggestions_cache_ttl: int = Field(86400, alias="SUGGESTIONS_CACHE_TTL")
+    suggestions_cache_max_entries: int = Field(
+        5000, alias="SUGGESTIONS_CACHE_MAX_ENTRIES"
+    )
 
     # agents
     generate_bpmn_agent: str = Field("", alias="GENERATE_BPMN_AGENT")
+    generate_bpmn_graph_agent: str = Field("", alias="GENERATE_BPMN_GRAPH_AGENT")
+    edit_bpmn_patch_agent: str = Field("", alias="EDIT_BPMN_PATCH_AGENT")
     suggestions_agent: str = Field("", alias="SUGGESTIONS_AGENT")
@@ -0,0 +1,41 @@
+import io
+import wave
+
+from infra.audio.wav import is_pcm_wav, seal_wav, slice_wav, wav_duration
+
+
+def _wav(seconds: float, rate: int = 16000, channels: int = 1) -> bytes:
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as file:
+        file.setnchannels(channels)
+        file.setsampwidth(2)
+        file.setframerate(rate)
+        file.writeframes(b"\0\0" * channels * int(rate * seconds))
+    return buffer.getvalue()
+
+
+def test_seal_piped_wav() -> None:
+    content = _wav(1.5, rate=48000, channels=2)
+    piped = content[:4] + b"\xff" * 4 + content[8:40] + b"\xff" * 4 + content[44:]
+
+    sealed = seal_wav(piped)
+
+    assert sealed == content
+    assert wav_duration(sealed) == 1.5
+    with wave.open(io.BytesIO(sealed)) as file:
+        assert file.getnframes() == 72000
+
+
+def test_is_pcm_wav() -> None:
+    assert is_pcm_wav(_wav(0.5), 16000, 1)
+    assert not is_pcm_wav(_wav(0.5, rate=48000, channels=2), 16000, 1)
+    assert not is_pcm_wav(_wav(0.5)[:100], 16000, 1)
+    assert not is_pcm_wav(b"\x1aE\xdf\xa3webm", 16000, 1)
+
+
+def test_slice_wav() -> None:
+    part = slice_wav(_wav(3.0), 1.0, 2.5)
+
+    assert wav_duration(part) == 1.5
+    assert is_pcm_wav(part, 16000, 1)
+    assert wav_duration(slice_wav(_wav(3.0), 2.0, 10.0)) == 1.0
@@ -0,0 +1,58 @@
+import os
+import time
+from pathlib import Path
+
+import pytest
+
+from infra.blobs.base import BlobNotFoundError, blob_ref
+from infra.blobs.local import LocalBlobStore
+
+
+@pytest.mark.asyncio
+async def test_local_blob_store_round_trip(tmp_path: Path) -> None:
+    store = LocalBlobStore(root=tmp_path, ttl=60)
+
+    ref = await store.put(b"audio")
+
+    assert ref == blob_ref(b"audio")
+    assert await store.put(b"audio") == ref
+    assert await store.get(ref) == b"audio"
+    await store.delete(ref)
+    with pytest.raises(BlobNotFoundError):
+        await store.get(ref)
+    with pytest.raises(BlobNotFoundError):
+        await store.get("../../etc/passwd")
+
+
+@pytest.mark.asyncio
+async def test_local_blob_store_expiry(tmp_path: Path) -> None:
+    store = LocalBlobStore(root=tmp_path, ttl=60)
+    old, fresh = await store.put(b"old"), await store.put(b"fresh")
+    stale = time.time() - 120
+    os.utime(store.path(old), (stale, stale))
+
+    with pytest.raises(BlobNotFoundError):
+        await store.get(old)
+    assert await store.purge() == 1
+    assert not store.path(old).exists()
+    assert await store.get(fresh) == b"fresh"
+
+
+@pytest.mark.asyncio
+async def test_local_blob_writer(tmp_path: Path) -> None:
+    store = LocalBlobStore(root=tmp_path, ttl=60)
+    writer = store.writer()
+
+    for chunk in (b"au", b"di", b"o"):
+        await writer.write(chunk)
+    ref = await writer.commit()
+
+    assert writer.size == 5
+    assert ref == blob_ref(b"audio")
+    assert await store.get(ref) == b"audio"
+    assert await store.writer().commit() == blob_ref(b"")
+
+    aborted = store.writer()
+    await aborted.write(b"partial")
+    await aborted.abort()
+    assert not any((tmp_path / ".tmp").iterdir())
@@ -0,0 +1,186 @@
+from typing import Any, Optional
+
+import pytest
+from taskiq import TaskiqMessage, TaskiqResult
+
+from infra.brokers.admission import (POOL_LABEL, USER_LABEL, Admission,
+                                     AdmissionController, AdmissionMiddleware,
+                                     AdmissionRejected, admission_limit,
+                                     estimate_finish, fold_ewma,
+                                     mark_cache_hit)
+from settings.config import Config
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...]]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        def queue(*args: Any) -> None:
+            self.commands.append((name, args))
+
+        return queue
+
+    async def execute(self) -> None:
+        for name, args in self.commands:
+            await getattr(self.redis, name)(*args)
+
+
+class FakeRedis:
+    """Keeps the leases in memory and follows the contract of ADMIT_SCRIPT."""
+
+    def __init__(self) -> None:
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def hget(self, key: str, field: str) -> Optional[bytes]:
+        value = self.hashes.get(key, {}).get(field)
+        return None if value is None else value.encode()
+
+    async def hset(self, key: str, field: str, value: str) -> None:
+        self.hashes.setdefault(key, {})[field] = value
+
+    async def expire(self, key: str, seconds: int) -> None:
+        self.ttls[key] = seconds
+
+    async def zrem(self, key: str, member: str) -> None:
+        self.zsets.get(key, {}).pop(member, None)
+
+    async def eval(self, script: str, numkeys: int, *args: str) -> list[int]:
+        pool_key, user_key, _, expiry, task_id, limit, user_max = args
+        leases = self.zsets.setdefault(pool_key, {})
+        ahead = len(leases)
+        if ahead >= int(limit):
+            return [0, ahead]
+        if user_key:
+            user_leases = self.zsets.setdefault(user_key, {})
+            if len(user_leases) >= int(user_max):
+                return [-1, ahead]
+            user_leases[task_id] = float(expiry)
+        leases[task_id] = float(expiry)
+        return [1, ahead]
+
+
+def _message(ticket: Admission) -> TaskiqMessage:
+    return TaskiqMessage(
+        task_id=ticket.task_id,
+        task_name="bpmn",
+        labels=ticket.labels,
+        args=[],
+        kwargs={},
+    )
+
+
+@pytest.mark.parametrize(
+    ("deadline", "service_time", "capacity"),
+    [(60, 20, 4), (59, 20, 4), (61, 20, 1), (7.5, 2.5, 3), (10, 20, 4)],
+)
+def test_limit_admits_the_requests_finishing_in_time_or_starting_at_once(
+    deadline: float, service_time: float, capacity: int
+) -> None:
+    limit = admission_limit(deadline, service_time, capacity)
+
+    for ahead in range(50):
+        in_time = estimate_finish(ahead, capacity, service_time) <= deadline
+        assert (in_time or ahead < capacity) == (ahead < limit)
+
+
+def test_ewma_starts_from_the_first_sample() -> None:
+    assert fold_ewma(None, 5.0, 0.2) == 5.0
+    assert fold_ewma(10.0, 20.0, 0.2) == pytest.approx(12.0)
+
+
+@pytest.mark.asyncio
+async def test_admitted_task_is_labelled() -> None:
+    admission = AdmissionController(FakeRedis(), Config())  # type: ignore
+
+    ticket = await admission.admit("llama", deadline=60, user_id="user-1")
+
+    assert ticket.labels == {POOL_LABEL: "llama", USER_LABEL: "user-1"}
+    assert ticket.wait == 0
+
+
+@pytest.mark.asyncio
+async def test_pool_rejects_requests_past_the_deadline() -> None:
+    admission = AdmissionController(FakeRedis(), Config())  # type: ignore
+
+    waits = [(await admission.admit("llama", deadline=60)).wait for _ in range(12)]
+    with pytest.raises(AdmissionRejected) as e:
+        await admission.admit("llama", deadline=60)
+
+    assert waits == [0] * 4 + [20] * 4 + [40] * 4
+    assert e.value.retry_after == 20
+
+
+@pytest.mark.asyncio
+async def test_user_cap_rejects_and_release_frees_the_lease() -> None:
+    admission = AdmissionController(FakeRedis(), Config())  # type: ignore
+    first = await admission.admit("llama", deadline=60, user_id="user-1")
+    await admission.admit("llama", deadline=60, user_id="user-1")
+
+    with pytest.raises(AdmissionRejected) as e:
+        await admission.admit("llama", deadline=60, user_id="user-1")
+    await admission.cancel(first)
+    await admission.admit("llama", deadline=60, user_id="user-1")
+
+    assert e.value.retry_after == 20
+
+
+@pytest.mark.asyncio
+async def test_release_folds_execution_time_into_the_estimate() -> None:
+    redis = FakeRedis()
+    admission = AdmissionController(redis, Config())  # type: ignore
+    for _ in range(4):
+        await admission.admit("llama", deadline=60)
+
+    await admission.release("unknown", "llama", execution_time=30.0)
+    ticket = await admission.admit("llama", deadline=60)
+
+    assert redis.hashes["admission:llama:stats"]["ewma"] == "30.0"
+    assert redis.ttls["admission:llama:stats"] == 3600
+    assert ticket.wait == 30
+
+
+@pytest.mark.asyncio
+async def test_slow_estimate_does_not_lock_the_pool() -> None:
+    redis = FakeRedis()
+    redis.hashes["admission:llama:stats"] = {"ewma": "61.0"}
+    admission = AdmissionController(redis, Config())  # type: ignore
+
+    waits = [(await admission.admit("llama", deadline=60)).wait for _ in range(4)]
+    with pytest.raises(AdmissionRejected):
+        await admission.admit("llama", deadline=60)
+
+    assert waits == [0] * 4
+
+
+@pytest.mark.parametrize(("cache_hit", "ewma"), [(False, "3.0"), (True, None)])
+@pytest.mark.asyncio
+async def test_cache_hits_are_left_out_of_the_estimate(
+    cache_hit: bool, ewma: Optional[str]
+) -> None:
+    redis = FakeRedis()
+    admission = AdmissionController(redis, Config())  # type: ignore
+    middleware = AdmissionMiddleware(admission)
+    ticket = await admission.admit("llama", deadline=60)
+    message = _message(ticket)
+
+    middleware.pre_execute(message)
+    if cache_hit:
+        mark_cache_hit()
+    result = TaskiqResult(is_err=False, return_value="", execution_time=3.0)
+    await middleware.post_save(message, result)
+
+    assert redis.hashes.get("admission:llama:stats", {}).get("ewma") == ewma
+    assert redis.zsets["admission:llama:leases"] == {}
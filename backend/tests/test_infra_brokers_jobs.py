@@ -0,0 +1,47 @@
+import pytest
+from taskiq import InMemoryBroker
+from taskiq.depends.progress_tracker import TaskState
+
+from infra.brokers.jobs import (JobMiddleware, enqueue_job, job_kind,
+                                job_running, report_job_progress)
+
+
+@pytest.mark.asyncio
+async def test_job_is_marked_started_and_keeps_kind() -> None:
+    broker = InMemoryBroker().with_middlewares(JobMiddleware())
+
+    @broker.task
+    async def echo(value: str) -> str:
+        progress = await broker.result_backend.get_progress("job-1")
+        assert progress is not None and progress.state == TaskState.STARTED
+        return value
+
+    await enqueue_job(echo, "job-1", "echo", "готово")
+    await broker.wait_all()
+
+    progress = await broker.result_backend.get_progress("job-1")
+    result = await broker.result_backend.get_result("job-1")
+    assert job_kind(progress) == "echo"
+    assert not result.is_err and result.return_value == "готово"
+    assert job_kind(None) is None
+
+
+@pytest.mark.asyncio
+async def test_running_job_reports_progress_next_to_kind() -> None:
+    broker = InMemoryBroker().with_middlewares(JobMiddleware())
+    running: list[bool] = []
+
+    @broker.task
+    async def generate(generated: int) -> None:
+        running.append(job_running())
+        await report_job_progress(0.25, generated)
+
+    await enqueue_job(generate, "job-1", "bpmn", 2000)
+    await broker.wait_all()
+    progress = await broker.result_backend.get_progress("job-1")
+    await generate.kiq(10)
+    await broker.wait_all()
+
+    assert running == [True, False]
+    assert progress is not None
+    assert progress.meta == {"kind": "bpmn", "progress": 0.25, "generated": 2000}
@@ -0,0 +1,76 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+import pytest
+from taskiq import TaskiqResult, TaskiqResultTimeoutError
+
+from infra.brokers.results import TaskResultListener
+from settings.config import Config
+
+
+class FakePubSub:
+    def __init__(self, queue: "asyncio.Queue[bytes]") -> None:
+        self.queue = queue
+
+    async def subscribe(self, channel: str) -> None:
+        pass
+
+    async def listen(self) -> AsyncIterator[dict[str, Any]]:
+        while True:
+            yield {"type": "message", "data": await self.queue.get()}
+
+    async def aclose(self) -> None:
+        pass
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.queue: "asyncio.Queue[bytes]" = asyncio.Queue()
+
+    def pubsub(self) -> FakePubSub:
+        return FakePubSub(self.queue)
+
+
+class FakeTask:
+    task_id = "task-1"
+
+    def __init__(self) -> None:
+        self.ready = False
+        self.checks = 0
+
+    async def is_ready(self) -> bool:
+        self.checks += 1
+        return self.ready
+
+    async def get_result(self, with_logs: bool = False) -> TaskiqResult[str]:
+        return TaskiqResult(is_err=False, return_value="done", execution_time=0)
+
+
+@pytest.mark.asyncio
+async def test_wait_is_woken_by_notification() -> None:
+    redis = FakeRedis()
+    listener = TaskResultListener(
+        redis, Config(RESULT_FALLBACK_POLL_INTERVAL=60)  # type: ignore
+    )
+    task = FakeTask()
+
+    waiting = asyncio.create_task(listener.wait(task, timeout=30))  # type: ignore
+    await asyncio.sleep(0)
+    task.ready = True
+    redis.queue.put_nowait(b"task-1")
+    result = await asyncio.wait_for(waiting, timeout=1)
+
+    assert result.return_value == "done"
+    assert task.checks <= 3
+    await listener.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_wait_timeout() -> None:
+    listener = TaskResultListener(
+        FakeRedis(), Config(RESULT_FALLBACK_POLL_INTERVAL=0.01)  # type: ignore
+    )
+
+    with pytest.raises(TaskiqResultTimeoutError):
+        await listener.wait(FakeTask(), timeout=0.05)  # type: ignore
+    await listener.shutdown()
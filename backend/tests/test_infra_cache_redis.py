@@ -0,0 +1,158 @@
+from typing import Any, Optional
+
+import pytest
+from redis.exceptions import ConnectionError
+
+from infra.cache import redis as cache_module
+from infra.cache.redis import RedisLRUCache
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def time(self) -> float:
+        return self.now
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        def queue(*args: Any, **kwargs: Any) -> None:
+            self.commands.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self) -> list[Any]:
+        return [
+            await getattr(self.redis, name)(*args, **kwargs)
+            for name, args, kwargs in self.commands
+        ]
+
+
+class FakeRedis:
+    def __init__(self, clock: FakeClock) -> None:
+        self.clock = clock
+        self.strings: dict[str, tuple[bytes, float]] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.hashes: dict[str, dict[bytes, int]] = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        value, expires_at = self.strings.get(key, (None, 0.0))
+        return value if self.clock.now < expires_at else None
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        self.strings[key] = (value.encode("utf-8"), self.clock.now + ex)
+
+    async def delete(self, *keys: str) -> None:
+        for key in keys:
+            self.strings.pop(key, None)
+
+    async def zadd(self, key: str, mapping: dict[str, float]) -> None:
+        self.zsets.setdefault(key, {}).update(mapping)
+
+    async def zrem(self, key: str, *members: str) -> None:
+        for member in members:
+            self.zsets.get(key, {}).pop(member, None)
+
+    async def zcard(self, key: str) -> int:
+        return len(self.zsets.get(key, {}))
+
+    async def zrange(self, key: str, start: int, end: int) -> list[bytes]:
+        members = sorted(self.zsets.get(key, {}).items(), key=lambda item: item[1])
+        return [member.encode("utf-8") for member, _ in members[start : end + 1]]
+
+    async def zremrangebyscore(self, key: str, low: float, high: float) -> None:
+        zset = self.zsets.get(key, {})
+        for member in [m for m, score in zset.items() if low <= score <= high]:
+            del zset[member]
+
+    async def hincrby(self, key: str, field: str, amount: int) -> None:
+        counters = self.hashes.setdefault(key, {})
+        counters[field.encode()] = counters.get(field.encode(), 0) + amount
+
+    async def hgetall(self, key: str) -> dict[bytes, int]:
+        return self.hashes.get(key, {})
+
+
+class BrokenRedis(FakeRedis):
+    async def get(self, key: str) -> Optional[bytes]:
+        raise ConnectionError("Redis is down")
+
+    async def set(self, key: str, value: str, ex: int) -> None:
+        raise ConnectionError("Redis is down")
+
+    async def hgetall(self, key: str) -> dict[bytes, int]:
+        raise ConnectionError("Redis is down")
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> FakeClock:
+    clock = FakeClock()
+    monkeypatch.setattr(cache_module, "time", clock)
+    return clock
+
+
+def _cache(redis: FakeRedis, max_entries: int = 10) -> RedisLRUCache:
+    return RedisLRUCache(redis, "test", ttl=60, max_entries=max_entries)  # type: ignore
+
+
+@pytest.mark.asyncio
+async def test_cache_counts_hits_and_misses(clock: FakeClock) -> None:
+    cache = _cache(FakeRedis(clock))
+
+    assert await cache.get("a") is None
+    await cache.set("a", "value")
+    assert await cache.get("a") == "value"
+    assert await cache.get("a") == "value"
+
+    assert await cache.stats() == {"hits": 2, "misses": 1, "size": 1}
+
+
+@pytest.mark.asyncio
+async def test_cache_entries_expire(clock: FakeClock) -> None:
+    cache = _cache(FakeRedis(clock))
+    await cache.set("old", "value")
+    clock.now += 61
+    await cache.set("fresh", "value")
+
+    assert await cache.get("old") is None
+    assert await cache.get("fresh") == "value"
+    assert (await cache.stats())["size"] == 1
+
+
+@pytest.mark.asyncio
+async def test_cache_evicts_least_recently_used(clock: FakeClock) -> None:
+    cache = _cache(FakeRedis(clock), max_entries=2)
+    await cache.set("a", "1")
+    clock.now += 1
+    await cache.set("b", "2")
+    clock.now += 1
+    await cache.get("a")
+    clock.now += 1
+    await cache.set("c", "3")
+
+    assert await cache.get("a") == "1"
+    assert await cache.get("b") is None
+    assert await cache.get("c") == "3"
+
+
+@pytest.mark.asyncio
+async def test_unavailable_cache_is_a_miss(clock: FakeClock) -> None:
+    cache = _cache(BrokenRedis(clock))
+
+    await cache.set("a", "1")
+    assert await cache.get("a") is None
+    assert await cache.stats() == {"hits": 0, "misses": 0, "size": 0}
@@ -0,0 +1,27 @@
+import pytest
+
+from infra.http.pool import HttpClientPool
+from settings.config import Config
+
+
+@pytest.mark.asyncio
+async def test_http_pool_reuses_client() -> None:
+    pool = HttpClientPool(Config())  # type: ignore
+
+    client = pool.client("http://ollama:11434")
+    assert pool.client("http://ollama:11434") is client
+    assert pool.client("http://xinference:9997") is not client
+
+    await pool.shutdown()
+    assert client.is_closed
+    assert pool.client("http://ollama:11434") is not client
+    await pool.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_http_pool_timeout() -> None:
+    pool = HttpClientPool(Config(HTTP_CONNECT_TIMEOUT=3))  # type: ignore
+
+    timeout = pool.timeout(None)
+    assert timeout.read is None
+    assert timeout.connect == 3
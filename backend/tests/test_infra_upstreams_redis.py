@@ -0,0 +1,103 @@
+import asyncio
+from typing import Any, AsyncIterator
+
+import pytest
+
+from infra.upstreams.redis import RedisUpstreamStats
+from utils.upstreams import UpstreamRegistry, UpstreamStats
+
+
+class FakePipeline:
+    def __init__(self, redis: "FakeRedis") -> None:
+        self.redis = redis
+        self.commands: list[tuple[str, tuple[Any, ...], dict[str, Any]]] = []
+
+    async def __aenter__(self) -> "FakePipeline":
+        return self
+
+    async def __aexit__(self, *args: Any) -> None:
+        pass
+
+    def __getattr__(self, name: str) -> Any:
+        def queue(*args: Any, **kwargs: Any) -> None:
+            self.commands.append((name, args, kwargs))
+
+        return queue
+
+    async def execute(self) -> None:
+        for name, args, kwargs in self.commands:
+            await getattr(self.redis, name)(*args, **kwargs)
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.hashes: dict[str, dict[bytes, bytes]] = {}
+        self.ttls: dict[str, int] = {}
+
+    def pipeline(self, transaction: bool = True) -> FakePipeline:
+        return FakePipeline(self)
+
+    async def hset(self, key: str, mapping: dict[str, Any]) -> None:
+        values = self.hashes.setdefault(key, {})
+        for field, value in mapping.items():
+            values[field.encode()] = str(value).encode()
+
+    async def expire(self, key: str, seconds: int) -> None:
+        self.ttls[key] = seconds
+
+    async def hgetall(self, key: bytes) -> dict[bytes, bytes]:
+        return self.hashes.get(key.decode(), {})
+
+    async def scan_iter(self, match: str) -> AsyncIterator[bytes]:
+        prefix = match.rstrip("*")
+        for key in list(self.hashes):
+            if key.startswith(prefix):
+                yield key.encode()
+
+
+def _stats(state: str, failures: int, balance: float) -> UpstreamStats:
+    return UpstreamStats(
+        state=state,  # type: ignore
+        failures=failures,
+        opened=1 if state != "closed" else 0,
+        rejected=2,
+        retry_balance=balance,
+    )
+
+
+@pytest.mark.asyncio
+async def test_breaker_changes_are_published_with_a_ttl() -> None:
+    redis = FakeRedis()
+    publisher = RedisUpstreamStats(redis, ttl=600, process="worker-1")  # type: ignore
+    registry = UpstreamRegistry(failure_threshold=1)
+    publisher.attach(registry)
+
+    registry.breaker("http://gpu:11434").on_failure()
+    await asyncio.sleep(0)
+
+    key = "upstream_stats:http://gpu:11434:worker-1"
+    assert redis.hashes[key][b"state"] == b"open"
+    assert redis.ttls[key] == 600
+    assert (await publisher.stats())["http://gpu:11434"]["state"] == "open"
+
+
+@pytest.mark.asyncio
+async def test_stats_are_merged_across_the_workers() -> None:
+    redis = FakeRedis()
+    workers = [
+        RedisUpstreamStats(redis, ttl=600, process=f"worker-{i}")  # type: ignore
+        for i in range(2)
+    ]
+    workers[0]._changed("xinference", _stats("open", 5, 3.0))
+    workers[1]._changed("xinference", _stats("closed", 1, 10.0))
+    workers[1]._changed("ollama", _stats("closed", 0, 10.0))
+    await asyncio.gather(*(worker.flush() for worker in workers))
+
+    stats = await RedisUpstreamStats(redis, ttl=600).stats()  # type: ignore
+
+    assert stats == {
+        "xinference": UpstreamStats(
+            state="open", failures=5, opened=1, rejected=4, retry_balance=3.0
+        ),
+        "ollama": _stats("closed", 0, 10.0),
+    }
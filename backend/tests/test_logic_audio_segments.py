@@ -0,0 +1,38 @@
+from logic.audio.segments import Segment, plan_segments, stitch_transcripts
+
+
+def test_plan_segments_cuts_at_silences() -> None:
+    silences = [(12.0, 13.0), (28.0, 30.0), (50.0, 51.0), (61.0, 62.0)]
+
+    segments = plan_segments(80.0, silences, target=30, max_length=45, overlap=1)
+
+    assert segments == [
+        Segment(0.0, 29.0),
+        Segment(28.0, 61.5),
+        Segment(60.5, 80.0),
+    ]
+
+
+def test_plan_segments_hard_cut_without_silence() -> None:
+    segments = plan_segments(100.0, [], target=30, max_length=45, overlap=1)
+
+    assert segments == [
+        Segment(0.0, 45.0),
+        Segment(44.0, 90.0),
+        Segment(89.0, 100.0),
+    ]
+    assert plan_segments(40.0, [], 30, 45, 1) == [Segment(0.0, 40.0)]
+
+
+def test_stitch_transcripts_drops_overlap() -> None:
+    texts = [
+        "Клиент подаёт заявку на кредит.",
+        "на кредит. Менеджер проверяет документы",
+        "",
+        "Затем заявка уходит в архив.",
+    ]
+
+    assert stitch_transcripts(texts) == (
+        "Клиент подаёт заявку на кредит. Менеджер проверяет документы "
+        "Затем заявка уходит в архив."
+    )
@@ -0,0 +1,72 @@
+from typing import Any
+
+import pytest
+
+from infra.audio.wav import wav_duration
+from logic.audio.stream import BYTES_PER_SECOND, SpeechStream
+from settings.config import Config
+
+
+class _Transcoder:
+    async def detect_silences(self, *args: Any) -> list[tuple[float, float]]:
+        return []
+
+
+class _WebmTranscoder(_Transcoder):
+    """Decodes 100 bytes of the stream into a second of silence."""
+
+    def __init__(self) -> None:
+        self.decoded: list[int] = []
+
+    async def transcode(self, data: bytes, *args: Any, **kwargs: Any) -> bytes:
+        self.decoded.append(len(data))
+        return b"\0" * (len(data) * BYTES_PER_SECOND // 100)
+
+
+class _Stt:
+    def __init__(self) -> None:
+        self.durations: list[float] = []
+
+    async def speach_to_text(self, audio: bytes) -> str:
+        self.durations.append(wav_duration(audio))
+        return f"окно {len(self.durations)}"
+
+
+@pytest.mark.asyncio
+async def test_speech_stream_transcribes_windows() -> None:
+    stt = _Stt()
+    config = Config(STT_STREAM_WINDOW_SECONDS=4, STT_SEGMENT_OVERLAP=1)  # type: ignore
+    stream = SpeechStream(
+        config=config,
+        transcoder=_Transcoder(),  # type: ignore
+        stt=stt,  # type: ignore
+    )
+    second = b"\0\0" * (BYTES_PER_SECOND // 2)
+
+    grown = [await stream.feed(second) for _ in range(10)]
+
+    assert grown.index(True) == 6
+    assert stream.transcript == "окно 1"
+    assert await stream.finish() == "окно 1 окно 2"
+    assert stt.durations == [6.0, 5.0]
+
+
+@pytest.mark.asyncio
+async def test_webm_stream_is_decoded_per_window() -> None:
+    stt = _Stt()
+    transcoder = _WebmTranscoder()
+    config = Config(STT_STREAM_WINDOW_SECONDS=4, STT_SEGMENT_OVERLAP=1)  # type: ignore
+    stream = SpeechStream(
+        config=config,
+        transcoder=transcoder,  # type: ignore
+        stt=stt,  # type: ignore
+        audio_format="webm",
+    )
+
+    for _ in range(200):
+        await stream.feed(b"\1" * 10)
+
+    assert len(transcoder.decoded) < 20
+    assert stream.transcript == "окно 1 окно 2 окно 3"
+    assert await stream.finish() == "окно 1 окно 2 окно 3 окно 4"
+    assert transcoder.decoded[-1] == 2000
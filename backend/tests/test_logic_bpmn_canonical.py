@@ -0,0 +1,69 @@
+from logic.bpmn.canonical import canonicalize
+
+DIAGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<bpmn:definitions xmlns:bpmn="http://www.omg.org/spec/BPMN/20100524/MODEL"
+    xmlns:bpmndi="http://www.omg.org/spec/BPMN/20100524/DI"
+    xmlns:dc="http://www.omg.org/spec/DD/20100524/DC"
+    id="Definitions_1" exporter="bpmn-js" exporterVersion="{version}">
+  <bpmn:process id="Process_1" isExecutable="false">
+    <bpmn:startEvent id="StartEvent_1" name="Старт">
+      <bpmn:outgoing>{flow}</bpmn:outgoing>
+    </bpmn:startEvent>
+    <bpmn:task name="Проверить   заявку" id="{task}">
+      <bpmn:incoming>{flow}</bpmn:incoming>
+    </bpmn:task>
+    <!-- comment -->
+    <bpmn:sequenceFlow id="{flow}" sourceRef="StartEvent_1" targetRef="{task}" />
+  </bpmn:process>
+  <bpmndi:BPMNDiagram id="BPMNDiagram_1">
+    <bpmndi:BPMNPlane id="BPMNPlane_1" bpmnElement="Process_1">
+      <bpmndi:BPMNShape id="{task}_di" bpmnElement="{task}">
+        <dc:Bounds x="{x}" y="80" width="100" height="80" />
+      </bpmndi:BPMNShape>
+    </bpmndi:BPMNPlane>
+  </bpmndi:BPMNDiagram>
+</bpmn:definitions>
+"""
+
+
+def _diagram(
+    task: str = "Activity_0abc123",
+    flow: str = "Flow_1qwe456",
+    x: int = 250,
+    version: str = "17.0.0",
+) -> str:
+    return DIAGRAM.format(task=task, flow=flow, x=x, version=version)
+
+
+def test_canonical_form_ignores_layout() -> None:
+    original = canonicalize(_diagram())
+    moved = canonicalize(_diagram(x=400, version="18.0.0"))
+
+    assert original is not None and moved is not None
+    assert original.xml == moved.xml
+    assert "BPMNDiagram" not in original.xml
+    assert "Проверить заявку" in original.xml
+
+
+def test_canonical_form_ignores_generated_ids() -> None:
+    original = canonicalize(_diagram())
+    renamed = canonicalize(_diagram(task="Activity_1zzz999", flow="Flow_0aaa111"))
+
+    assert original is not None and renamed is not None
+    assert original.xml == renamed.xml
+    assert "StartEvent_1" in original.xml
+
+
+def test_canonical_text_translates_ids() -> None:
+    original = canonicalize(_diagram())
+    renamed = canonicalize(_diagram(task="Activity_1zzz999"))
+    assert original is not None and renamed is not None
+
+    text = original.to_canonical_text("Задача Activity_0abc123 без выхода")
+
+    assert "Activity_0abc123" not in text
+    assert renamed.from_canonical_text(text) == "Задача Activity_1zzz999 без выхода"
+
+
+def test_canonical_form_of_malformed_xml() -> None:
+    assert canonicalize("<definitions>") is None
@@ -0,0 +1,74 @@
+import pytest
+
+from logic.bpmn.graph import GraphError, ProcessGraph, validate_graph
+from logic.bpmn.layout import layout_graph
+from logic.bpmn.serialize import graph_to_xml
+from logic.bpmn.validator import validate_bpmn
+
+
+def _graph(lanes: bool = False) -> ProcessGraph:
+    lane = "Lane_1" if lanes else ""
+    other = "Lane_2" if lanes else ""
+    return ProcessGraph(
+        name="Обработка заявки",
+        lanes=(
+            [{"id": "Lane_1", "name": "Клиент"}, {"id": "Lane_2", "name": "Менеджер"}]
+            if lanes
+            else []
+        ),
+        nodes=[
+            {"id": "Start_1", "type": "startEvent", "name": "Старт", "lane": lane},
+            {"id": "Task_1", "type": "userTask", "name": "Подать", "lane": lane},
+            {"id": "Task_2", "type": "task", "name": "Проверить", "lane": other},
+            {"id": "Gateway_1", "type": "exclusiveGateway", "name": "", "lane": other},
+            {"id": "End_1", "type": "endEvent", "name": "Готово", "lane": other},
+        ],
+        flows=[
+            {"id": "Flow_1", "source": "Start_1", "target": "Task_1", "name": ""},
+            {"id": "Flow_2", "source": "Task_1", "target": "Task_2", "name": ""},
+            {"id": "Flow_3", "source": "Task_2", "target": "Gateway_1", "name": ""},
+            {"id": "Flow_4", "source": "Gateway_1", "target": "End_1", "name": "Да"},
+            {"id": "Flow_5", "source": "Gateway_1", "target": "Task_1", "name": "Нет"},
+        ],
+    )
+
+
+@pytest.mark.parametrize("lanes", [False, True])
+def test_graph_to_valid_bpmn(lanes: bool) -> None:
+    xml = graph_to_xml(validate_graph(_graph(lanes)))
+
+    assert validate_bpmn(xml) == []
+    assert ("Participant_1" in xml) is lanes
+
+
+def test_layout_flows_left_to_right() -> None:
+    graph = validate_graph(_graph(lanes=True))
+    layout = layout_graph(graph)
+    shapes = layout.shapes
+
+    assert shapes["Start_1"].x < shapes["Task_1"].x < shapes["Task_2"].x
+    assert shapes["Task_2"].x < shapes["Gateway_1"].x < shapes["End_1"].x
+    assert layout.lanes["Lane_1"].bottom <= shapes["Task_2"].y
+    assert layout.edges["Flow_5"][0][1] > shapes["Gateway_1"].y
+
+
+def test_graph_with_dangling_flow() -> None:
+    graph = _graph()
+    graph["flows"].append(
+        {"id": "Flow_6", "source": "End_1", "target": "Gone_1", "name": ""}
+    )
+
+    with pytest.raises(GraphError):
+        validate_graph(graph)
+
+
+@pytest.mark.parametrize(
+    ("part", "index", "key"),
+    [("nodes", 1, "type"), ("flows", 2, "target"), ("flows", 0, "id")],
+)
+def test_graph_with_missing_key(part: str, index: int, key: str) -> None:
+    graph = _graph()
+    del graph[part][index][key]  # type: ignore[literal-required]
+
+    with pytest.raises(GraphError, match=f"#{index} has no {key!r}"):
+        validate_graph(graph)
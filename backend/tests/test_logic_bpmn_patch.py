@@ -0,0 +1,218 @@
+import copy
+import xml.etree.ElementTree as ET
+
+import pytest
+
+from logic.bpmn.graph import GraphFlow, GraphLane, GraphNode, validate_graph
+from logic.bpmn.patch import (BpmnPatch, PatchError, PatchOperation,
+                              apply_graph, apply_patch)
+from logic.bpmn.serialize import diagram_from_xml, graph_to_xml
+from logic.bpmn.validator import validate_bpmn
+
+DIAGRAM = """<?xml version="1.0" encoding="UTF-8"?>
+<bpmn:definitions xmlns:bpmn="http://www.omg.org/spec/BPMN/20100524/MODEL"
+    xmlns:bpmndi="http://www.omg.org/spec/BPMN/20100524/DI"
+    xmlns:dc="http://www.omg.org/spec/DD/20100524/DC"
+    xmlns:di="http://www.omg.org/spec/DD/20100524/DI"
+    xmlns:bioc="http://bpmn.io/schema/bpmn/biocolor/1.0" id="Definitions_1">
+  <bpmn:process id="Process_1">
+    <bpmn:startEvent id="Start_1" name="Каждый день">
+      <bpmn:outgoing>Flow_1</bpmn:outgoing>
+      <bpmn:timerEventDefinition id="Timer_1" />
+    </bpmn:startEvent>
+    <bpmn:task id="Task_1" name="Проверить">
+      <bpmn:documentation>Проверка заявок</bpmn:documentation>
+      <bpmn:incoming>Flow_1</bpmn:incoming>
+      <bpmn:outgoing>Flow_2</bpmn:outgoing>
+    </bpmn:task>
+    <bpmn:endEvent id="End_1">
+      <bpmn:incoming>Flow_2</bpmn:incoming>
+    </bpmn:endEvent>
+    <bpmn:sequenceFlow id="Flow_1" sourceRef="Start_1" targetRef="Task_1" />
+    <bpmn:sequenceFlow id="Flow_2" sourceRef="Task_1" targetRef="End_1" />
+  </bpmn:process>
+  <bpmndi:BPMNDiagram id="BPMNDiagram_1">
+    <bpmndi:BPMNPlane id="BPMNPlane_1" bpmnElement="Process_1">
+      <bpmndi:BPMNShape id="Start_1_di" bpmnElement="Start_1">
+        <dc:Bounds x="152" y="102" width="36" height="36" />
+      </bpmndi:BPMNShape>
+      <bpmndi:BPMNShape id="Task_1_di" bpmnElement="Task_1" bioc:fill="#ffe0b2">
+        <dc:Bounds x="240" y="80" width="100" height="80" />
+      </bpmndi:BPMNShape>
+      <bpmndi:BPMNShape id="End_1_di" bpmnElement="End_1">
+        <dc:Bounds x="402" y="102" width="36" height="36" />
+      </bpmndi:BPMNShape>
+      <bpmndi:BPMNEdge id="Flow_1_di" bpmnElement="Flow_1">
+        <di:waypoint x="188" y="120" />
+        <di:waypoint x="240" y="120" />
+      </bpmndi:BPMNEdge>
+      <bpmndi:BPMNEdge id="Flow_2_di" bpmnElement="Flow_2">
+        <di:waypoint x="340" y="120" />
+        <di:waypoint x="402" y="120" />
+      </bpmndi:BPMNEdge>
+    </bpmndi:BPMNPlane>
+  </bpmndi:BPMNDiagram>
+</bpmn:definitions>
+"""
+
+BOUNDARY_DIAGRAM = (
+    DIAGRAM.replace(
+        """    <bpmn:endEvent id="End_1">""",
+        """    <bpmn:boundaryEvent id="Timeout_1" attachedToRef="Task_1">
+      <bpmn:outgoing>Flow_4</bpmn:outgoing>
+      <bpmn:timerEventDefinition id="Timer_2" />
+    </bpmn:boundaryEvent>
+    <bpmn:endEvent id="End_1">""",
+    )
+    .replace(
+        """  </bpmn:process>""",
+        """    <bpmn:sequenceFlow id="Flow_4" sourceRef="Timeout_1" targetRef="End_1">
+      <bpmn:conditionExpression>timeout</bpmn:conditionExpression>
+    </bpmn:sequenceFlow>
+  </bpmn:process>""",
+    )
+    .replace(
+        """    </bpmndi:BPMNPlane>""",
+        """      <bpmndi:BPMNShape id="Timeout_1_di" bpmnElement="Timeout_1">
+        <dc:Bounds x="272" y="142" width="36" height="36" />
+      </bpmndi:BPMNShape>
+      <bpmndi:BPMNEdge id="Flow_4_di" bpmnElement="Flow_4">
+        <di:waypoint x="290" y="178" />
+        <di:waypoint x="420" y="138" />
+      </bpmndi:BPMNEdge>
+    </bpmndi:BPMNPlane>""",
+    )
+)
+
+
+def _op(op: str, id_: str, **fields: str) -> PatchOperation:
+    operation = PatchOperation(
+        op=op, id=id_, type="", name="", lane="", source="", target=""
+    )
+    operation.update(fields)  # type: ignore[typeddict-item]
+    return operation
+
+
+def test_insert_task_keeps_details_and_layout() -> None:
+    patch = BpmnPatch(
+        operations=[
+            _op("add_node", "Task_2", type="userTask", name="Уведомить"),
+            _op("reconnect", "Flow_2", target="Task_2"),
+            _op("add_flow", "Flow_3", source="Task_2", target="End_1"),
+            _op("rename", "Task_1", name="Проверить заявку"),
+        ]
+    )
+
+    xml = apply_patch(DIAGRAM, patch)
+    graph, layout = diagram_from_xml(xml)
+    _, previous = diagram_from_xml(DIAGRAM)
+
+    assert validate_bpmn(xml) == []
+    assert "timerEventDefinition" in xml and "Проверка заявок" in xml
+    assert 'bioc:fill="#ffe0b2"' in xml
+    assert layout.shapes["Task_1"] == previous.shapes["Task_1"]
+    assert layout.edges["Flow_1"] == previous.edges["Flow_1"]
+    assert layout.shapes["Task_2"].x > previous.shapes["Task_1"].right
+    assert {"id": "Flow_2", "source": "Task_1", "target": "Task_2", "name": ""} in (
+        graph["flows"]
+    )
+
+
+def test_remove_node_with_flows() -> None:
+    xml = apply_patch(DIAGRAM, BpmnPatch(operations=[_op("remove", "Task_1")]))
+
+    assert "Task_1" not in xml
+    assert "Flow_1" not in xml and "Flow_2" not in xml
+
+
+def test_patch_keeps_prefixes_without_leaking_them() -> None:
+    bpmn2 = DIAGRAM.replace("bpmn:", "bpmn2:").replace("xmlns:bpmn=", "xmlns:bpmn2=")
+
+    xml = apply_patch(bpmn2, BpmnPatch(operations=[_op("remove", "Task_1")]))
+    graph, _ = diagram_from_xml(DIAGRAM)
+
+    assert "<bpmn2:process" in xml
+    assert "<bpmn:process" in graph_to_xml(validate_graph(graph))
+
+
+@pytest.mark.parametrize(
+    "operation",
+    [
+        _op("add_flow", "Flow_9", source="Task_1", target="Gone_1"),
+        _op("add_node", "Task_1", type="task"),
+        _op("rename", "Gone_1", name="Нет"),
+    ],
+)
+def test_invalid_operation(operation: PatchOperation) -> None:
+    with pytest.raises(PatchError):
+        apply_patch(DIAGRAM, BpmnPatch(operations=[operation]))
+
+
+def test_graph_edit_keeps_details_the_graph_cannot_represent() -> None:
+    graph, previous = diagram_from_xml(BOUNDARY_DIAGRAM)
+    edited = copy.deepcopy(graph)
+    edited["nodes"].append(
+        GraphNode(id="Task_2", type="userTask", name="Уведомить", lane="")
+    )
+    edited["flows"][1]["target"] = "Task_2"
+    edited["flows"].append(
+        GraphFlow(id="Flow_3", source="Task_2", target="End_1", name="")
+    )
+
+    xml = apply_graph(BOUNDARY_DIAGRAM, validate_graph(edited))
+    _, layout = diagram_from_xml(xml)
+
+    assert validate_bpmn(xml) == []
+    assert '<bpmn:boundaryEvent id="Timeout_1" attachedToRef="Task_1">' in xml
+    assert xml.count("timerEventDefinition") == 2
+    assert "<bpmn:conditionExpression>timeout</bpmn:conditionExpression>" in xml
+    assert "Проверка заявок" in xml and 'bioc:fill="#ffe0b2"' in xml
+    assert layout.shapes["Timeout_1"] == previous.shapes["Timeout_1"]
+    assert layout.edges["Flow_4"] == previous.edges["Flow_4"]
+    assert 'targetRef="Task_2"' in xml
+
+
+def test_graph_edit_unchanged_graph_keeps_document() -> None:
+    graph, _ = diagram_from_xml(BOUNDARY_DIAGRAM)
+
+    xml = apply_graph(BOUNDARY_DIAGRAM, validate_graph(graph))
+
+    assert diagram_from_xml(xml) == diagram_from_xml(BOUNDARY_DIAGRAM)
+    assert "boundaryEvent" in xml and "conditionExpression" in xml
+
+
+def test_graph_edit_writes_the_document_back_unchanged() -> None:
+    diagram = (
+        BOUNDARY_DIAGRAM.replace(
+            "xmlns:bioc=",
+            'xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" xmlns:bioc=',
+        )
+        .replace(
+            "<bpmn:conditionExpression>timeout",
+            '<bpmn:conditionExpression xsi:type="bpmn:tFormalExpression">'
+            "a &lt; b &amp;&amp; &quot;c&quot;",
+        )
+        .replace('name="Проверить"', 'name="Проверить &quot;срочно&quot;"')
+        .replace("<bpmn:process", "<!-- Заметка -->\n  <bpmn:process")
+    )
+    graph, _ = diagram_from_xml(diagram)
+
+    xml = apply_graph(diagram, validate_graph(graph))
+
+    assert ET.canonicalize(xml, with_comments=True, strip_text=True) == (
+        ET.canonicalize(diagram, with_comments=True, strip_text=True)
+    )
+
+
+def test_graph_edit_adds_lanes() -> None:
+    graph, _ = diagram_from_xml(DIAGRAM)
+    edited = copy.deepcopy(graph)
+    edited["lanes"] = [GraphLane(id="Lane_1", name="Менеджер")]
+
+    xml = apply_graph(DIAGRAM, validate_graph(edited))
+    read, layout = diagram_from_xml(xml)
+
+    assert validate_bpmn(xml) == []
+    assert {node["lane"] for node in read["nodes"]} == {"Lane_1"}
+    assert "Lane_1" in layout.lanes and layout.pool is not None
+    assert "timerEventDefinition" in xml
@@ -0,0 +1,62 @@
+import copy
+
+from logic.bpmn.graph import ProcessGraph, graph_to_text, validate_graph
+from logic.bpmn.layout import merge_layout
+from logic.bpmn.serialize import diagram_from_xml, graph_to_xml
+from logic.bpmn.validator import validate_bpmn
+
+GRAPH = ProcessGraph(
+    name="Обработка заявки",
+    lanes=[{"id": "Lane_1", "name": "Клиент"}, {"id": "Lane_2", "name": "Менеджер"}],
+    nodes=[
+        {"id": "Start_1", "type": "startEvent", "name": "Старт", "lane": "Lane_1"},
+        {"id": "Task_1", "type": "userTask", "name": "Подать", "lane": "Lane_1"},
+        {"id": "Task_2", "type": "task", "name": "Проверить", "lane": "Lane_2"},
+        {"id": "End_1", "type": "endEvent", "name": "Готово", "lane": "Lane_2"},
+    ],
+    flows=[
+        {"id": "Flow_1", "source": "Start_1", "target": "Task_1", "name": ""},
+        {"id": "Flow_2", "source": "Task_1", "target": "Task_2", "name": ""},
+        {"id": "Flow_3", "source": "Task_2", "target": "End_1", "name": ""},
+    ],
+)
+
+
+def test_diagram_round_trip() -> None:
+    graph = validate_graph(GRAPH)
+
+    read, layout = diagram_from_xml(graph_to_xml(graph))
+
+    assert read == graph
+    assert set(layout.shapes) == {"Start_1", "Task_1", "Task_2", "End_1"}
+    assert set(layout.lanes) == {"Lane_1", "Lane_2"}
+    assert layout.pool is not None
+
+
+def test_graph_to_text() -> None:
+    text = graph_to_text(validate_graph(GRAPH))
+
+    assert 'userTask Task_1 "Подать" @Lane_1' in text
+    assert "Flow_2: Task_1 -> Task_2" in text
+    assert len(text) * 5 < len(graph_to_xml(validate_graph(GRAPH)))
+
+
+def test_merge_layout_keeps_unchanged_elements() -> None:
+    previous_graph, previous = diagram_from_xml(graph_to_xml(validate_graph(GRAPH)))
+    edited = copy.deepcopy(GRAPH)
+    edited["nodes"].insert(
+        3, {"id": "Task_3", "type": "task", "name": "Уведомить", "lane": "Lane_2"}
+    )
+    edited["flows"][2]["target"] = "Task_3"
+    edited["flows"].append(
+        {"id": "Flow_4", "source": "Task_3", "target": "End_1", "name": ""}
+    )
+    graph = validate_graph(edited)
+
+    layout = merge_layout(graph, previous_graph, previous)
+
+    for id_ in ("Start_1", "Task_1", "Task_2"):
+        assert layout.shapes[id_] == previous.shapes[id_]
+    assert layout.edges["Flow_1"] == previous.edges["Flow_1"]
+    assert layout.shapes["Task_3"].x > layout.shapes["Task_2"].right
+    assert validate_bpmn(graph_to_xml(graph, layout)) == []
@@ -0,0 +1,101 @@
+from logic.bpmn.canonical import strip_layout
+from logic.bpmn.validator import validate_bpmn
+
+HEADER = """<?xml version="1.0" encoding="UTF-8"?>
+<bpmn:definitions xmlns:bpmn="http://www.omg.org/spec/BPMN/20100524/MODEL"
+    xmlns:bpmndi="http://www.omg.org/spec/BPMN/20100524/DI"
+    xmlns:dc="http://www.omg.org/spec/DD/20100524/DC"
+    xmlns:di="http://www.omg.org/spec/DD/20100524/DI" id="Definitions_1">
+"""
+
+PROCESS = """
+  <bpmn:process id="Process_1">
+    <bpmn:startEvent id="Start_1" />
+    <bpmn:task id="Task_1" name="Проверить заявку" />
+    <bpmn:endEvent id="End_1" />
+    <bpmn:sequenceFlow id="Flow_1" sourceRef="Start_1" targetRef="Task_1" />
+    <bpmn:sequenceFlow id="Flow_2" sourceRef="Task_1" targetRef="{target}" />
+  </bpmn:process>
+"""
+
+DIAGRAM = """
+  <bpmndi:BPMNDiagram id="BPMNDiagram_1">
+    <bpmndi:BPMNPlane id="BPMNPlane_1" bpmnElement="Process_1">
+      <bpmndi:BPMNShape id="Start_1_di" bpmnElement="Start_1">
+        <dc:Bounds x="100" y="100" width="36" height="36" />
+      </bpmndi:BPMNShape>
+      <bpmndi:BPMNShape id="Task_1_di" bpmnElement="Task_1">
+        <dc:Bounds x="200" y="80" width="{width}" height="80" />
+      </bpmndi:BPMNShape>
+      <bpmndi:BPMNShape id="End_1_di" bpmnElement="End_1">
+        <dc:Bounds x="400" y="100" width="36" height="36" />
+      </bpmndi:BPMNShape>
+      <bpmndi:BPMNEdge id="Flow_1_di" bpmnElement="Flow_1">
+        <di:waypoint x="136" y="118" />
+        <di:waypoint x="200" y="118" />
+      </bpmndi:BPMNEdge>
+      <bpmndi:BPMNEdge id="Flow_2_di" bpmnElement="Flow_2">
+        <di:waypoint x="300" y="118" />
+        <di:waypoint x="400" y="118" />
+      </bpmndi:BPMNEdge>
+    </bpmndi:BPMNPlane>
+  </bpmndi:BPMNDiagram>
+"""
+
+
+def _diagram(target: str = "End_1", width: int = 100, layout: bool = True) -> str:
+    xml = HEADER + PROCESS.format(target=target)
+    if layout:
+        xml += DIAGRAM.format(width=width)
+    return xml + "</bpmn:definitions>"
+
+
+def test_valid_diagram() -> None:
+    assert validate_bpmn(_diagram()) == []
+
+
+def test_malformed_xml() -> None:
+    suggestions = validate_bpmn(_diagram()[:-10])
+
+    assert len(suggestions) == 1
+    assert suggestions[0]["error"].startswith("Некорректный XML")
+
+
+def test_structural_errors() -> None:
+    errors = [s["error"] for s in validate_bpmn(_diagram(target="Gone_1", width=0))]
+
+    assert any("Gone_1" in error for error in errors)
+    assert any("End_1" in error and "входящих" in error for error in errors)
+    assert any("Task_1" in error and "размер" in error for error in errors)
+
+
+def test_message_flow_connects_task() -> None:
+    xml = _diagram().replace(
+        '<bpmn:process id="Process_1">',
+        """<bpmn:collaboration id="Collaboration_1">
+    <bpmn:participant id="Customer_1" name="Клиент" />
+    <bpmn:participant id="Bank_1" processRef="Process_1" />
+    <bpmn:messageFlow id="Message_1" sourceRef="Customer_1" targetRef="Notify_1" />
+  </bpmn:collaboration>
+  <bpmn:process id="Process_1">
+    <bpmn:task id="Notify_1" name="Получить уведомление" />""",
+    )
+
+    errors = [s["error"] for s in validate_bpmn(xml)]
+
+    assert not any("Notify_1" in error and "потоком" in error for error in errors)
+
+
+def test_missing_layout() -> None:
+    errors = [s["error"] for s in validate_bpmn(_diagram(layout=False))]
+
+    assert len(errors) == 1
+    assert errors[0].startswith("Отсутствует <bpmndi:BPMNDiagram>")
+
+
+def test_strip_layout() -> None:
+    stripped = strip_layout(_diagram())
+
+    assert "BPMNDiagram" not in stripped
+    assert 'id="Task_1"' in stripped
+    assert validate_bpmn(stripped)[0]["error"].startswith("Отсутствует <bpmndi")
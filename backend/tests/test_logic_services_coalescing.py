@@ -0,0 +1,83 @@
+import asyncio
+from typing import Any, Optional
+
+import pytest
+
+from logic.services.base import GenerateResponse, Xml
+from logic.services.coalescing import CoalescingBpmnService
+from settings.config import Config
+
+
+class FakeRedis:
+    def __init__(self) -> None:
+        self.values: dict[str, Any] = {}
+
+    async def set(
+        self,
+        key: str,
+        value: Any,
+        nx: bool = False,
+        ex: Optional[int] = None,
+        px: Optional[int] = None,
+    ) -> bool:
+        if nx and key in self.values:
+            return False
+        self.values[key] = value
+        return True
+
+    async def delete(self, key: str) -> None:
+        self.values.pop(key, None)
+
+    async def get(self, key: str) -> Any:
+        return self.values.get(key)
+
+    async def eval(self, script: str, numkeys: int, key: str, token: str) -> int:
+        if self.values.get(key) != token:
+            return 0
+        del self.values[key]
+        return 1
+
+
+class SlowService:
+    model_name = "test"
+
+    def __init__(self) -> None:
+        self.calls = 0
+
+    async def generate_bpmn(self, prompt: str) -> GenerateResponse[Xml]:
+        self.calls += 1
+        await asyncio.sleep(0.05)
+        return GenerateResponse(model="test", response=Xml(xml=prompt))
+
+
+@pytest.mark.asyncio
+async def test_identical_requests_share_one_generation() -> None:
+    redis, service = FakeRedis(), SlowService()
+    config = Config(LLM_COALESCE_POLL_INTERVAL=0.01)  # type: ignore
+    workers = [
+        CoalescingBpmnService(service, redis, config) for _ in range(2)  # type: ignore
+    ]
+
+    results = await asyncio.gather(
+        *(worker.generate_bpmn("<bpmn/>") for worker in workers for _ in range(3)),
+        workers[0].generate_bpmn("<other/>"),
+    )
+
+    assert service.calls == 2
+    assert [r["response"]["xml"] for r in results] == ["<bpmn/>"] * 6 + ["<other/>"]
+    assert not any(key.endswith(":lock") for key in redis.values)
+
+
+@pytest.mark.asyncio
+async def test_sequential_requests_generate_anew() -> None:
+    redis, service = FakeRedis(), SlowService()
+    config = Config(LLM_COALESCE_POLL_INTERVAL=0.01)  # type: ignore
+    workers = [
+        CoalescingBpmnService(service, redis, config) for _ in range(2)  # type: ignore
+    ]
+
+    await workers[0].generate_bpmn("<bpmn/>")
+    await workers[1].generate_bpmn("<bpmn/>")
+    await workers[0].generate_bpmn("<bpmn/>")
+
+    assert service.calls == 3
@@ -0,0 +1,120 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+import httpx
+import pytest
+
+from logic.services.base import GenerateResponse, Xml
+from logic.services.router import (RouterBackend, RouterBpmnService,
+                                   parse_backends)
+from settings.config import Config
+
+
+class FakeService:
+    model_name = "test"
+
+    def __init__(
+        self, fail: bool = False, serves_model: bool = True, fail_after: int = 0
+    ) -> None:
+        self.fail = fail
+        self.fail_after = fail_after
+        self.serves_model = serves_model
+        self.calls = 0
+
+    async def model_ready(self) -> bool:
+        return self.serves_model
+
+    async def generate_bpmn(self, prompt: str) -> GenerateResponse[Xml]:
+        self.calls += 1
+        await asyncio.sleep(0.01)
+        if self.fail:
+            raise httpx.ConnectError("refused")
+        return GenerateResponse(model="test", response=Xml(xml=prompt))
+
+    async def stream_bpmn(self, prompt: str) -> AsyncIterator[str]:
+        self.calls += 1
+        for index, fragment in enumerate(prompt.split("|")):
+            if self.fail and index == self.fail_after:
+                raise httpx.ConnectError("refused")
+            yield fragment
+
+
+def _router(*services: FakeService, **config: object) -> RouterBpmnService:
+    backends = [
+        RouterBackend(f"backend-{i}", s) for i, s in enumerate(services)  # type: ignore
+    ]
+    return RouterBpmnService(backends, Config(**config))  # type: ignore
+
+
+def test_parse_backends() -> None:
+    assert parse_backends("ollama=http://a:11434, openai=https://b/v1,") == [
+        ("ollama", "http://a:11434"),
+        ("openai", "https://b/v1"),
+    ]
+    with pytest.raises(ValueError):
+        parse_backends("http://a:11434")
+
+
+@pytest.mark.asyncio
+async def test_requests_spread_over_backends() -> None:
+    services = FakeService(), FakeService()
+    router = _router(*services, LLM_ROUTING="least_outstanding")
+
+    await asyncio.gather(*(router.generate_bpmn("<bpmn/>") for _ in range(4)))
+
+    assert [s.calls for s in services] == [2, 2]
+
+
+@pytest.mark.asyncio
+async def test_backend_with_unknown_latency_shares_the_traffic() -> None:
+    warm, cold = FakeService(), FakeService()
+    router = _router(warm, cold, LLM_ROUTING="ewma")
+    router.backends[0].latency = 5.0
+
+    await asyncio.gather(*(router.generate_bpmn("<bpmn/>") for _ in range(10)))
+
+    assert [s.calls for s in (warm, cold)] == [5, 5]
+
+
+@pytest.mark.asyncio
+async def test_failing_backend_is_rerouted_and_ejected() -> None:
+    broken, working = FakeService(fail=True), FakeService()
+    router = _router(broken, working, LLM_EJECT_FAILURES=1)
+    router.backends[0].latency, router.backends[1].latency = 0.5, 1.0
+
+    result = await router.generate_bpmn("<bpmn/>")
+    await router.generate_bpmn("<bpmn/>")
+
+    assert result["response"]["xml"] == "<bpmn/>"
+    assert (broken.calls, working.calls) == (1, 2)
+
+
+@pytest.mark.parametrize(("fail_after", "rerouted"), [(0, True), (1, False)])
+@pytest.mark.asyncio
+async def test_stream_fails_over_before_the_first_fragment(
+    fail_after: int, rerouted: bool
+) -> None:
+    broken, working = FakeService(fail=True, fail_after=fail_after), FakeService()
+    router = _router(broken, working)
+    router.backends[0].latency, router.backends[1].latency = 0.5, 1.0
+    fragments: list[str] = []
+
+    try:
+        async for fragment in router.stream_bpmn("<bpmn|/>"):
+            fragments.append(fragment)
+    except httpx.ConnectError:
+        assert not rerouted
+
+    assert fragments == (["<bpmn", "/>"] if rerouted else ["<bpmn"])
+    assert (broken.calls, working.calls) == (1, int(rerouted))
+
+
+@pytest.mark.asyncio
+async def test_backend_without_model_is_skipped() -> None:
+    services = FakeService(serves_model=False), FakeService()
+    router = _router(*services)
+
+    assert await router.model_ready()
+    await router.generate_bpmn("<bpmn/>")
+
+    assert [s.calls for s in services] == [0, 1]
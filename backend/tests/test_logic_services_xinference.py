@@ -0,0 +1,66 @@
+from collections.abc import Iterator
+
+import httpx
+import pytest
+
+from infra.http.pool import HttpClientPool
+from logic.services.xinference import XinferenceService
+from settings.config import Config
+from utils.decorators import retry
+from utils.upstreams import upstreams
+
+
+class FakePool(HttpClientPool):
+    def __init__(self, config: Config, status_code: int) -> None:
+        super().__init__(config)
+        self.calls = 0
+        self.status_code = status_code
+
+    def _answer(self, request: httpx.Request) -> httpx.Response:
+        self.calls += 1
+        return httpx.Response(self.status_code, json={"text": " Текст "})
+
+    def client(self, base_url: str, http2: bool = False) -> httpx.AsyncClient:
+        transport = httpx.MockTransport(self._answer)
+        return httpx.AsyncClient(base_url=base_url, transport=transport)
+
+
+@pytest.fixture(autouse=True)
+def fresh_upstreams(monkeypatch: pytest.MonkeyPatch) -> Iterator[None]:
+    monkeypatch.setattr(retry, "backoff", lambda *args: 0)
+    settings = (
+        upstreams.failure_threshold,
+        upstreams.recovery_time,
+        upstreams.half_open_calls,
+        upstreams.retry_ratio,
+        upstreams.retry_max_balance,
+    )
+    upstreams.configure(*settings)
+    yield
+    upstreams.configure(*settings)
+
+
+@pytest.mark.parametrize(
+    ("status_code", "calls", "failures"), [(503, 3, 3), (400, 1, 0)]
+)
+@pytest.mark.asyncio
+async def test_stt_counts_server_errors_as_upstream_failures(
+    status_code: int, calls: int, failures: int
+) -> None:
+    config = Config()  # type: ignore
+    pool = FakePool(config, status_code)
+    service = XinferenceService(config, pool)
+
+    with pytest.raises(httpx.HTTPStatusError):
+        await service.speach_to_text(b"audio")
+
+    assert pool.calls == calls
+    assert upstreams.stats()["xinference"]["failures"] == failures
+
+
+@pytest.mark.asyncio
+async def test_stt_returns_the_transcript() -> None:
+    config = Config()  # type: ignore
+    service = XinferenceService(config, FakePool(config, 200))
+
+    assert await service.speach_to_text(b"audio") == "Текст"
@@ -0,0 +1,61 @@
+from collections.abc import Iterator
+from typing import Optional
+
+import pytest
+from fast_depends import dependency_provider
+
+from logic import TypedContainer, init_container
+from logic.cache import BpmnCache
+from logic.services.base import BpmnService, GenerateResponse, Xml
+from logic.tasks.bpmn_create import _bpmn_create
+from settings.config import Config
+
+DIAGRAM = '<definitions xmlns="http://www.omg.org/spec/BPMN/20100524/MODEL"/>'
+
+
+class FakeCache:
+    def __init__(self) -> None:
+        self.entries: dict[str, str] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        self.entries[key] = value
+
+
+class FakeService:
+    model_name = "test"
+
+    def __init__(self, *answers: str) -> None:
+        self.answers = list(answers)
+
+    async def generate_bpmn(self, prompt: str) -> GenerateResponse[Xml]:
+        return GenerateResponse(model="test", response=Xml(xml=self.answers.pop(0)))
+
+
+class FakeContainer(TypedContainer):
+    def __init__(self, service: FakeService) -> None:
+        super().__init__()
+        self.cache = FakeCache()
+        config = Config(BPMN_GENERATION_MODE="xml")  # type: ignore
+        self.register(Config, instance=config)
+        self.register(BpmnCache, instance=self.cache)
+        self.register(BpmnService, instance=service)
+
+
+@pytest.fixture
+def container() -> Iterator[FakeContainer]:
+    container = FakeContainer(FakeService("<definitions>", DIAGRAM))
+    with dependency_provider.scope(init_container, lambda: container):
+        yield container
+
+
+@pytest.mark.asyncio
+async def test_malformed_xml_is_not_cached(container: FakeContainer) -> None:
+    with pytest.raises(ValueError):
+        await _bpmn_create("Процесс", None)
+    assert container.cache.entries == {}
+
+    assert await _bpmn_create("Процесс", None) == DIAGRAM
+    assert list(container.cache.entries.values()) == [DIAGRAM]
@@ -0,0 +1,103 @@
+from collections.abc import Iterator
+from typing import Any, Optional
+
+import pytest
+from fast_depends import dependency_provider
+from socketio import AsyncManager
+from taskiq import InMemoryBroker
+
+from application.api.pipeline.handlers import _audio_pipeline
+from logic import TypedContainer, init_container
+from logic.cache import TranscriptCache
+from logic.tasks.base import PipelineValue
+from logic.tasks.stt import (_transcript_cache_key, cache_transcript,
+                             cached_transcript, pipeline_stt_step)
+from settings.config import Config
+
+
+class FakeCache:
+    def __init__(self) -> None:
+        self.entries: dict[str, str] = {}
+
+    async def get(self, key: str) -> Optional[str]:
+        return self.entries.get(key)
+
+    async def set(self, key: str, value: str) -> None:
+        self.entries[key] = value
+
+
+class FakeManager:
+    def __init__(self) -> None:
+        self.events: list[dict[str, Any]] = []
+
+    async def emit(self, event: str, data: dict[str, Any], **kwargs: Any) -> None:
+        self.events.append(data)
+
+
+class FakeContainer(TypedContainer):
+    def __init__(self) -> None:
+        super().__init__()
+        self.cache = FakeCache()
+        self.manager = FakeManager()
+        self.register(Config, instance=Config())  # type: ignore
+        self.register(TranscriptCache, instance=self.cache)
+        self.register(AsyncManager, instance=self.manager)
+
+
+@pytest.fixture
+def container() -> Iterator[FakeContainer]:
+    container = FakeContainer()
+    with dependency_provider.scope(init_container, lambda: container):
+        yield container
+
+
+def test_transcript_cache_key_covers_stt_settings() -> None:
+    config = Config()  # type: ignore
+    key = _transcript_cache_key("ref-1", config)
+
+    assert key == _transcript_cache_key("ref-1", Config())  # type: ignore
+    assert key != _transcript_cache_key("ref-2", config)
+    for setting, value in [
+        ("UPLOAD_MAX_DURATION", config.upload_max_duration + 1),
+        ("STT_SEGMENT_SECONDS", config.stt_segment_seconds + 1),
+        ("XINFERENCE_MODEL", "other-model"),
+    ]:
+        changed = Config(**{setting: value})  # type: ignore
+        assert _transcript_cache_key("ref-1", changed) != key
+
+
+@pytest.mark.asyncio
+async def test_empty_transcript_is_not_cached(container: FakeContainer) -> None:
+    await cache_transcript("ref-1", "")
+    assert await cached_transcript("ref-1") is None
+
+    await cache_transcript("ref-1", "Текст")
+    assert await cached_transcript("ref-1") == "Текст"
+
+
+def test_cached_transcript_pipeline_starts_at_stt() -> None:
+    broker = InMemoryBroker()
+
+    cached = [s.step_data["task_name"] for s in _audio_pipeline(broker, "Т").steps]
+    uncached = [s.step_data["task_name"] for s in _audio_pipeline(broker, None).steps]
+
+    assert cached[0] == "logic.tasks.stt:pipeline_stt_step"
+    assert uncached[0].endswith(":pipeline_webm_covert_step")
+    assert cached == uncached[1:]
+
+
+@pytest.mark.asyncio
+async def test_stt_step_passes_cached_transcript(container: FakeContainer) -> None:
+    data = PipelineValue(
+        value="ref-1",
+        user_id="user-1",
+        pipeline_id="pipeline-1",
+        audio_ref="ref-1",
+        transcript="Текст",
+    )
+
+    result = await pipeline_stt_step(data)
+
+    assert result.value == "Текст"
+    assert container.manager.events[-1]["data"] == {"text": "Текст"}
+    assert container.cache.entries == {}
@@ -0,0 +1,59 @@
+import json
+
+from utils.json_stream import JsonArrayItemsParser, JsonStringFieldParser
+
+
+def test_string_field_parser_byte_by_byte() -> None:
+    xml = '<definitions id="d">\n  <process name="Заявка \U0001f600" />\\</definitions>'
+    document = json.dumps({"xml": xml})
+    parser = JsonStringFieldParser("xml")
+
+    decoded = "".join(parser.feed(char) for char in document)
+
+    assert decoded == xml
+    assert parser.value == xml
+    assert parser.done
+
+
+def test_string_field_parser_ascii_escapes() -> None:
+    xml = 'Задача "\U0001f600"'
+    document = json.dumps({"other": "x", "xml": xml}, ensure_ascii=True)
+    parser = JsonStringFieldParser("xml")
+
+    parser.feed(document[:20])
+    parser.feed(document[20:])
+
+    assert parser.value == xml
+
+
+def test_string_field_parser_ignores_trailing_data() -> None:
+    parser = JsonStringFieldParser("xml")
+
+    assert parser.feed('{ "xml" : "<a/>"') == "<a/>"
+    assert parser.feed(', "xml": "<b/>"}') == ""
+    assert parser.value == "<a/>"
+
+
+def test_array_items_parser_yields_completed_items() -> None:
+    items = [
+        {"error": "Шлюз [Gateway_1] без {условия}", "correction": 'Добавить "default"'},
+        {"error": "b\\", "correction": "c"},
+    ]
+    document = json.dumps(items)
+    parser = JsonArrayItemsParser()
+
+    completed = []
+    for i in range(0, len(document), 7):
+        completed.extend(parser.feed(document[i:i + 7]))
+
+    assert completed == items
+    assert parser.items == items
+
+
+def test_array_items_parser_partial_item() -> None:
+    parser = JsonArrayItemsParser()
+
+    assert parser.feed('[{"error": "a", "correction"') == []
+    assert parser.feed(': "b"}, {"error"') == [{"error": "a", "correction": "b"}]
+    last = parser.feed(': "c", "correction": "d"}]')
+    assert last == [{"error": "c", "correction": "d"}]
@@ -1,6 +1,9 @@
+import asyncio
+
 import pytest
 
 from utils.decorators.retry import async_retry
+from utils.upstreams import CircuitOpenError, UpstreamRegistry
 
 
 class CustomException(Exception):
@@ -47,3 +50,93 @@ async def test_async_retry_no_exception() -> None:
 
     result = await test_func()
     assert result == "No Exception"
+
+
+@pytest.mark.asyncio
+async def test_async_retry_opens_circuit() -> None:
+    registry = UpstreamRegistry(failure_threshold=2, recovery_time=60)
+    calls = 0
+
+    @async_retry(3, CustomException, upstream="test", registry=registry)
+    async def test_func() -> None:
+        nonlocal calls
+        calls += 1
+        raise CustomException("Test Exception")
+
+    with pytest.raises(CircuitOpenError):
+        await test_func()
+    with pytest.raises(CircuitOpenError):
+        await test_func()
+    assert calls == 2
+    assert registry.stats()["test"]["state"] == "open"
+    assert registry.stats()["test"]["rejected"] == 2
+
+
+@pytest.mark.asyncio
+async def test_async_retry_respects_budget() -> None:
+    registry = UpstreamRegistry(retry_ratio=0.5, retry_max_balance=1)
+    calls = 0
+
+    @async_retry(3, CustomException, upstream="test", registry=registry)
+    async def test_func() -> None:
+        nonlocal calls
+        calls += 1
+        raise CustomException("Test Exception")
+
+    with pytest.raises(CustomException):
+        await test_func()
+    assert calls == 2
+    with pytest.raises(CustomException):
+        await test_func()
+    assert calls == 3
+
+
+@pytest.mark.asyncio
+async def test_async_retry_cancelled_probe_frees_the_circuit() -> None:
+    registry = UpstreamRegistry(failure_threshold=1, recovery_time=0)
+    hang = True
+
+    @async_retry(1, CustomException, upstream="test", registry=registry)
+    async def test_func(fail: bool = False) -> str:
+        if fail:
+            raise CustomException("Test Exception")
+        if hang:
+            await asyncio.Event().wait()
+        return "Success"
+
+    with pytest.raises(CustomException):
+        await test_func(fail=True)
+    probe = asyncio.create_task(test_func())
+    await asyncio.sleep(0)
+    probe.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await probe
+    hang = False
+
+    assert await test_func() == "Success"
+    assert registry.stats()["test"]["state"] == "closed"
+
+
+@pytest.mark.asyncio
+async def test_async_retry_does_not_count_answers_as_failures() -> None:
+    registry = UpstreamRegistry(failure_threshold=1)
+    calls = 0
+
+    @async_retry(
+        3,
+        CustomException,
+        upstream="test",
+        registry=registry,
+        is_failure=lambda e: str(e) != "Bad request",
+    )
+    async def test_func() -> None:
+        nonlocal calls
+        calls += 1
+        raise CustomException("Bad request")
+
+    with pytest.raises(CustomException):
+        await test_func()
+    with pytest.raises(CustomException):
+        await test_func()
+    assert calls == 2
+    assert registry.stats()["test"]["state"] == "closed"
@@ -0,0 +1,62 @@
+import pytest
+
+from utils.upstreams import (CircuitBreaker, CircuitOpenError, RetryBudget,
+                             UpstreamRegistry, UpstreamStats)
+
+
+def test_circuit_breaker_probes_after_recovery() -> None:
+    breaker = CircuitBreaker("test", failure_threshold=2, recovery_time=0)
+
+    breaker.before_call()
+    breaker.on_failure()
+    assert (breaker.state, breaker.failures) == ("closed", 1)
+    breaker.before_call()
+    breaker.on_failure()
+    assert (breaker.state, breaker.opened) == ("open", 1)
+
+    breaker.before_call()
+    assert (breaker.state, breaker.failures) == ("half_open", 2)
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+    breaker.on_success()
+    assert (breaker.state, breaker.failures) == ("closed", 0)
+
+
+def test_circuit_breaker_reopens_on_failed_probe() -> None:
+    breaker = CircuitBreaker("test", failure_threshold=1, recovery_time=0)
+    breaker.on_failure()
+
+    breaker.before_call()
+    breaker.on_failure()
+    assert (breaker.state, breaker.opened) == ("open", 2)
+
+
+def test_retry_budget() -> None:
+    budget = RetryBudget(ratio=0.5, max_balance=2)
+
+    assert budget.withdraw()
+    assert budget.withdraw()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert not budget.withdraw()
+    budget.deposit()
+    assert budget.withdraw()
+
+
+def test_registry_notifies_the_listeners_of_breaker_changes() -> None:
+    registry = UpstreamRegistry(failure_threshold=1, recovery_time=60)
+    changes: list[tuple[str, UpstreamStats]] = []
+    registry.add_listener(lambda name, stats: changes.append((name, stats)))
+    breaker = registry.breaker("test")
+
+    breaker.before_call()
+    breaker.on_success()
+    assert changes == []
+    breaker.on_failure()
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+    assert [(name, stats["state"], stats["rejected"]) for name, stats in changes] == [
+        ("test", "open", 0),
+        ("test", "open", 1),
+    ]
@@ -1,16 +1,37 @@
 import asyncio
+import random
 from collections.abc import Callable, Coroutine
 from functools import wraps
-from typing import Any, ParamSpec, TypeVar
+from typing import Any, Optional, ParamSpec, TypeVar
+
+from utils.upstreams import UpstreamRegistry, upstreams
 
 RT = TypeVar("RT")
 P = ParamSpec("P")
 
 
+def backoff(attempt: int, sleep_time: float, max_sleep: float) -> float:
+    """Computes the delay before a retry: exponential backoff with full jitter.
+
+    The delay is drawn uniformly from zero to the exponential bound, so
+    callers failing at the same moment do not retry in lockstep.
+
+    :param attempt: Number of the failed attempt, starting from 1.
+    :param sleep_time: Bound of the delay after the first attempt.
+    :param max_sleep: Maximum bound of the delay.
+    :return: Delay in seconds.
+    """
+    return random.uniform(0, min(max_sleep, sleep_time * 2 ** (attempt - 1)))
+
+
 def async_retry(
     num_retries: int,
     exception_to_check: tuple[type[Exception], ...] | type[Exception],
     sleep_time: float = 0,
+    max_sleep: float = 30.0,
+    upstream: Optional[str | Callable[..., str]] = None,
+    registry: UpstreamRegistry = upstreams,
+    is_failure: Optional[Callable[[Exception], bool]] = None,
 ) -> Callable[
     [Callable[P, Coroutine[Any, Any, RT]]],
     Callable[P, Coroutine[Any, Any, RT]],
@@ -21,7 +42,22 @@ def async_retry(
     target async function. It preserves the original function's
     metadata using functools.wraps.
 
-    :param func: The async function to be decorated.
+    Retries are delayed by exponential backoff with full jitter. If an
+    upstream is given, its circuit breaker fails calls fast while it is
+    open, and its retry budget bounds the retries of all calls to it.
+
+    :param num_retries: Maximum number of attempts.
+    :param exception_to_check: Exceptions triggering a retry; they are also
+        counted as failures of the upstream.
+    :param is_failure: Tells whether a caught exception is a failure of the
+        upstream (e.g. a 5xx answer but not a 4xx one). Other exceptions are
+        answers: they are re-raised without a retry and close the breaker.
+        All caught exceptions are failures by default.
+    :param sleep_time: Bound of the delay after the first attempt.
+    :param max_sleep: Maximum bound of the delay.
+    :param upstream: Name of the upstream, or a function computing it from
+        the call arguments (e.g. from `self` of a method).
+    :param registry: Registry of the breakers and budgets.
     :return: Wrapped function with retry capability.
     """
 
@@ -43,14 +79,40 @@ def async_retry(
 
         @wraps(func)
         async def wrapper(*args: P.args, **kwargs: P.kwargs) -> RT:
+            name = upstream(*args, **kwargs) if callable(upstream) else upstream
+            breaker = registry.breaker(name) if name else None
+            budget = registry.budget(name) if name else None
+            if budget:
+                budget.deposit()
             for i in range(1, num_retries + 1):
+                if breaker:
+                    breaker.before_call()
                 try:
-                    return await func(*args, **kwargs)
+                    result = await func(*args, **kwargs)
                 except exception_to_check as e:
-                    if i < num_retries:
-                        await asyncio.sleep(sleep_time)
+                    if is_failure is not None and not is_failure(e):
+                        if breaker:
+                            breaker.on_success()
+                        raise
+                    if breaker:
+                        breaker.on_failure()
+                    if i < num_retries and (budget is None or budget.withdraw()):
+                        await asyncio.sleep(backoff(i, sleep_time, max_sleep))
                         continue
                     raise e
+                except Exception:
+                    # Ответ получен, upstream работает
+                    if breaker:
+                        breaker.on_success()
+                    raise
+                except BaseException:
+                    # Вызов отменён, ответа нет: освобождаем слот пробы
+                    if breaker:
+                        breaker.on_cancel()
+                    raise
+                if breaker:
+                    breaker.on_success()
+                return result
             raise RuntimeError()  # Эта строка теоретически недостижима, для страховки
 
         return wrapper
@@ -0,0 +1,166 @@
+"""
+Incremental parsing of JSON documents produced token by token.
+
+LLM backends stream their structured answers as raw text fragments. The
+parsers in this module consume such fragments and expose the parts of the
+document that are already complete, without waiting for the closing brace.
+
+Classes:
+    JsonStringFieldParser: Decodes one top-level string field progressively.
+    JsonArrayItemsParser: Yields items of a top-level array as they complete.
+"""
+
+import json
+import re
+from typing import Any
+
+_ESCAPES = {
+    '"': '"',
+    "\\": "\\",
+    "/": "/",
+    "b": "\b",
+    "f": "\f",
+    "n": "\n",
+    "r": "\r",
+    "t": "\t",
+}
+
+
+class JsonStringFieldParser:
+    """
+    Progressively decodes the string value of a single JSON object field.
+
+    Feed raw fragments of a document such as ``{"xml": "<definitions>..."}``
+    and receive the newly decoded part of the field value after each call.
+
+    :param field: Name of the field to extract.
+    """
+
+    def __init__(self, field: str) -> None:
+        self._key = re.compile(rf'"{re.escape(field)}"\s*:\s*"')
+        self._buffer = ""
+        self._started = False
+        self._pending_high: str | None = None
+        self.value = ""
+        self.done = False
+
+    def feed(self, chunk: str) -> str:
+        """
+        Consumes a raw fragment of the document.
+
+        :param chunk: Next fragment of the JSON document.
+        :return: Decoded text appended to the field value by this fragment.
+        """
+        if self.done:
+            return ""
+        self._buffer += chunk
+        if not self._started:
+            match = self._key.search(self._buffer)
+            if match is None:
+                return ""
+            self._started = True
+            self._buffer = self._buffer[match.end():]
+
+        decoded: list[str] = []
+        buf = self._buffer
+        pos = 0
+        while pos < len(buf):
+            char = buf[pos]
+            if char == '"':
+                self.done = True
+                pos += 1
+                break
+            if char != "\\":
+                decoded.append(self._flush_surrogate() + char)
+                pos += 1
+                continue
+            if pos + 1 >= len(buf):
+                break
+            escape = buf[pos + 1]
+            if escape == "u":
+                if pos + 6 > len(buf):
+                    break
+                decoded.append(self._decode_unicode(buf[pos + 2:pos + 6]))
+                pos += 6
+                continue
+            decoded.append(self._flush_surrogate() + _ESCAPES.get(escape, escape))
+            pos += 2
+
+        self._buffer = buf[pos:]
+        text = "".join(decoded)
+        self.value += text
+        return text
+
+    def _decode_unicode(self, digits: str) -> str:
+        code = int(digits, 16)
+        if 0xD800 <= code < 0xDC00:
+            previous = self._flush_surrogate()
+            self._pending_high = chr(code)
+            return previous
+        if 0xDC00 <= code < 0xE000 and self._pending_high is not None:
+            high = ord(self._pending_high) - 0xD800
+            self._pending_high = None
+            return chr(0x10000 + (high << 10) + (code - 0xDC00))
+        return self._flush_surrogate() + chr(code)
+
+    def _flush_surrogate(self) -> str:
+        pending, self._pending_high = self._pending_high, None
+        return pending or ""
+
+
+class JsonArrayItemsParser:
+    """
+    Extracts completed object/array items from a streamed top-level JSON array.
+
+    Feed raw fragments of a document such as ``[{"error": ...}, {...}]`` and
+    receive every item whose closing bracket has arrived.
+    """
+
+    def __init__(self) -> None:
+        self._buffer = ""
+        self._scanned = 0
+        self._depth = 0
+        self._in_string = False
+        self._escaped = False
+        self._item_start: int | None = None
+        self.items: list[Any] = []
+
+    def feed(self, chunk: str) -> list[Any]:
+        """
+        Consumes a raw fragment of the document.
+
+        :param chunk: Next fragment of the JSON document.
+        :return: Items completed by this fragment, in document order.
+        """
+        self._buffer += chunk
+        completed: list[Any] = []
+        buf = self._buffer
+        for pos in range(self._scanned, len(buf)):
+            char = buf[pos]
+            if self._in_string:
+                if self._escaped:
+                    self._escaped = False
+                elif char == "\\":
+                    self._escaped = True
+                elif char == '"':
+                    self._in_string = False
+                continue
+            if char == '"':
+                self._in_string = True
+            elif char in "[{":
+                self._depth += 1
+                if self._depth == 2:
+                    self._item_start = pos
+            elif char in "]}":
+                self._depth -= 1
+                if self._depth == 1 and self._item_start is not None:
+                    completed.append(json.loads(buf[self._item_start:pos + 1]))
+                    self._item_start = None
+
+        start = self._item_start if self._item_start is not None else len(buf)
+        self._buffer = buf[start:]
+        self._scanned = len(buf) - start
+        if self._item_start is not None:
+            self._item_start = 0
+        self.items.extend(completed)
+        return completed
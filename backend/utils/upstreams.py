@@ -0,0 +1,303 @@
+"""
+Failure handling state of upstream services.
+
+Every upstream (a model backend) has a circuit breaker and a retry budget,
+shared by all calls to it within the process:
+
+- the breaker opens after several failed calls in a row and fails the next
+  calls fast, without touching the upstream; after a recovery time it lets
+  a probe call through (half-open) and closes once the probe succeeds;
+- the budget limits retries to a fraction of the calls, so a failing
+  upstream does not receive several times its normal load.
+
+Listeners of the registry are told about every change of a breaker, e.g. to
+publish the state of the upstreams for metrics.
+
+Classes:
+    CircuitOpenError: Raised when a call is rejected by an open breaker.
+    CircuitBreaker: Breaker of one upstream.
+    RetryBudget: Retry budget of one upstream.
+    UpstreamStats: Breaker and budget state of an upstream.
+    UpstreamRegistry: Breakers and budgets of all upstreams.
+
+Attributes:
+    upstreams: Registry shared by the process.
+"""
+
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from typing import Literal, Optional, TypedDict
+
+CircuitState = Literal["closed", "open", "half_open"]
+
+
+class CircuitOpenError(RuntimeError):
+    """
+    Raised when a call is rejected by an open circuit breaker.
+
+    :param upstream: Name of the upstream.
+    :param retry_after: Time in seconds until the breaker lets a probe through.
+    """
+
+    def __init__(self, upstream: str, retry_after: float) -> None:
+        super().__init__(f"Circuit of {upstream} is open")
+        self.upstream = upstream
+        self.retry_after = retry_after
+
+
+@dataclass
+class CircuitBreaker:
+    """
+    Circuit breaker of one upstream.
+
+    :param name: Name of the upstream.
+    :param failure_threshold: Failed calls in a row opening the breaker.
+    :param recovery_time: Time in seconds before an open breaker lets
+        a probe call through.
+    :param half_open_calls: Probe calls allowed at once while half-open.
+    """
+
+    name: str
+    failure_threshold: int = 5
+    recovery_time: float = 30.0
+    half_open_calls: int = 1
+    state: CircuitState = field(default="closed", init=False)
+    failures: int = field(default=0, init=False)
+    opened: int = field(default=0, init=False)
+    rejected: int = field(default=0, init=False)
+    _opened_at: float = field(default=0.0, init=False)
+    _probes: int = field(default=0, init=False)
+    _on_change: Optional[Callable[[str], None]] = field(
+        default=None, init=False, repr=False
+    )
+
+    def _changed(self) -> None:
+        if self._on_change is not None:
+            self._on_change(self.name)
+
+    def before_call(self) -> None:
+        """
+        Admits a call, or rejects it while the breaker is open.
+
+        :return: None
+        :raises CircuitOpenError: If the call is rejected.
+        """
+        if self.state == "open":
+            elapsed = time.monotonic() - self._opened_at
+            if elapsed < self.recovery_time:
+                self.rejected += 1
+                self._changed()
+                raise CircuitOpenError(self.name, self.recovery_time - elapsed)
+            self.state, self._probes = "half_open", 0
+            self._changed()
+        if self.state == "half_open":
+            if self._probes >= self.half_open_calls:
+                self.rejected += 1
+                self._changed()
+                raise CircuitOpenError(self.name, 0.0)
+            self._probes += 1
+
+    def on_success(self) -> None:
+        """
+        Records a call answered by the upstream, closing the breaker.
+
+        :return: None
+        """
+        if self.state == "closed" and self.failures == 0:
+            return
+        self.state, self.failures = "closed", 0
+        self._changed()
+
+    def on_failure(self) -> None:
+        """
+        Records a failed call, opening the breaker over the threshold or
+        when a probe fails.
+
+        :return: None
+        """
+        self.failures += 1
+        if self.state == "half_open" or self.failures >= self.failure_threshold:
+            if self.state != "open":
+                self.opened += 1
+            self.state, self._opened_at = "open", time.monotonic()
+        self._changed()
+
+    def on_cancel(self) -> None:
+        """
+        Records a call abandoned before the upstream answered (e.g. a
+        cancelled task), freeing its probe slot while half-open.
+
+        :return: None
+        """
+        if self.state == "half_open" and self._probes > 0:
+            self._probes -= 1
+
+
+@dataclass
+class RetryBudget:
+    """
+    Retry budget of one upstream.
+
+    Every call deposits `ratio` of a retry, every retry withdraws a whole
+    one. The balance is capped, so a burst of failures may spend at most
+    `max_balance` retries saved during quiet times.
+
+    :param ratio: Retries allowed per call.
+    :param max_balance: Maximum number of saved retries.
+    """
+
+    ratio: float = 0.2
+    max_balance: float = 10.0
+    balance: float = field(default=-1.0, init=False)
+
+    def __post_init__(self) -> None:
+        self.balance = self.max_balance
+
+    def deposit(self) -> None:
+        """
+        Records a call.
+
+        :return: None
+        """
+        self.balance = min(self.max_balance, self.balance + self.ratio)
+
+    def withdraw(self) -> bool:
+        """
+        Takes a retry from the budget.
+
+        :return: True if the retry is allowed.
+        """
+        if self.balance < 1:
+            return False
+        self.balance -= 1
+        return True
+
+
+class UpstreamStats(TypedDict):
+    """
+    Breaker and budget state of an upstream.
+
+    :key state: State of the breaker: `closed`, `open` or `half_open`.
+    :key failures: Failed calls in a row.
+    :key opened: Number of times the breaker has opened.
+    :key rejected: Number of calls rejected by the breaker.
+    :key retry_balance: Retries left in the budget.
+    """
+
+    state: CircuitState
+    failures: int
+    opened: int
+    rejected: int
+    retry_balance: float
+
+
+@dataclass
+class UpstreamRegistry:
+    """
+    Circuit breakers and retry budgets of the upstreams, created on demand.
+
+    :param failure_threshold: Failed calls in a row opening a breaker.
+    :param recovery_time: Time in seconds before a probe call.
+    :param half_open_calls: Probe calls allowed at once.
+    :param retry_ratio: Retries allowed per call.
+    :param retry_max_balance: Maximum number of saved retries.
+    """
+
+    failure_threshold: int = 5
+    recovery_time: float = 30.0
+    half_open_calls: int = 1
+    retry_ratio: float = 0.2
+    retry_max_balance: float = 10.0
+    _breakers: dict[str, CircuitBreaker] = field(default_factory=dict, init=False)
+    _budgets: dict[str, RetryBudget] = field(default_factory=dict, init=False)
+    _listeners: list[Callable[[str, UpstreamStats], None]] = field(
+        default_factory=list, init=False
+    )
+
+    def configure(
+        self,
+        failure_threshold: int,
+        recovery_time: float,
+        half_open_calls: int,
+        retry_ratio: float,
+        retry_max_balance: float,
+    ) -> None:
+        """
+        Replaces the settings, dropping the state of all upstreams. The
+        listeners are kept.
+
+        :return: None
+        """
+        self.failure_threshold = failure_threshold
+        self.recovery_time = recovery_time
+        self.half_open_calls = half_open_calls
+        self.retry_ratio = retry_ratio
+        self.retry_max_balance = retry_max_balance
+        self._breakers.clear()
+        self._budgets.clear()
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        """
+        Returns the circuit breaker of an upstream.
+
+        :param name: Name of the upstream.
+        :return: Circuit breaker.
+        """
+        if name not in self._breakers:
+            breaker = CircuitBreaker(
+                name, self.failure_threshold, self.recovery_time, self.half_open_calls
+            )
+            breaker._on_change = self._notify
+            self._breakers[name] = breaker
+        return self._breakers[name]
+
+    def budget(self, name: str) -> RetryBudget:
+        """
+        Returns the retry budget of an upstream.
+
+        :param name: Name of the upstream.
+        :return: Retry budget.
+        """
+        if name not in self._budgets:
+            self._budgets[name] = RetryBudget(self.retry_ratio, self.retry_max_balance)
+        return self._budgets[name]
+
+    def add_listener(self, listener: Callable[[str, UpstreamStats], None]) -> None:
+        """
+        Subscribes to the changes of the breakers.
+
+        The listener is called synchronously from the breaker, it must not
+        block.
+
+        :param listener: Function receiving the name and the new state of
+            the changed upstream.
+        :return: None
+        """
+        self._listeners.append(listener)
+
+    def _notify(self, name: str) -> None:
+        stats = self._stats(name)
+        for listener in self._listeners:
+            listener(name, stats)
+
+    def _stats(self, name: str) -> UpstreamStats:
+        breaker = self.breaker(name)
+        return UpstreamStats(
+            state=breaker.state,
+            failures=breaker.failures,
+            opened=breaker.opened,
+            rejected=breaker.rejected,
+            retry_balance=self.budget(name).balance,
+        )
+
+    def stats(self) -> dict[str, UpstreamStats]:
+        """
+        Returns the state of every upstream called so far.
+
+        :return: Breaker and budget state by upstream name.
+        """
+        return {name: self._stats(name) for name in self._breakers}
+
+
+upstreams = UpstreamRegistry()